@@ -18,6 +18,10 @@ To get help on functions for manipulating data tables, exit the current help dia
 
 To get help on functions for plotting data, exit the current help dialog and run 'help(covid19pandas.plotters)'.
 
+To get help on chaining selections and calculations into one query, exit the current help dialog and run 'help(covid19pandas.queries)'.
+
+To get help on keeping earlier versions of the data, exit the current help dialog and run 'help(covid19pandas.snapshots)'.
+
 See also our tutorials at <https://github.com/PayneLab/covid19pandas/tree/master/docs>.
 """
 
@@ -26,9 +30,11 @@ import os
 import sys
 import warnings
 
-from .getters import get_cases, get_deaths, get_recovered, get_data_jhu, get_jhu_location_data, get_data_nyt
-from .selectors import select_top_x_regions, select_regions, calc_x_day_rolling_mean, calc_daily_change, calc_days_since_min_count
-from .plotters import plot_lines, plot_lines_two_y
+from .getters import get_cases, get_deaths, get_recovered, get_data_jhu, get_jhu_location_data, get_jhu_rollups, get_jhu_changes, get_data_nyt, get_nyt_changes, get_data_jhu_async, get_data_nyt_async, Refresher
+from .selectors import select_top_x_regions, select_regions, RegionIndex, Rollups, calc_x_day_rolling_mean, calc_rolling_stats, calc_daily_change, calc_days_since_min_count
+from .plotters import plot_lines, plot_lines_two_y, plot_regions_to_files, LinesTwoYPlotter
+from .queries import query, Query
+from .snapshots import enable_snapshots, disable_snapshots, SnapshotStore
 from .download import download_text as _download_text
 from .exceptions import PackageError, NoInternetError, PackageWarning, OldPackageVersionWarning
 
@@ -62,14 +68,15 @@ warnings.showwarning = _warning_displayer # And our custom warning displayer
 # Check whether the package is up-to-date
 VERSION_URL = "https://byu.box.com/shared/static/kkkun3iz1quiwwz4dmedm8fhu8qjuuiu.txt"
 
-try:
-    REMOTE_VERSION = _download_text(VERSION_URL)
-except NoInternetError:
-    pass
-else:
-    LOCAL_VERSION = version()
-    if REMOTE_VERSION != LOCAL_VERSION:
-        warnings.warn(f"Your version of covid19pandas ({LOCAL_VERSION}) is out-of-date. Latest is {REMOTE_VERSION}. Please run 'pip install --upgrade covid19pandas' to update it.", OldPackageVersionWarning, stacklevel=2)
+if not os.environ.get("COVID19PANDAS_SKIP_VERSION_CHECK"): # Set e.g. in container images built with "covid19pandas fetch", so importing doesn't go online
+    try:
+        REMOTE_VERSION = _download_text(VERSION_URL)
+    except NoInternetError:
+        pass
+    else:
+        LOCAL_VERSION = version()
+        if REMOTE_VERSION != LOCAL_VERSION:
+            warnings.warn(f"Your version of covid19pandas ({LOCAL_VERSION}) is out-of-date. Latest is {REMOTE_VERSION}. Please run 'pip install --upgrade covid19pandas' to update it.", OldPackageVersionWarning, stacklevel=2)
 
 # Make sure the data storage directories have been created
 PATH_HERE = os.path.abspath(os.path.dirname(__file__))
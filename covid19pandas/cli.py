@@ -0,0 +1,187 @@
+#   Copyright 2018 Samuel Payne sam_payne@byu.edu
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#       http://www.apache.org/licenses/LICENSE-2.0
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+The covid19pandas command, for getting data ready ahead of time, e.g. while building a container image. Run "covid19pandas fetch --help", or "python -m covid19pandas fetch --help", for the options.
+
+For more help, see our tutorials at <https://github.com/PayneLab/covid19pandas/tree/master/docs>.
+"""
+
+import argparse
+import concurrent.futures
+import os
+import time
+
+from .exceptions import NoInternetError
+from .getters import _JHU_FILE_NAMES, _JHU_TIME_SERIES_URL, _JHU_LOOKUP_URL, _JHU_LOOKUP_FILE_NAME, _NYT_URL, _data_dir, _download_file, _get_shared_table, _jhu_table_name, _nyt_table_name, _jhu_warm_table, _nyt_warm_table
+
+def main(argv=None):
+    """Run the covid19pandas command.
+
+    Parameters:
+    argv (list of str, optional): The command line arguments, without the program name. Default None uses sys.argv.
+
+    Returns:
+    int: The exit status. 0 if everything succeeded, or 1 if any file couldn't be downloaded.
+    """
+    parser = argparse.ArgumentParser(prog="covid19pandas", description="Get COVID-19 data ready ahead of time.")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    fetch = commands.add_parser("fetch", help="Download every data file, and optionally build the tables.", description="Download every data file from JHU (global and US time series, and the location lookup table) and NYT (states and counties), all at once. With --shared-dir, also build the tables into that directory, in the memory-mapped format the getters' shared_dir parameter uses. Calling a getter afterwards with update=False and the same shared_dir maps the built table instead of downloading or building anything. Set the COVID19PANDAS_SKIP_VERSION_CHECK environment variable at runtime to also skip the package's online version check on import.")
+    fetch.add_argument("--shared-dir", metavar="DIR", help="Build the tables into this directory. Default is to only download the files.")
+    fetch.add_argument("--format", choices=["long", "wide", "both"], default="long", help="Which table formats to build with --shared-dir. Long tables are built with all data types, and wide tables with each data type. Default long.")
+    fetch.add_argument("--jobs", type=int, default=os.cpu_count() or 1, metavar="N", help="How many tables to build at once, each in its own process. Default the number of CPUs.")
+    fetch.add_argument("--timeout", type=float, default=None, metavar="SECONDS", help="Seconds to wait for a server to connect or send more of a file before giving up on it. Default waits as long as the connection stays open.")
+
+    args = parser.parse_args(argv)
+
+    if args.jobs < 1:
+        fetch.error("--jobs must be at least 1.")
+
+    if not _fetch_files(args.timeout):
+        return 1
+
+    if args.shared_dir is not None:
+        formats = ["long", "wide"] if args.format == "both" else [args.format]
+        _build_tables(args.shared_dir, formats, args.jobs)
+
+    return 0
+
+# Helper functions
+def _data_files():
+    """List every data file the getters use.
+
+    Returns:
+    list of tuple: The (source, base_url, file_name) for each file.
+    """
+    files = [("jhu", _JHU_LOOKUP_URL, _JHU_LOOKUP_FILE_NAME)]
+    for region_files in _JHU_FILE_NAMES.values():
+        files += [("jhu", _JHU_TIME_SERIES_URL, file_name) for file_name in region_files.values()]
+    files += [("nyt", _NYT_URL, file_name) for file_name in ["us-states.csv", "us-counties.csv"]]
+
+    return files
+
+def _fetch_files(timeout):
+    """Download every data file at once, and print how long each took and how big it is.
+
+    Parameters:
+    timeout (float): Seconds to wait for a server to connect or send more of a file, or None.
+
+    Returns:
+    bool: Whether every file was downloaded.
+    """
+    files = _data_files()
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(files)) as executor:
+        results = list(executor.map(lambda file: _fetch_file(*file, timeout), files))
+    seconds = time.perf_counter() - start
+
+    failed = [result for result in results if result[1] is not None]
+    total_size = sum(result[2] for result in results if result[1] is None)
+    print(f"Downloaded {len(files) - len(failed)} of {len(files)} files ({_format_size(total_size)}) in {seconds:.1f} s")
+    for path, error, size, file_seconds in results:
+        if error is None:
+            print(f"  {path:<50} {_format_size(size):>10} {file_seconds:>7.1f} s")
+        else:
+            print(f"  {path:<50} failed: {error}")
+
+    return len(failed) == 0
+
+def _fetch_file(source, base_url, file_name, timeout):
+    """Download one data file.
+
+    Parameters:
+    source (str): The folder in the data directory to keep the file in, e.g. "jhu".
+    base_url (str): The raw.githubusercontent.com URL to the folder that contains the file.
+    file_name (str): The name of the file.
+    timeout (float): Seconds to wait for the server to connect or send more of the file, or None.
+
+    Returns:
+    tuple: The file's path within the data directory, the error message if it failed or else None, its size in bytes, and the seconds the download took.
+    """
+    start = time.perf_counter()
+    try:
+        _download_file(base_url, file_name, source, timeout=timeout)
+    except (NoInternetError, OSError) as error:
+        return f"{source}/{file_name}", str(error), 0, time.perf_counter() - start
+
+    size = os.path.getsize(os.path.join(_data_dir(), source, file_name))
+    return f"{source}/{file_name}", None, size, time.perf_counter() - start
+
+def _build_tables(shared_dir, formats, jobs):
+    """Build tables into a shared directory, and print how long each took and how big it is.
+
+    Parameters:
+    shared_dir (str): The directory to build the tables in.
+    formats (list of str): The table formats to build, "long" and/or "wide".
+    jobs (int): How many tables to build at once.
+
+    Returns:
+    None
+    """
+    tables = []
+    for format in formats:
+        data_types = ["all"] if format == "long" else ["cases", "deaths", "recovered"]
+        for data_type in data_types:
+            for region in _JHU_FILE_NAMES.keys():
+                if data_type == "all" or data_type in _JHU_FILE_NAMES[region]:
+                    tables.append((_jhu_table_name(format, data_type, region), _jhu_warm_table(format, data_type, region)))
+            if data_type != "recovered":
+                for counties in [False, True]:
+                    tables.append((_nyt_table_name(format, data_type, counties), _nyt_warm_table(format, data_type, counties)))
+
+    os.makedirs(shared_dir, exist_ok=True)
+    start = time.perf_counter()
+    if jobs == 1:
+        results = [_build_table(shared_dir, table_name, table) for table_name, table in tables]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs, len(tables))) as executor:
+            results = list(executor.map(_build_table, [shared_dir] * len(tables), *zip(*tables)))
+    seconds = time.perf_counter() - start
+
+    print(f"Built {len(tables)} tables ({_format_size(sum(result[2] for result in results))}) in {shared_dir} in {seconds:.1f} s")
+    for table_name, rows, size, table_seconds in results:
+        print(f"  {table_name:<50} {rows:>10,} rows {_format_size(size):>10} {table_seconds:>7.1f} s")
+
+def _build_table(shared_dir, table_name, table):
+    """Build one table into a shared directory, from the files already downloaded. Runs in a worker process when building several tables at once.
+
+    Parameters:
+    shared_dir (str): The directory to build the table in.
+    table_name (str): The name the getters save the table under.
+    table (tuple): The table's key, source, data files, and build function, from _jhu_warm_table or _nyt_warm_table.
+
+    Returns:
+    tuple: The table's name, its number of rows, its size on disk in bytes, and the seconds it took.
+    """
+    key, source, files, build = table
+    start = time.perf_counter()
+    df = _get_shared_table(shared_dir, table_name, source, files, None, build)
+    seconds = time.perf_counter() - start
+
+    # Only the current version is left, since _get_shared_table removes older ones
+    size = 0
+    for name in os.listdir(shared_dir):
+        if name.startswith(table_name + "_") and "_tmp_" not in name:
+            for dir_path, dir_names, file_names in os.walk(os.path.join(shared_dir, name)):
+                size += sum(os.path.getsize(os.path.join(dir_path, file_name)) for file_name in file_names)
+
+    return table_name, df.shape[0], size, seconds
+
+def _format_size(size):
+    """Format a number of bytes to read easily, e.g. "12.3 MB"."""
+    if size < 1000:
+        return f"{size} B"
+    for unit in ["KB", "MB", "GB"]:
+        size /= 1000
+        if size < 1000 or unit == "GB":
+            return f"{size:.1f} {unit}"
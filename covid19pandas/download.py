@@ -10,23 +10,44 @@
 #   limitations under the License.
 
 import requests
+import os
 from .exceptions import NoInternetError
 
-def download_github_file(url, path): 
+def download_github_file(url, path, cancel=None, timeout=None):
     """Download a file from raw.githubusercontent.com and save to the specified location.
 
     Parameters:
     url (str): The raw.githubusercontent.com URL to access the file.
     path (str): The path to the file (not just the directory) to save the file to on the local machine.
+    cancel (threading.Event, optional): An event that stops the download when it's set, e.g. from another thread. The file is saved in chunks, and the event is checked between them. Default None never stops.
+    timeout (float, optional): Seconds to wait for the server to connect or send the next chunk, before giving up. Default None waits as long as the connection stays open.
+
+    Returns:
+    bool: True if the file was saved, or False if the download was stopped by cancel, in which case nothing is left at path.
     """
     try:
-        response = requests.get(url)
+        response = requests.get(url, stream=cancel is not None, timeout=timeout)
         response.raise_for_status() # Raises a requests.HTTPError if the response code was unsuccessful
+
+        with open(path, 'wb') as dest:
+            if cancel is None:
+                dest.write(response.content)
+            else:
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    if cancel.is_set():
+                        break
+                    dest.write(chunk)
     except requests.RequestException: # Parent class for all exceptions in the requests module
+        if os.path.isfile(path):
+            os.remove(path)
         raise NoInternetError("Insufficient internet. Check your internet connection.") from None
 
-    with open(path, 'wb') as dest:
-        dest.write(response.content)
+    if cancel is not None and cancel.is_set():
+        response.close()
+        os.remove(path)
+        return False
+
+    return True
 
 def download_text(url):
     """Download text from a direct download url for a text file.
@@ -18,12 +18,41 @@ import numpy as np
 import os
 import warnings
 import datetime
+import hashlib
+import shutil
+import filecmp
+import io
+import asyncio
+import functools
+import threading
 
 from .download import download_github_file
 from .exceptions import FileDoesNotExistError, NoInternetError, ParameterError, DeprecatedWarning, FileNotUpdatedWarning
-from .utils import _wide_to_long, _long_to_wide
+from .selectors import Rollups
+from .snapshots import _get_store, _require_store
+from .utils import _wide_to_long, _long_to_wide, _key_codes, _first_positions, _diff_values, _save_shared, _load_shared
+
+_JHU_FILE_NAMES = {
+    "global": {
+        "cases": "time_series_covid19_confirmed_global.csv",
+        "deaths": "time_series_covid19_deaths_global.csv",
+        "recovered": "time_series_covid19_recovered_global.csv",
+    },
+     "us": {
+        "cases": "time_series_covid19_confirmed_US.csv",
+        "deaths": "time_series_covid19_deaths_US.csv",
+    }
+}
+_JHU_LOOKUP_FILE_NAME = "UID_ISO_FIPS_LookUp_Table.csv"
+_JHU_TIME_SERIES_URL = "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/csse_covid_19_time_series/"
+_JHU_LOOKUP_URL = "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/"
+_NYT_URL = "https://raw.githubusercontent.com/nytimes/covid-19-data/master/"
+
+_rollups_cache = {} # Maps (region, data_type) to (data version, Rollups), so each version of the data is only summed once
+_running_refresher = None # The Refresher that tables gotten with warm=True come from, if one is running
+_refresher_lock = threading.Lock()
 
-def get_data_jhu(format="long", data_type="all", region="global", update=True):
+def get_data_jhu(format="long", data_type="all", region="global", update=True, shared_dir=None, as_of=None, warm=False):
     """Get the most current data tables from JHU (https://github.com/CSSEGISandData/COVID-19).
 
     Parameters:
@@ -31,42 +60,33 @@ def get_data_jhu(format="long", data_type="all", region="global", update=True):
     data_type (str, optional): The type of data to get. Either "cases", "deaths", "recovered", or "all". Default "all".
     region (str, optional): The region to get data for. Either "global" or "us" (meaning United States). Default "global".
     update (bool, optional): Whether to download the latest tables from the Internet. Otherwise, will attempt to use previously downloaded tables, if they exist. Default True.
+    shared_dir (str, optional): A directory to share the table through, between processes on this machine, e.g. the workers of a pre-fork web server. The first process to get a particular version of the table saves its columns there as memory-mapped files, and every process that gets the same version afterwards maps those files instead of building its own copy, so the machine only holds one copy of the table. Text columns are saved as categoricals, so they're categorical in the returned table. Modifying the returned table only changes this process's view of it. Default None builds the table in this process.
+    as_of (str or datetime.datetime or datetime.date, optional): Build the table from the data files as they were at this time, in local time, instead of the latest ones. Uses the latest snapshot saved at or before it, without downloading anything, so update has no effect. Snapshots must have been enabled with enable_snapshots when the files were downloaded, and in this session. See the SnapshotStore.get docstring for the accepted formats. Can't be combined with shared_dir. Default None uses the latest files.
+    warm (bool, optional): Return the table kept up to date in the background by the running Refresher, instead of getting it now. Returns right away, except the first time a table is gotten this way, when it's built from the files already downloaded, and the refresher starts keeping it. The table's values are shared with other callers, so don't change them in place. Adding or dropping columns is fine. update has no effect. Can't be combined with shared_dir or as_of. Default False.
 
     Returns:
     pandas.DataFrame: The requested data table.
     """
 
-    region = region.lower()
-    format = format.lower()
-    data_type = data_type.lower()
+    format, data_type, region = _check_jhu_params(format, data_type, region)
+    _check_getter_options(shared_dir, as_of, warm)
 
-    # Parameter checks
-    if format not in ("long", "wide"):
-        raise ParameterError(f"Invalid argument for 'format' parameter. You passed {format}. Valid options are 'long' or 'wide'.")
-    if region not in ("global", "us"):
-        raise ParameterError(f"Invalid argument for 'region' parameter. You passed {region}. Valid options are 'global' or 'us'.")
-    if data_type not in ("all", "cases", "deaths", "recovered"):
-        raise ParameterError(f"Invalid argument for 'data_type' parameter. You passed {data_type}. Valid options are 'all', 'cases', 'deaths', or 'recovered'.")
+    if warm:
+        df = _get_warm_table(*_jhu_warm_table(format, data_type, region))
+    elif shared_dir is None:
+        if as_of is None:
+            _update_files("jhu", _jhu_files(data_type, region), update)
+        df = _build_data_jhu(format, data_type, region, as_of)
+    else:
+        df = _get_shared_table(shared_dir, _jhu_table_name(format, data_type, region), "jhu", _jhu_files(data_type, region), update, build=functools.partial(_build_data_jhu, format, data_type, region))
 
-    # Logic checks
-    if region == "us" and data_type == "recovered":
-        raise ParameterError("JHU does not provide recovery data for US states/counties.")
-    if format == "wide" and data_type == "all":
-        raise ParameterError("'wide' table format only allows one data type. You requested 'all'. Please pass 'cases', 'deaths', or 'recovered'.")
+    print("These data were obtained from Johns Hopkins University (https://github.com/CSSEGISandData/COVID-19).")
+    return df
 
+def _build_data_jhu(format, data_type, region, as_of=None):
+    """Build a JHU table from the data files already downloaded. See get_data_jhu for the parameters, which must already be checked."""
 
-    base_url = "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/csse_covid_19_time_series/"
-    file_names = {
-        "global": {
-            "cases": "time_series_covid19_confirmed_global.csv",
-            "deaths": "time_series_covid19_deaths_global.csv",
-            "recovered": "time_series_covid19_recovered_global.csv",
-        },
-         "us": {
-            "cases": "time_series_covid19_confirmed_US.csv",
-            "deaths": "time_series_covid19_deaths_US.csv",
-        }
-    }
+    file_names = _JHU_FILE_NAMES
 
     if region == "global":
         id_cols = ["Province/State", "Country/Region"]
@@ -74,7 +94,7 @@ def get_data_jhu(format="long", data_type="all", region="global", update=True):
         id_cols = ["Combined_Key"]
 
     if format == "wide":
-        df = _get_table(base_url, file_names[region][data_type], source="jhu", update=update)
+        df = _get_table("jhu", file_names[region][data_type], as_of=as_of)
 
         # Drop identifier columns besides the one we'll use to join on with the location table.
         date_cols = [col for col in df.columns if issubclass(type(col), datetime.date)]
@@ -85,42 +105,33 @@ def get_data_jhu(format="long", data_type="all", region="global", update=True):
         dfs = {}
         if data_type == "all":
             for iter_data_type in file_names[region].keys():
-                 dfs[iter_data_type] = _get_table(base_url, file_names[region][iter_data_type], source="jhu", update=update)
+                 dfs[iter_data_type] = _get_table("jhu", file_names[region][iter_data_type], as_of=as_of)
         else:
-             dfs[data_type] = _get_table(base_url, file_names[region][data_type], source="jhu", update=update)
+             dfs[data_type] = _get_table("jhu", file_names[region][data_type], as_of=as_of)
 
-        # Gather the tables into long format (a la tidyr), and join into one table
+        # Gather the tables into long format (a la tidyr)
         date_and_id_cols = ["date"] + id_cols
-        all_df = None
+        long_dfs = {}
         for iter_data_type, df in dfs.items():
-
             df = _wide_to_long(df, iter_data_type)
-            df = df[date_and_id_cols + [iter_data_type]] # Drop identifier columns besides the one we'll use to join on with the location table.
-
-            # Temporarily fill NaNs in the id cols with a string so they can be equal in join key comparisons
-            for id_col in id_cols:
-                df[id_col] = df[id_col].fillna("n/a")
-
-            if all_df is None:
-                all_df = pd.DataFrame(columns=date_and_id_cols)
-                all_df = all_df.set_index(date_and_id_cols)
-
-            # Set the date and id cols as the index of df, then join on them to all_df
-            df = df.set_index(date_and_id_cols)
-            all_df = all_df.join(df, how="outer")
+            long_dfs[iter_data_type] = df[date_and_id_cols + [iter_data_type]] # Drop identifier columns besides the one we'll use to join on with the location table.
 
-        all_df = all_df.fillna(0)
-        all_df = all_df.astype('int64')
-        all_df = all_df.reset_index()
+        # Outer join the tables into one on the date and id cols. We match rows through integer codes for the join keys, so NaNs in the id cols still compare equal.
+        keys = pd.concat([df[date_and_id_cols] for df in long_dfs.values()], ignore_index=True)
+        codes = _key_codes(keys, date_and_id_cols)
+        all_df = keys.take(_first_positions(codes)).reset_index(drop=True)
 
-        # Put the NaNs back into the id cols
-        for id_col in id_cols:
-            all_df[id_col] = all_df[id_col].replace(to_replace="n/a", value=np.nan)
+        start = 0
+        for iter_data_type, df in long_dfs.items():
+            counts = np.zeros(all_df.shape[0], dtype="int64") # Keys missing from this table get a count of 0
+            counts[codes[start:start + df.shape[0]]] = df[iter_data_type].fillna(0).astype("int64").values
+            all_df[iter_data_type] = counts
+            start += df.shape[0]
 
         df = all_df
 
     # Get the location data to join in
-    loc_table = get_jhu_location_data(update=update)
+    loc_table = _get_table("jhu", _JHU_LOOKUP_FILE_NAME, as_of=as_of)
     if region == "global":
         loc_table = loc_table.rename(columns={"Country_Region": "Country/Region", "Province_State": "Province/State"})
         loc_table = loc_table[pd.isnull(loc_table["Admin2"])] # Drop location data for individual US counties--we only want state level data, to avoid duplicate rows
@@ -150,25 +161,118 @@ def get_data_jhu(format="long", data_type="all", region="global", update=True):
     df = df.sort_values(by=sort_cols)
     df = df.reset_index(drop=True) # So the range index is still in ascending order after sorting
 
-    print("These data were obtained from Johns Hopkins University (https://github.com/CSSEGISandData/COVID-19).")
     return df
 
-def get_jhu_location_data(update=True):
+def get_jhu_location_data(update=True, as_of=None):
     """Get the location data table from JHU (see https://github.com/CSSEGISandData/COVID-19/blob/master/csse_covid_19_data/UID_ISO_FIPS_LookUp_Table.csv).
 
     Parameters:
     update (bool, optional): Whether to try updating the table. Default True.
+    as_of (str or datetime.datetime or datetime.date, optional): Get the table as it was at this time, from the latest snapshot saved at or before it. See the get_data_jhu docstring. Default None uses the latest file.
 
     Returns:
     pandas.DataFrame: The location data table from JHU.
     """
 
-    loc_table_base_url = "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/"
-    loc_table_name = "UID_ISO_FIPS_LookUp_Table.csv"
-    loc_table = _get_table(loc_table_base_url, loc_table_name, source="jhu", update=update)
+    if as_of is None:
+        _update_files("jhu", [(_JHU_LOOKUP_URL, _JHU_LOOKUP_FILE_NAME)], update)
+    loc_table = _get_table("jhu", _JHU_LOOKUP_FILE_NAME, as_of=as_of)
     return loc_table
 
-def get_data_nyt(format="long", data_type="all", counties=False, update=True):
+def get_jhu_rollups(data_type="all", region="us", update=True):
+    """Get the JHU counts summed at every level of the region hierarchy from the JHU location lookup table, i.e. county (Admin2) to state (Province_State) to country (Country_Region) for the U.S. table, or province to country for the global table. The sums are calculated once for each version of the downloaded data, and cached until the data changes. Pass the result to select_regions or select_top_x_regions through their rollups parameter, along with a long format table gotten with the same parameters.
+
+    Parameters:
+    data_type (str, optional): The type of data to sum. Either "cases", "deaths", "recovered", or "all". Default "all".
+    region (str, optional): The region to get data for. Either "global" or "us" (meaning United States). Default "us".
+    update (bool, optional): Whether to download the latest tables from the Internet. Otherwise, will attempt to use previously downloaded tables, if they exist. Default True.
+
+    Returns:
+    Rollups: The summed counts.
+    """
+    format, data_type, region = _check_jhu_params("long", data_type, region)
+    files = _jhu_files(data_type, region)
+    _update_files("jhu", files, update)
+
+    # Only build the table and sum it if the data changed since the cached sums
+    version = _data_version("jhu", [file_name for base_url, file_name in files])
+    cached = _rollups_cache.get((region, data_type))
+    if cached is None or cached[0] != version:
+        _rollups_cache[(region, data_type)] = (version, Rollups(_build_data_jhu(format, data_type, region)))
+
+    print("These data were obtained from Johns Hopkins University (https://github.com/CSSEGISandData/COVID-19).")
+    return _rollups_cache[(region, data_type)][1]
+
+def get_jhu_changes(data_type="all", region="global"):
+    """Get the values that JHU revised or added in their latest data, compared with the version before it. Downloads that don't change a file are skipped over, so the comparison is always between the two latest different versions, however many times the data was updated in between. Use it after updating the data, e.g. with get_data_jhu, to find which regions need to be recalculated. An empty table means nothing changed.
+
+    Parameters:
+    data_type (str, optional): The type of data to compare. Either "cases", "deaths", "recovered", or "all". Default "all".
+    region (str, optional): The region to compare data for. Either "global" or "us" (meaning United States). Default "global".
+
+    Returns:
+    pandas.DataFrame: One row for each changed value, with columns for the date, the region's id columns ("Province/State" and "Country/Region" for global data, or "Combined_Key" for U.S. data, like the get_data_jhu tables), "data_type", "old", and "new". Values for new dates or regions have NaN for "old", and values that were removed have NaN for "new". Sorted by date, then region.
+    """
+    region = region.lower()
+    data_type = data_type.lower()
+
+    # Parameter checks
+    if region not in ("global", "us"):
+        raise ParameterError(f"Invalid argument for 'region' parameter. You passed {region}. Valid options are 'global' or 'us'.")
+    if data_type not in ("all", "cases", "deaths", "recovered"):
+        raise ParameterError(f"Invalid argument for 'data_type' parameter. You passed {data_type}. Valid options are 'all', 'cases', 'deaths', or 'recovered'.")
+
+    # Logic checks
+    if region == "us" and data_type == "recovered":
+        raise ParameterError("JHU does not provide recovery data for US states/counties.")
+
+    if region == "global":
+        id_cols = ["Province/State", "Country/Region"]
+    else: # region == "us"
+        id_cols = ["Combined_Key"]
+
+    data_types = _JHU_FILE_NAMES[region].keys() if data_type == "all" else [data_type]
+    diffs = []
+    for iter_data_type in data_types:
+        versions = _file_versions("jhu", _JHU_FILE_NAMES[region][iter_data_type])
+        if versions is None:
+            continue # Nothing changed
+
+        old, new = [df[id_cols + [col for col in df.columns if issubclass(type(col), datetime.date)]] for df in versions]
+        diff = _diff_values(old, new, id_cols, "date")
+        diff["data_type"] = iter_data_type
+        diffs.append(diff)
+
+    return _format_changes(diffs, id_cols)
+
+def get_nyt_changes(data_type="all", counties=False):
+    """Get the values that NYT revised or added in their latest data, compared with the version before it. Downloads that don't change a file are skipped over, so the comparison is always between the two latest different versions, however many times the data was updated in between. Use it after updating the data, e.g. with get_data_nyt, to find which regions need to be recalculated. An empty table means nothing changed.
+
+    Parameters:
+    data_type (str, optional): The type of data to compare. Either "cases", "deaths", or "all". Default "all".
+    counties (bool, optional): Whether to compare the county-level data instead of the state-level data. Default False.
+
+    Returns:
+    pandas.DataFrame: One row for each changed value, with columns for the date, the region's id columns ("county" and "state" for county data, or "state" for state data), "data_type", "old", and "new". Values for new dates or regions have NaN for "old", and values that were removed have NaN for "new". Sorted by date, then region.
+    """
+    data_type = data_type.lower()
+
+    # Parameter checks
+    if data_type not in ("all", "cases", "deaths"):
+        raise ParameterError(f"Invalid argument for 'data_type' parameter. You passed {data_type}. Valid options are 'all', 'cases', or 'deaths'.")
+
+    id_cols = ["county", "state"] if counties else ["state"]
+    data_types = ["cases", "deaths"] if data_type == "all" else [data_type]
+
+    diffs = []
+    versions = _file_versions("nyt", "us-counties.csv" if counties else "us-states.csv")
+    if versions is not None:
+        old, new = [df[["date"] + id_cols + data_types] for df in versions]
+        diffs.append(_diff_values(old, new, ["date"] + id_cols, "data_type"))
+
+    return _format_changes(diffs, id_cols)
+
+def get_data_nyt(format="long", data_type="all", counties=False, update=True, shared_dir=None, as_of=None, warm=False):
     """Get the most current data tables from NYT (https://github.com/nytimes/covid-19-data).
 
     Parameters:
@@ -176,30 +280,37 @@ def get_data_nyt(format="long", data_type="all", counties=False, update=True):
     data_type (str, optional): The type of data to get. Either "cases", "deaths", or "all". Default "all".
     counties (bool, optional): Whether to get county-level data instead of state-level data. Default False.
     update (bool, optional): Whether to download the latest tables from the Internet. Otherwise, will attempt to use previously downloaded tables, if they exist. Default True.
+    shared_dir (str, optional): A directory to share the table through, between processes on this machine, e.g. the workers of a pre-fork web server. The first process to get a particular version of the table saves its columns there as memory-mapped files, and every process that gets the same version afterwards maps those files instead of building its own copy, so the machine only holds one copy of the table. Text columns are saved as categoricals, so they're categorical in the returned table. Modifying the returned table only changes this process's view of it. Default None builds the table in this process.
+    as_of (str or datetime.datetime or datetime.date, optional): Build the table from the data files as they were at this time, in local time, instead of the latest ones. Uses the latest snapshot saved at or before it, without downloading anything, so update has no effect. Snapshots must have been enabled with enable_snapshots when the files were downloaded, and in this session. See the SnapshotStore.get docstring for the accepted formats. Can't be combined with shared_dir. Default None uses the latest files.
+    warm (bool, optional): Return the table kept up to date in the background by the running Refresher, instead of getting it now. Returns right away, except the first time a table is gotten this way, when it's built from the files already downloaded, and the refresher starts keeping it. The table's values are shared with other callers, so don't change them in place. Adding or dropping columns is fine. update has no effect. Can't be combined with shared_dir or as_of. Default False.
 
     Returns:
     pandas.DataFrame: The requested data table.
     """
 
-    format = format.lower()
-    data_type = data_type.lower()
+    format, data_type = _check_nyt_params(format, data_type)
+    _check_getter_options(shared_dir, as_of, warm)
 
-    # Parameter checks
-    if format not in ("long", "wide"):
-        raise ParameterError(f"Invalid argument for 'format' parameter. You passed {format}. Valid options are 'long' or 'wide'.")
-    if data_type not in ("all", "cases", "deaths"):
-        raise ParameterError(f"Invalid argument for 'data_type' parameter. You passed {data_type}. Valid options are 'all', 'cases', or 'deaths'.")
+    if warm:
+        df = _get_warm_table(*_nyt_warm_table(format, data_type, counties))
+    elif shared_dir is None:
+        if as_of is None:
+            _update_files("nyt", _nyt_files(counties), update)
+        df = _build_data_nyt(format, data_type, counties, as_of)
+    else:
+        df = _get_shared_table(shared_dir, _nyt_table_name(format, data_type, counties), "nyt", _nyt_files(counties), update, build=functools.partial(_build_data_nyt, format, data_type, counties))
 
-    # Logic checks
-    if format == "wide" and data_type == "all":
-        raise ParameterError("'wide' table format only allows one data type. You requested 'all'. Please pass 'cases', 'deaths', or 'recovered'.")
+    print("These data were obtained from The New York Times (https://github.com/nytimes/covid-19-data).")
+    return df
+
+def _build_data_nyt(format, data_type, counties, as_of=None):
+    """Build an NYT table from the data file already downloaded. See get_data_nyt for the parameters, which must already be checked."""
 
     # Get either counties or states table
-    base_url = "https://raw.githubusercontent.com/nytimes/covid-19-data/master/"
     if counties:
-        df = _get_table(base_url, "us-counties.csv", source="nyt", update=update)
+        df = _get_table("nyt", "us-counties.csv", as_of=as_of)
     else: # states
-        df = _get_table(base_url, "us-states.csv", source="nyt", update=update)
+        df = _get_table("nyt", "us-states.csv", as_of=as_of)
 
     # Drop unrequested columns, if needed
     if data_type == "cases":
@@ -211,40 +322,567 @@ def get_data_nyt(format="long", data_type="all", counties=False, update=True):
         # Spread table into wide format, a la tidyr
         df = _long_to_wide(df, data_type, sort_by="state")
 
+    return df
+
+async def get_data_jhu_async(format="long", data_type="all", region="global", update=True, timeout=None, executor=None):
+    """Get the most current data tables from JHU, without blocking the event loop. A coroutine version of get_data_jhu for asyncio programs, which returns the same table. The data files are downloaded at the same time as each other, in threads, and the table is built in an executor. Many tables can be gotten at once, e.g. with asyncio.gather, and a file needed by several of them is only downloaded once. Cancelling the call stops its downloads, keeping the previously downloaded files.
+
+    Parameters:
+    format (str, optional): Format to return the tables in. Pass either "long" or "wide". See https://en.wikipedia.org/wiki/Wide_and_narrow_data for details on the two formats. Default "long".
+    data_type (str, optional): The type of data to get. Either "cases", "deaths", "recovered", or "all". Default "all".
+    region (str, optional): The region to get data for. Either "global" or "us" (meaning United States). Default "global".
+    update (bool, optional): Whether to download the latest tables from the Internet. Otherwise, will attempt to use previously downloaded tables, if they exist. Default True.
+    timeout (float, optional): Seconds to allow for the whole call. If they run out, the call is cancelled and raises asyncio.TimeoutError. A table that's already being built finishes in the background, but isn't returned. Default None allows as long as it takes.
+    executor (concurrent.futures.Executor, optional): The executor to build the table in. Default None uses the event loop's default executor.
+
+    Returns:
+    pandas.DataFrame: The requested data table.
+    """
+    format, data_type, region = _check_jhu_params(format, data_type, region)
+    build = functools.partial(_build_data_jhu, format, data_type, region)
+    df, statuses = await asyncio.wait_for(_get_table_async("jhu", _jhu_files(data_type, region), update, build, timeout, executor), timeout)
+    _warn_not_updated(statuses, 2)
+
+    print("These data were obtained from Johns Hopkins University (https://github.com/CSSEGISandData/COVID-19).")
+    return df
+
+async def get_data_nyt_async(format="long", data_type="all", counties=False, update=True, timeout=None, executor=None):
+    """Get the most current data tables from NYT, without blocking the event loop. A coroutine version of get_data_nyt for asyncio programs, which returns the same table. See get_data_jhu_async for how it works.
+
+    Parameters:
+    format (str, optional): Format to return the tables in. Pass either "long" or "wide". See https://en.wikipedia.org/wiki/Wide_and_narrow_data for details on the two formats. Default "long".
+    data_type (str, optional): The type of data to get. Either "cases", "deaths", or "all". Default "all".
+    counties (bool, optional): Whether to get county-level data instead of state-level data. Default False.
+    update (bool, optional): Whether to download the latest tables from the Internet. Otherwise, will attempt to use previously downloaded tables, if they exist. Default True.
+    timeout (float, optional): Seconds to allow for the whole call. If they run out, the call is cancelled and raises asyncio.TimeoutError. A table that's already being built finishes in the background, but isn't returned. Default None allows as long as it takes.
+    executor (concurrent.futures.Executor, optional): The executor to build the table in. Default None uses the event loop's default executor.
+
+    Returns:
+    pandas.DataFrame: The requested data table.
+    """
+    format, data_type = _check_nyt_params(format, data_type)
+    build = functools.partial(_build_data_nyt, format, data_type, counties)
+    df, statuses = await asyncio.wait_for(_get_table_async("nyt", _nyt_files(counties), update, build, timeout, executor), timeout)
+    _warn_not_updated(statuses, 2)
+
     print("These data were obtained from The New York Times (https://github.com/nytimes/covid-19-data).")
     return df
 
+class Refresher:
+    """Keeps tables up to date in a background thread, so getting them never waits on downloading or building. Every interval, the refresher downloads the data files for the tables it keeps, rebuilds the tables whose files changed, and swaps each new table in once it's complete. Get the tables by passing warm=True to get_data_jhu or get_data_nyt. Only one refresher can run at a time. For example:
+
+        refresher = covid19pandas.Refresher(interval=3600)
+        refresher.add_jhu(format="long", data_type="all", region="us")
+        refresher.start()
+        ...
+        df = covid19pandas.get_data_jhu(format="long", data_type="all", region="us", warm=True)
+
+    Parameters:
+    interval (float, optional): Seconds to wait between refreshes. Default 3600, i.e. one hour.
+    """
+
+    def __init__(self, interval=3600):
+        self.interval = interval
+        self.last_refresh = None # When the last refresh finished
+        self.last_error = None # The exception that stopped the last failed refresh, if any
+        self._tables = {} # Maps each table's key to (source, files, build)
+        self._published = {} # Maps each table's key to (data version, table). Entries are only ever replaced whole, so readers always see a complete table.
+        self._refresh_lock = threading.Lock() # So only one refresh runs at a time
+        self._tables_lock = threading.Lock() # Guards _tables and _build_locks, which getters add to from their own threads
+        self._build_locks = {} # Maps each table's key to a lock held while building it, so a table is only built once at a time, whether by a refresh or a first get
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def add_jhu(self, format="long", data_type="all", region="global"):
+        """Keep a JHU table up to date. The parameters are the same as for get_data_jhu. It's built during the next refresh, or the first time it's gotten with warm=True, whichever comes first.
+
+        Parameters:
+        format (str, optional): Format of the table, either "long" or "wide". Default "long".
+        data_type (str, optional): The type of data, either "cases", "deaths", "recovered", or "all". Default "all".
+        region (str, optional): The region to keep data for, either "global" or "us" (meaning United States). Default "global".
+
+        Returns:
+        None
+        """
+        format, data_type, region = _check_jhu_params(format, data_type, region)
+        self._add(*_jhu_warm_table(format, data_type, region))
+
+    def add_nyt(self, format="long", data_type="all", counties=False):
+        """Keep an NYT table up to date. The parameters are the same as for get_data_nyt. It's built during the next refresh, or the first time it's gotten with warm=True, whichever comes first.
+
+        Parameters:
+        format (str, optional): Format of the table, either "long" or "wide". Default "long".
+        data_type (str, optional): The type of data, either "cases", "deaths", or "all". Default "all".
+        counties (bool, optional): Whether to keep county-level data instead of state-level data. Default False.
+
+        Returns:
+        None
+        """
+        format, data_type = _check_nyt_params(format, data_type)
+        self._add(*_nyt_warm_table(format, data_type, counties))
+
+    def start(self):
+        """Start refreshing in a background thread. The first refresh starts right away. The thread doesn't keep Python from exiting.
+
+        Returns:
+        None
+        """
+        global _running_refresher
+        with _refresher_lock:
+            if _running_refresher is not None:
+                raise ParameterError("A refresher is already running. Call its stop method before starting another.")
+            _running_refresher = self
+
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="covid19pandas-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop refreshing. Waits for a refresh that's in progress to finish. Tables gotten with warm=True after this raise an error, instead of returning tables that are no longer kept up to date.
+
+        Parameters:
+        timeout (float, optional): Seconds to wait for the thread to finish. Default None waits as long as it takes.
+
+        Returns:
+        None
+        """
+        global _running_refresher
+        with _refresher_lock:
+            if _running_refresher is self:
+                _running_refresher = None
+
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def refresh(self):
+        """Download the data files for all the tables being kept, and rebuild the tables whose files changed, now. The background thread calls this every interval, but it can also be called directly.
+
+        Returns:
+        None
+        """
+        with self._refresh_lock:
+            with self._tables_lock:
+                tables = dict(self._tables)
+
+            # Download each file once, even if several tables use it
+            files = {}
+            for source, table_files, build in tables.values():
+                for base_url, file_name in table_files:
+                    files[(source, file_name)] = base_url
+            statuses = [_update_file(base_url, file_name, source, update=True) for (source, file_name), base_url in files.items()]
+            _warn_not_updated(statuses, 2)
+
+            for key, (source, table_files, build) in tables.items():
+                with self._build_locks[key]:
+                    version = _data_version(source, [file_name for base_url, file_name in table_files])
+                    published = self._published.get(key)
+                    if published is None or published[0] != version:
+                        self._published[key] = (version, build())
+
+            self.last_refresh = datetime.datetime.now()
+
+    # Helper methods
+    def _add(self, key, source, files, build):
+        """Start keeping a table, if it isn't kept already."""
+        with self._tables_lock:
+            self._tables.setdefault(key, (source, files, build))
+            self._build_locks.setdefault(key, threading.Lock())
+
+    def _get(self, key, source, files, build):
+        """Get the latest version of a table. If it isn't kept yet, build it from the files already downloaded, and keep it from now on. Callers that get a table at the same time before it's published wait for one build."""
+        published = self._published.get(key)
+        if published is None:
+            self._add(key, source, files, build)
+            with self._build_locks[key]:
+                published = self._published.get(key) # Another caller or a refresh may have published it while we waited
+                if published is None:
+                    version = _data_version(source, [file_name for base_url, file_name in files])
+                    published = (version, build())
+                    self._published[key] = published
+
+        # The table is shared between callers, so each gets its own shallow copy, which they can add or drop columns on without affecting the others
+        return published[1].copy(deep=False)
+
+    def _run(self):
+        """Refresh every interval until stopped."""
+        while not self._stopping.is_set():
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as error: # Keep the thread going, and keep serving the tables from the last successful refresh
+                self.last_error = error
+                warnings.warn(f"Refreshing data failed, so the tables from the last refresh will still be used. The error was: {error!r}", FileNotUpdatedWarning)
+
+            self._stopping.wait(self.interval)
+
 # Helper functions
 
-def _get_table(base_url, file_name, source, update):
-    """Get a table.
+def _check_jhu_params(format, data_type, region):
+    """Check the parameters for a JHU table. See get_data_jhu for what they mean.
+
+    Returns:
+    tuple of str: The format, data_type, and region, lowercased.
+    """
+    region = region.lower()
+    format = format.lower()
+    data_type = data_type.lower()
+
+    # Parameter checks
+    if format not in ("long", "wide"):
+        raise ParameterError(f"Invalid argument for 'format' parameter. You passed {format}. Valid options are 'long' or 'wide'.")
+    if region not in ("global", "us"):
+        raise ParameterError(f"Invalid argument for 'region' parameter. You passed {region}. Valid options are 'global' or 'us'.")
+    if data_type not in ("all", "cases", "deaths", "recovered"):
+        raise ParameterError(f"Invalid argument for 'data_type' parameter. You passed {data_type}. Valid options are 'all', 'cases', 'deaths', or 'recovered'.")
+
+    # Logic checks
+    if region == "us" and data_type == "recovered":
+        raise ParameterError("JHU does not provide recovery data for US states/counties.")
+    if format == "wide" and data_type == "all":
+        raise ParameterError("'wide' table format only allows one data type. You requested 'all'. Please pass 'cases', 'deaths', or 'recovered'.")
+
+    return format, data_type, region
+
+def _check_nyt_params(format, data_type):
+    """Check the parameters for an NYT table. See get_data_nyt for what they mean.
+
+    Returns:
+    tuple of str: The format and data_type, lowercased.
+    """
+    format = format.lower()
+    data_type = data_type.lower()
+
+    # Parameter checks
+    if format not in ("long", "wide"):
+        raise ParameterError(f"Invalid argument for 'format' parameter. You passed {format}. Valid options are 'long' or 'wide'.")
+    if data_type not in ("all", "cases", "deaths"):
+        raise ParameterError(f"Invalid argument for 'data_type' parameter. You passed {data_type}. Valid options are 'all', 'cases', or 'deaths'.")
+
+    # Logic checks
+    if format == "wide" and data_type == "all":
+        raise ParameterError("'wide' table format only allows one data type. You requested 'all'. Please pass 'cases', 'deaths', or 'recovered'.")
+
+    return format, data_type
+
+def _check_getter_options(shared_dir, as_of, warm):
+    """Check that a getter wasn't passed options that can't be used together. See get_data_jhu for what they mean."""
+    if as_of is not None and shared_dir is not None:
+        raise ParameterError("as_of and shared_dir can't be used together. Shared tables are always built from the latest data files.")
+    if warm and (as_of is not None or shared_dir is not None):
+        raise ParameterError("warm can't be combined with as_of or shared_dir. Warm tables are always the latest ones, kept in this process.")
+
+def _jhu_files(data_type, region):
+    """Get the data files a JHU table is built from.
 
     Parameters:
-    base_url (str): The raw.githubusercontent.com URL to the folder that contains the file we want.
-    file_name (str): The name of the file we want from the folder specified by the URL.
-    update (bool): Whether to re-download the table from the Internet. Otherwise, will load a previously downloaded copy, if it exists.
+    data_type (str): The table's data type, already checked.
+    region (str): The table's region, already checked.
 
     Returns:
-    pandas.DataFrame: The requested DataFrame.
+    list of tuple: The (base_url, file_name) for each file.
     """
+    data_types = _JHU_FILE_NAMES[region].keys() if data_type == "all" else [data_type]
+    return [(_JHU_TIME_SERIES_URL, _JHU_FILE_NAMES[region][iter_data_type]) for iter_data_type in data_types] + [(_JHU_LOOKUP_URL, _JHU_LOOKUP_FILE_NAME)]
 
-    # Construct the url and path for the file
-    path_here = os.path.abspath(os.path.dirname(__file__))
-    path = os.path.join(path_here, "data", source, file_name)
+def _nyt_files(counties):
+    """Get the data files an NYT table is built from.
+
+    Parameters:
+    counties (bool): Whether it's the county-level table.
+
+    Returns:
+    list of tuple: The (base_url, file_name) for each file.
+    """
+    return [(_NYT_URL, "us-counties.csv" if counties else "us-states.csv")]
+
+def _jhu_table_name(format, data_type, region):
+    """Get the name a JHU table is saved under in a shared_dir. The parameters must already be checked.
+
+    Returns:
+    str: The name, unique for each set of parameters.
+    """
+    return f"jhu_{region}_{format}_{data_type}"
+
+def _nyt_table_name(format, data_type, counties):
+    """Get the name an NYT table is saved under in a shared_dir. The parameters must already be checked.
+
+    Returns:
+    str: The name, unique for each set of parameters.
+    """
+    return f"nyt_{'counties' if counties else 'states'}_{format}_{data_type}"
+
+def _jhu_warm_table(format, data_type, region):
+    """Describe a JHU table for a Refresher. The parameters must already be checked.
+
+    Returns:
+    tuple: The table's key, the source folder, its data files, and a function that builds it from them.
+    """
+    build = functools.partial(_build_data_jhu, format, data_type, region)
+    return ("jhu", format, data_type, region), "jhu", _jhu_files(data_type, region), build
+
+def _nyt_warm_table(format, data_type, counties):
+    """Describe an NYT table for a Refresher. The parameters must already be checked.
+
+    Returns:
+    tuple: The table's key, the source folder, its data files, and a function that builds it from them.
+    """
+    build = functools.partial(_build_data_nyt, format, data_type, counties)
+    return ("nyt", format, data_type, counties), "nyt", _nyt_files(counties), build
+
+def _get_warm_table(key, source, files, build):
+    """Get a table from the running Refresher. See _jhu_warm_table for the parameters.
+
+    Returns:
+    pandas.DataFrame: The table.
+    """
+    refresher = _running_refresher
+    if refresher is None:
+        raise ParameterError("No Refresher is running, so there are no warm tables to get. Create one and call its start method first, or pass warm=False.")
+    return refresher._get(key, source, files, build)
+
+def _update_file(base_url, file_name, source, update, cancel=None, timeout=None):
+    """Download the latest version of a data file, if requested, and make sure we have some version of it. Doesn't warn if the file wasn't updated, since only the public function the user called knows where the warning should point. Pass the status to _warn_not_updated for that.
 
+    Parameters:
+    base_url (str): The raw.githubusercontent.com URL to the folder that contains the file we want.
+    file_name (str): The name of the file we want from the folder specified by the URL.
+    source (str): The folder in the data directory to keep the file in, e.g. "jhu".
+    update (bool): Whether to re-download the file from the Internet. Otherwise, will use a previously downloaded copy, if it exists. None also uses the previously downloaded copy, for callers that already updated it.
+    cancel (threading.Event, optional): An event that stops the download when it's set, leaving the previously downloaded file in place. Default None.
+    timeout (float, optional): Seconds to wait for the server to connect or send more of the file. Default None waits as long as the connection stays open.
+
+    Returns:
+    str: What happened. "updated" if the file was downloaded, "failed" if it couldn't be, "skipped" if update was False, "current" if update was None, or "cancelled".
+    """
     if update:
-        # Download the latest version of the file
-        url = base_url + file_name
         try:
-            download_github_file(url, path)
+            status = "updated" if _download_file(base_url, file_name, source, cancel=cancel, timeout=timeout) else "cancelled"
         except NoInternetError:
-            warnings.warn("Insufficient internet to update data files. Data from most recent download will be used.", FileNotUpdatedWarning, stacklevel=3)
+            status = "failed"
     else:
-        warnings.warn("You chose to not update data files. Data from most recent download will be used. To update files instead, pass True to the 'update' parameter.", FileNotUpdatedWarning, stacklevel=3)
+        status = "skipped" if update is not None else "current"
+
+    if status != "cancelled":
+        _data_path(source, file_name) # Makes sure we have some version of the file
+
+    return status
+
+def _update_files(source, files, update, stacklevel=2):
+    """Update a table's data files, and warn once if any of them weren't updated.
+
+    Parameters:
+    source (str): The folder in the data directory the data files are in, e.g. "jhu".
+    files (list of tuple): The (base_url, file_name) for each data file.
+    update (bool): Whether to re-download the data files from the Internet. None uses the previously downloaded copies without warning, for callers that already updated them.
+    stacklevel (int, optional): Which line the warning points at. 1 is the line that called this function, 2 the line that called that function, and so on. Default 2, i.e. the user's call to the public function that called this one.
+
+    Returns:
+    None
+    """
+    statuses = [_update_file(base_url, file_name, source, update) for base_url, file_name in files]
+    _warn_not_updated(statuses, stacklevel + 1)
+
+def _warn_not_updated(statuses, stacklevel):
+    """Warn if any data files weren't updated.
+
+    Parameters:
+    statuses (list of str): The status of each file, from _update_file.
+    stacklevel (int): Which line the warning points at. 1 is the line that called this function, 2 the line that called that function, and so on.
+
+    Returns:
+    None
+    """
+    if "failed" in statuses:
+        warnings.warn("Insufficient internet to update data files. Data from most recent download will be used.", FileNotUpdatedWarning, stacklevel=stacklevel + 1)
+    elif "skipped" in statuses:
+        warnings.warn("You chose to not update data files. Data from most recent download will be used. To update files instead, pass True to the 'update' parameter.", FileNotUpdatedWarning, stacklevel=stacklevel + 1)
+
+def _data_dir():
+    """Get the directory the data files are downloaded to, with a folder for each source.
+
+    Returns:
+    str: The path to the data directory.
+    """
+    path_here = os.path.abspath(os.path.dirname(__file__))
+    return os.path.join(path_here, "data")
+
+def _data_path(source, file_name):
+    """Get the path to a previously downloaded data file.
 
+    Parameters:
+    source (str): The folder in the data directory the file is in, e.g. "jhu".
+    file_name (str): The name of the file.
+
+    Returns:
+    str: The path to the file.
+    """
+    path = os.path.join(_data_dir(), source, file_name)
     if not os.path.isfile(path):
         raise FileDoesNotExistError("Data file has not been downloaded previously, and current internet connection is not sufficient to download it. Try again when you have a better internet connection.")
 
+    return path
+
+def _download_file(base_url, file_name, source, cancel=None, timeout=None):
+    """Download the latest version of a data file, and put it in place of the previously downloaded one, if it's different. Raises NoInternetError if it can't be downloaded.
+
+    Parameters:
+    base_url (str): The raw.githubusercontent.com URL to the folder that contains the file we want.
+    file_name (str): The name of the file we want from the folder specified by the URL.
+    source (str): The folder in the data directory to keep the file in, e.g. "jhu".
+    cancel (threading.Event, optional): An event that stops the download when it's set, leaving the previously downloaded file in place. Default None.
+    timeout (float, optional): Seconds to wait for the server to connect or send more of the file. Default None waits as long as the connection stays open.
+
+    Returns:
+    bool: True if the file was downloaded, or False if the download was cancelled.
+    """
+    path = os.path.join(_data_dir(), source, file_name)
+
+    url = base_url + file_name
+    download_path = f"{path}.{os.getpid()}.{threading.get_ident()}.download" # Unique to the thread, since async getters download from several threads at once
+    if not download_github_file(url, download_path, cancel=cancel, timeout=timeout):
+        return False
+
+    # A download that didn't change anything leaves both versions alone, so the previous version is always the last one that was different
+    if os.path.isfile(path) and filecmp.cmp(download_path, path, shallow=False):
+        os.remove(download_path)
+        return True
+
+    # Keep the version we're replacing, so get_jhu_changes and get_nyt_changes can compare the two
+    if os.path.isfile(path):
+        previous_path = _previous_path(source, file_name)
+        os.makedirs(os.path.dirname(previous_path), exist_ok=True)
+        os.replace(path, previous_path)
+    os.replace(download_path, path)
+
+    store = _get_store()
+    if store is not None:
+        store.add(source, file_name, path)
+
+    return True
+
+async def _get_table_async(source, files, update, build, timeout, executor):
+    """Update a table's data files without blocking the event loop, then build the table in an executor.
+
+    Parameters:
+    source (str): The folder in the data directory the data files are in, e.g. "jhu".
+    files (list of tuple): The (base_url, file_name) for each data file the table is built from.
+    update (bool): Whether to re-download the data files from the Internet first.
+    build (functools.partial): Builds the table from the data files, without updating them. Must be picklable, in case executor is a process pool.
+    timeout (float): Seconds to wait for the server to connect or send more of a file, or None to wait as long as the connection stays open.
+    executor (concurrent.futures.Executor): The executor to build the table in, or None for the event loop's default executor.
+
+    Returns:
+    tuple: The table, and the list of statuses of its data files from _update_file, for the caller to warn about.
+    """
+    if update:
+        statuses = await asyncio.gather(*[_update_file_async(base_url, file_name, source, timeout) for base_url, file_name in files])
+    else:
+        statuses = [_update_file(base_url, file_name, source, update=False) for base_url, file_name in files] # Only checks that the files exist
+
+    loop = asyncio.get_running_loop()
+    df = await loop.run_in_executor(executor, build)
+    return df, statuses
+
+_downloads_in_flight = {} # Maps (event loop, source, file_name) to [download task, number of callers waiting on it], so files needed by several async getters at once are downloaded once
+
+async def _update_file_async(base_url, file_name, source, timeout):
+    """Download the latest version of a data file in a thread, sharing the download with any other callers waiting on the same file. The download is cancelled once every caller waiting on it has been cancelled.
+
+    Parameters:
+    base_url (str): The raw.githubusercontent.com URL to the folder that contains the file we want.
+    file_name (str): The name of the file we want from the folder specified by the URL.
+    source (str): The folder in the data directory to keep the file in, e.g. "jhu".
+    timeout (float): Seconds to wait for the server to connect or send more of the file, or None.
+
+    Returns:
+    str: The status of the file, from _update_file.
+    """
+    loop = asyncio.get_running_loop()
+    key = (loop, source, file_name)
+    if key not in _downloads_in_flight:
+        _downloads_in_flight[key] = [loop.create_task(_download_in_thread(base_url, file_name, source, timeout)), 0]
+
+    entry = _downloads_in_flight[key]
+    entry[1] += 1
+    try:
+        return await asyncio.shield(entry[0]) # Cancelling one caller doesn't cancel the download for the others
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            entry[0].cancel() # Does nothing if the download already finished
+            if _downloads_in_flight.get(key) is entry:
+                del _downloads_in_flight[key]
+
+async def _download_in_thread(base_url, file_name, source, timeout):
+    """Run _update_file in the event loop's default executor, and stop it if this coroutine is cancelled. See _update_file_async for the parameters."""
+    cancel = threading.Event()
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(None, functools.partial(_update_file, base_url, file_name, source, True, cancel=cancel, timeout=timeout))
+    except asyncio.CancelledError:
+        cancel.set() # The thread stops at its next chunk
+        raise
+
+def _get_shared_table(shared_dir, table_name, source, files, update, build):
+    """Get a table through a directory shared between processes. If the directory already has the table for the current version of its data files, map it. Otherwise, build the table, save it there, and map that.
+
+    Parameters:
+    shared_dir (str): The shared directory.
+    table_name (str): A name for the table that's unique for each set of getter parameters.
+    source (str): The folder in the data directory the data files are in, e.g. "jhu".
+    files (list of tuple): The (base_url, file_name) for each data file the table is built from.
+    update (bool): Whether to re-download the data files from the Internet first. None uses the previously downloaded files without warning.
+    build (function): Builds the table from the data files, without updating them.
+
+    Returns:
+    pandas.DataFrame: The table, backed by the files in the shared directory.
+    """
+    _update_files(source, files, update, stacklevel=3)
+
+    version = _data_version(source, [file_name for base_url, file_name in files])
+    directory = os.path.join(shared_dir, f"{table_name}_{version}")
+
+    if not os.path.isdir(directory):
+        df = build()
+        _save_shared(df, directory)
+
+        # Remove other versions of the table. Processes still using them keep their mappings.
+        for name in os.listdir(shared_dir):
+            if name.startswith(table_name + "_") and name != os.path.basename(directory) and "_tmp_" not in name:
+                shutil.rmtree(os.path.join(shared_dir, name), ignore_errors=True)
+
+    return _load_shared(directory)
+
+def _get_table(source, file_name, as_of=None):
+    """Get a table from a previously downloaded data file. Update the file first, if needed, with _update_files.
+
+    Parameters:
+    source (str): The folder in the data directory the file is in, e.g. "jhu".
+    file_name (str): The name of the file.
+    as_of (str or datetime.datetime or datetime.date, optional): Load the file from the latest snapshot saved at or before this time, instead of the latest download. Default None.
+
+    Returns:
+    pandas.DataFrame: The requested DataFrame.
+    """
+
+    if as_of is not None:
+        content = _require_store().get(source, file_name, as_of)
+        return _read_table(io.BytesIO(content), source)
+
+    return _read_table(_data_path(source, file_name), source)
+
+def _read_table(path, source):
+    """Read a downloaded data file into a table, and fix its formatting.
+
+    Parameters:
+    path (str or file-like object): The path to the file, or the file's content.
+    source (str): Where the file is from, e.g. "jhu".
+
+    Returns:
+    pandas.DataFrame: The table.
+    """
     df = pd.read_csv(path)
 
     # Formatting fixes
@@ -268,6 +906,76 @@ def _get_table(base_url, file_name, source, update):
 
     return df
 
+def _previous_path(source, file_name):
+    """Get the path to keep the previous download of a data file at.
+
+    Parameters:
+    source (str): The folder in the data directory the file is in, e.g. "jhu".
+    file_name (str): The name of the file.
+
+    Returns:
+    str: The path.
+    """
+    return os.path.join(_data_dir(), source, "previous", file_name)
+
+def _file_versions(source, file_name):
+    """Read the latest and previous downloads of a data file, if they differ.
+
+    Parameters:
+    source (str): The folder in the data directory the file is in, e.g. "jhu".
+    file_name (str): The name of the file.
+
+    Returns:
+    tuple of pandas.DataFrame: The previous and latest versions of the table, or None if the two files are identical.
+    """
+    path = os.path.join(_data_dir(), source, file_name)
+    previous_path = _previous_path(source, file_name)
+
+    if not os.path.isfile(path) or not os.path.isfile(previous_path):
+        raise FileDoesNotExistError(f"There is no earlier download of {file_name} to compare the latest one to. Changes are recorded once a later download changes the file.")
+
+    if filecmp.cmp(previous_path, path, shallow=False):
+        return None
+
+    return _read_table(previous_path, source), _read_table(path, source)
+
+def _format_changes(diffs, id_cols):
+    """Put the changes from each data file together, in the form returned by get_jhu_changes and get_nyt_changes.
+
+    Parameters:
+    diffs (list of pandas.DataFrame): The changes from each file, from _diff_values. Each has the id cols, "date", "data_type", "old", and "new" columns.
+    id_cols (list of str): The columns that identify each region.
+
+    Returns:
+    pandas.DataFrame: The changes, sorted by date, then region.
+    """
+    cols = ["date"] + id_cols + ["data_type", "old", "new"]
+    if len(diffs) == 0:
+        changes = pd.DataFrame({col: pd.Series(dtype=float if col in ("old", "new") else object) for col in cols})
+    else:
+        changes = pd.concat([diff[cols] for diff in diffs], ignore_index=True)
+
+    changes["date"] = pd.to_datetime(changes["date"])
+    changes = changes.sort_values(by=["date"] + id_cols + ["data_type"], kind="stable")
+    return changes.reset_index(drop=True)
+
+def _data_version(source, file_names):
+    """Get an identifier for the current versions of previously downloaded data files, without reading them. Downloads replace a file with a new one, and downloads that don't change a file are discarded, so a file's size, modification time, and inode change exactly when a download changes it.
+
+    Parameters:
+    source (str): The folder in the data directory the files are in, e.g. "jhu".
+    file_names (list of str): The names of the files.
+
+    Returns:
+    str: A hash of the files' sizes, modification times, and inodes, which changes whenever any of the files do.
+    """
+    hasher = hashlib.sha1()
+    for file_name in file_names:
+        stat = os.stat(os.path.join(_data_dir(), source, file_name))
+        hasher.update(f"{file_name} {stat.st_size} {stat.st_mtime_ns} {stat.st_ino};".encode())
+
+    return hasher.hexdigest()
+
 # Deprecated getters
 def get_cases():
     """***DEPRECATED - Use get_data_jhu instead.***
@@ -276,7 +984,8 @@ def get_cases():
     url = "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/csse_covid_19_time_series/"
     warnings.warn("This function is deprecated. Use get_data_jhu instead; see tutorials at <https://github.com/PayneLab/covid19pandas/tree/master/docs/>.", DeprecatedWarning, stacklevel=2)
     print("These data were obtained from Johns Hopkins University (https://github.com/CSSEGISandData/COVID-19).")
-    return _get_table(url, "time_series_covid19_confirmed_global.csv", source="jhu", update=True)
+    _update_files("jhu", [(url, "time_series_covid19_confirmed_global.csv")], update=True)
+    return _get_table("jhu", "time_series_covid19_confirmed_global.csv")
 
 def get_deaths():
     """***DEPRECATED - Use get_data_jhu instead.***
@@ -285,7 +994,8 @@ def get_deaths():
     url = "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/csse_covid_19_time_series/"
     warnings.warn("This function is deprecated. Use get_data_jhu instead; see tutorials at <https://github.com/PayneLab/covid19pandas/tree/master/docs/>.", DeprecatedWarning, stacklevel=2)
     print("These data were obtained from Johns Hopkins University (https://github.com/CSSEGISandData/COVID-19).")
-    return _get_table(url, "time_series_covid19_deaths_global.csv", source="jhu", update=True)
+    _update_files("jhu", [(url, "time_series_covid19_deaths_global.csv")], update=True)
+    return _get_table("jhu", "time_series_covid19_deaths_global.csv")
 
 def get_recovered():
     """***DEPRECATED - Use get_data_jhu instead.***
@@ -294,4 +1004,5 @@ def get_recovered():
     url = "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/csse_covid_19_time_series/"
     warnings.warn("This function is deprecated. Use get_data_jhu instead; see tutorials at <https://github.com/PayneLab/covid19pandas/tree/master/docs/>.", DeprecatedWarning, stacklevel=2)
     print("These data were obtained from Johns Hopkins University (https://github.com/CSSEGISandData/COVID-19).")
-    return _get_table(url, "time_series_covid19_recovered_global.csv", source="jhu", update=True)
+    _update_files("jhu", [(url, "time_series_covid19_recovered_global.csv")], update=True)
+    return _get_table("jhu", "time_series_covid19_recovered_global.csv")
@@ -17,11 +17,26 @@ import pandas as pd
 import os
 import warnings
 import datetime
+import re
+import concurrent.futures
+import contextlib
+import threading
 
+import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+import matplotlib.dates as mdates
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 
-def plot_lines(data, x_col, y_col, group_col, x_lab=None, y_lab=None, title=None, legend_title=None, legend_order=None, y_logscale=False, dimensions=(11, 8.5), seaborn_style="darkgrid"):
+from .exceptions import ParameterError
+from .utils import _key_codes, _first_positions
+
+# Seaborn styles are applied through matplotlib's global rcParams, so only one thread at a time can be making a figure with a scoped style
+_style_lock = threading.RLock()
+
+def plot_lines(data, x_col, y_col, group_col, x_lab=None, y_lab=None, title=None, legend_title=None, legend_order=None, y_logscale=False, dimensions=(11, 8.5), seaborn_style="darkgrid", fast=False, max_points=None, downsample="lttb", ax=None, pyplot=True):
     """Plot the values in x_col versus the values in y_col, divided into different lines based on the values in group_col.
 
     Parameters:
@@ -37,24 +52,291 @@ def plot_lines(data, x_col, y_col, group_col, x_lab=None, y_lab=None, title=None
     y_logscale (bool, optional): Whether to use a log scale for the y axis. If True, will automatically note it on the y axis label and plot title. Default False.
     dimensions (2-tuple of int or float, optional): Tuple to be passed to the figsize parameter of the matplotlib.pyplot.subplots function. Default (11, 8.5).
     seaborn_style (string, optional): String to pass to the seaborn.set_style function. Must be "darkgrid", "whitegrid", "dark", "white", or "ticks". Default "darkgrid".
+    fast (bool, optional): Whether to skip seaborn's aggregation and confidence intervals, and draw all the groups as a single line collection. Requires exactly one value for each combination of x_col and group_col values. Much faster for tables with many groups, such as county tables. Default False.
+    max_points (int, optional): The most points to draw for each line. Longer lines are downsampled with the downsample method, which makes drawing faster and vector image files smaller. Must be at least 4. Requires exactly one value for each combination of x_col and group_col values. Missing y values are dropped from downsampled lines. Default None draws every point.
+    downsample (str, optional): How to pick the points to draw when a line has more than max_points. "lttb" uses the largest-triangle-three-buckets algorithm, which keeps the points that contribute most to the line's visual shape. "minmax" splits the x axis into max_points / 2 equal bins, e.g. one per pixel column, and keeps the lowest and highest point in each one, so every spike is kept. Default "lttb".
+    ax (matplotlib.axes.Axes, optional): Axes to draw the plot on, e.g. one of several subplots on your own figure. The axes keep their own style, so seaborn_style and dimensions have no effect. Default None makes a new figure.
+    pyplot (bool, optional): Whether to make the new figure through pyplot, and set seaborn_style globally with seaborn.set_style. False instead makes a matplotlib.figure.Figure directly, and applies seaborn_style to just that figure. Such a figure isn't tracked by pyplot, so it never needs closing and is freed once you drop it, and it's safe to make from several threads at once. Use it for server-side rendering, e.g. with fig.savefig to a buffer. Default True.
+
+    Returns:
+    matplotlib.figure.Figure: The figure object created for the plot, or the figure ax is on.
+    matplotlib.axes._subplots.AxesSubplot: The single axes object on the figure, or ax.
+    """
+
+    if max_points is not None:
+        data = _downsample(data, x_col, y_col, group_col, max_points, downsample)
+
+    # Set plot colors and dimensions
+    with _plot_axes(ax, dimensions, seaborn_style, pyplot) as (fig, ax):
+        _draw_plot_lines(ax, data, x_col, y_col, group_col, x_lab, y_lab, title, legend_title, legend_order, y_logscale, fast)
+
+    return fig, ax
+
+def plot_lines_two_y(data, x_col, y1_col, y2_col, x_lab=None, y1_lab=None, y2_lab=None, title=None, legend_title=None, legend_loc="best", y_logscale=False, dimensions=(11, 8.5), seaborn_style="darkgrid", max_points=None, downsample="lttb", ax=None, pyplot=True):
+    """Plot the values in x_col versus the values in y1_col on the left y axis, and the values in y2_col on the right y axis.
+
+    Parameters:
+    data (pandas.DataFrame): A dataframe with the data to plot. Must be in "long" format.
+    x_col (str): The name of the column with the x values in it.
+    y1_col (str): The name of the column with the y values to plot on the left y axis.
+    y2_col (str): The name of the column with the y values to plot on the right y axis.
+    x_lab (str, optional): Label for the x axis. Default None will use the x_col name.
+    y1_lab (str, optional): Label for the left y axis. Default None will use the y1_col name.
+    y2_lab (str, optional): Label for the right y axis. Default None will use the y2_col name.
+    title (str, optional): Title for the plot. Default None will cause one to be automatically generated based on column names.
+    legend_title (str, optional): Title for the legend. Default None will have no title on the legend.
+    legend_loc (str or int or 2-tuple of floats, optional): Legend position specifier, passed directly to the matplotlib.axes.Axes.legend function. See loc parameter details at <https://matplotlib.org/3.2.1/api/_as_gen/matplotlib.axes.Axes.legend.html#matplotlib.axes.Axes.legend> for options. Examples are "best", "center right", "upper left", "lower center". Default "best" optimizes position based on position of line on right y axis.
+    y_logscale (bool, optional): Whether to use a log scale for the y axis. If True, will automatically note it on the y axis label and plot title. Default False.
+    dimensions (2-tuple of int or float, optional): Tuple to be passed to the figsize parameter of the matplotlib.pyplot.subplots function. Default (11, 8.5).
+    seaborn_style (string, optional): String to pass to the seaborn.set_style function. Must be "darkgrid", "whitegrid", "dark", "white", or "ticks". Default "darkgrid".
+    max_points (int, optional): The most points to draw for each of the two lines. Each line is downsampled separately. See the plot_lines docstring. Default None draws every point.
+    downsample (str, optional): How to downsample lines with more than max_points, "lttb" or "minmax". See the plot_lines docstring. Default "lttb".
+    ax (matplotlib.axes.Axes, optional): Axes to draw the left y axis line on, e.g. one of several subplots on your own figure. The right y axis is added as a twin of them. The axes keep their own style, so seaborn_style and dimensions have no effect. Default None makes a new figure.
+    pyplot (bool, optional): Whether to make the new figure through pyplot, and set seaborn_style globally with seaborn.set_style. False instead makes a matplotlib.figure.Figure directly, and applies seaborn_style to just that figure. Such a figure isn't tracked by pyplot, so it never needs closing and is freed once you drop it, and it's safe to make from several threads at once. Use it for server-side rendering, e.g. with fig.savefig to a buffer. Default True.
 
     Returns:
-    matplotlib.figure.Figure: The figure object created for the plot.
-    matplotlib.axes._subplots.AxesSubplot: The single axes object on the figure.
+    matplotlib.figure.Figure: The figure object created for the plot, or the figure ax is on.
+    2-tuple of matplotlib.axes._subplots.AxesSubplot: The two axes objects on the figure. First corresponds to the left y axis, and second corresponds to the right y axis.
     """
 
+    # Downsample each line separately, since they may need different points to keep their shapes
+    y1_data = data
+    y2_data = data
+    if max_points is not None:
+        y1_data = _downsample(data, x_col, y1_col, None, max_points, downsample)
+        y2_data = _downsample(data, x_col, y2_col, None, max_points, downsample)
+
     # Set plot colors and dimensions
-    sns.set_style(seaborn_style)
-    fig, ax = plt.subplots(figsize=dimensions)
+    with _plot_axes(ax, dimensions, seaborn_style, pyplot) as (fig, ax1):
+        # Create the plot
+        sns.lineplot(
+            x=x_col,
+            y=y1_col,
+            data=y1_data,
+            ax=ax1,
+            color="b")
+
+        ax2 = ax1.twinx()
+        sns.lineplot(
+            x=x_col,
+            y=y2_col,
+            data=y2_data,
+            ax=ax2,
+            color="g")
+
+        _label_two_y(ax1, ax2, x_col, y1_col, y2_col, x_lab, y1_lab, y2_lab, title, legend_title, legend_loc, y_logscale)
+
+    return fig, (ax1, ax2)
+
+class LinesTwoYPlotter:
+    """A plot_lines_two_y plot that can be redrawn with new data, e.g. for a live dashboard. The figure, axes, lines and legend are made once, when the plotter is created, and each call to update just swaps the data in the two lines and rescales the axes. It looks the same as plot_lines_two_y, except that days with more than one value are drawn at the mean, without seaborn's confidence interval bands.
+
+    Parameters:
+    x_col (str): The name of the column with the x values in it.
+    y1_col (str): The name of the column with the y values to plot on the left y axis.
+    y2_col (str): The name of the column with the y values to plot on the right y axis.
+    data (pandas.DataFrame, optional): A long format table to draw right away. Default None leaves the lines empty until update is called.
+    x_lab (str, optional): Label for the x axis. Default None will use the x_col name.
+    y1_lab (str, optional): Label for the left y axis. Default None will use the y1_col name.
+    y2_lab (str, optional): Label for the right y axis. Default None will use the y2_col name.
+    title (str, optional): Title for the plot. Default None will cause one to be automatically generated based on column names.
+    legend_title (str, optional): Title for the legend. Default None will have no title on the legend.
+    legend_loc (str or int or 2-tuple of floats, optional): Legend position specifier, passed directly to the matplotlib.axes.Axes.legend function. Default "best".
+    y_logscale (bool, optional): Whether to use a log scale for the y axes. Default False.
+    dimensions (2-tuple of int or float, optional): Tuple to be passed to the figsize parameter of the matplotlib.pyplot.subplots function. Default (11, 8.5).
+    seaborn_style (string, optional): String to pass to the seaborn.set_style function. Must be "darkgrid", "whitegrid", "dark", "white", or "ticks". Default "darkgrid".
+    max_points (int, optional): The most points to draw for each of the two lines. See the plot_lines docstring. Default None draws every point.
+    downsample (str, optional): How to downsample lines with more than max_points, "lttb" or "minmax". See the plot_lines docstring. Default "lttb".
+    ax (matplotlib.axes.Axes, optional): Axes to draw the left y axis line on. The right y axis is added as a twin of them. See the plot_lines docstring. Default None makes a new figure.
+    pyplot (bool, optional): Whether to make the new figure through pyplot. See the plot_lines docstring. Default True.
+    """
+
+    def __init__(self, x_col, y1_col, y2_col, data=None, x_lab=None, y1_lab=None, y2_lab=None, title=None, legend_title=None, legend_loc="best", y_logscale=False, dimensions=(11, 8.5), seaborn_style="darkgrid", max_points=None, downsample="lttb", ax=None, pyplot=True):
+        self.x_col = x_col
+        self.y1_col = y1_col
+        self.y2_col = y2_col
+        self.max_points = max_points
+        self.downsample = downsample
+
+        # Set plot colors and dimensions
+        with _plot_axes(ax, dimensions, seaborn_style, pyplot) as (fig, ax1):
+            self.fig = fig
+            ax2 = ax1.twinx()
+            self.axes = (ax1, ax2)
+
+            # Make empty lines to fill in on each update
+            line1, = ax1.plot([], [], color="b")
+            line2, = ax2.plot([], [], color="g")
+            self.lines = (line1, line2)
+
+            _label_two_y(ax1, ax2, x_col, y1_col, y2_col, x_lab, y1_lab, y2_lab, title, legend_title, legend_loc, y_logscale)
+
+        if data is not None:
+            self.update(data)
+
+    def update(self, data):
+        """Swap new data into the lines, and rescale the axes to fit it. In interactive mode the figure then redraws itself. Otherwise, call fig.canvas.draw_idle() or save the figure to draw it.
+
+        Parameters:
+        data (pandas.DataFrame): A long format table with the x_col, y1_col and y2_col columns.
+
+        Returns:
+        None
+        """
+        for ax, line, y_col in zip(self.axes, self.lines, [self.y1_col, self.y2_col]):
+            line_data = data
+            if self.max_points is not None:
+                line_data = _downsample(data, self.x_col, y_col, None, self.max_points, self.downsample)
+
+            # Draw the mean of each x value, in order, like seaborn does
+            means = line_data.groupby(self.x_col, sort=True)[y_col].mean()
+            x_vals = means.index.values
+            ax.xaxis.update_units(x_vals) # Sets up the date converter the first time we get dates
+            line.set_data(x_vals, means.values)
+
+            ax.relim()
+            ax.autoscale_view()
+
+def plot_regions_to_files(data, x_col, y_col, region_col, out_dir, group_col=None, grid=None, file_format="png", y_logscale=False, dimensions=(11, 8.5), seaborn_style="darkgrid", dpi=100, fast=False, max_points=None, downsample="lttb", n_jobs=1):
+    """Save a plot_lines plot of each region in the table to an image file, either one region per file or several regions per file as a grid of small plots. The figures are made without pyplot, so no display is needed, and each one is freed as soon as it's saved.
+
+    Parameters:
+    data (pandas.DataFrame): A dataframe with the data to plot. Must be in "long" format.
+    x_col (str): The name of the column with the x values in it.
+    y_col (str): The name of the column with the y values in it.
+    region_col (str): The name of the column to split the plots by. Each unique value gets its own plot, titled with the value. Rows with no value are plotted together as "Unknown".
+    out_dir (str): The directory to save the files in. Created if it doesn't exist. Files are named after their region, or numbered by page if grid is not None.
+    group_col (str, optional): The name of the column to divide each region's plot into different lines by, e.g. "county" when region_col is "state". Default None draws one line per plot, with region_col as the legend.
+    grid (2-tuple of int, optional): The number of rows and columns of plots to put in each file. The regions fill each file row by row, in order of appearance. Default None saves each region to its own file.
+    file_format (str, optional): The image format, passed to the format parameter of the matplotlib.figure.Figure.savefig function. E.g. "png", "svg", or "pdf". Default "png".
+    y_logscale (bool, optional): Whether to use a log scale for the y axes. Default False.
+    dimensions (2-tuple of int or float, optional): The size of each file's figure, in inches. Default (11, 8.5).
+    seaborn_style (string, optional): The seaborn style to use. Must be "darkgrid", "whitegrid", "dark", "white", or "ticks". Default "darkgrid".
+    dpi (int, optional): Resolution of raster formats, in dots per inch. Default 100.
+    fast (bool, optional): Whether to draw each plot with the fast mode of plot_lines. See the plot_lines docstring. Default False.
+    max_points (int, optional): The most points to draw for each line. See the plot_lines docstring. Default None draws every point.
+    downsample (str, optional): How to downsample lines with more than max_points, "lttb" or "minmax". See the plot_lines docstring. Default "lttb".
+    n_jobs (int, optional): The number of processes to split the files between. -1 uses all of the machine's CPUs. Default 1 makes all the files in this process.
+
+    Returns:
+    list of str: The paths of the saved files, in the order they were filled.
+    """
+    if n_jobs == 0 or n_jobs < -1:
+        raise ParameterError(f"n_jobs must be a positive number of processes, or -1 to use all CPUs. You passed {n_jobs}.")
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    if group_col is None:
+        group_col = region_col
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Split the table by region, in order of appearance, and assign the regions to files. We group on region codes, which give missing regions a code of their own, and skip categories with no rows.
+    codes = _key_codes(data, [region_col])
+    order = np.argsort(codes, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes))])
+    regions = []
+    for code in np.argsort(_first_positions(codes), kind="stable"):
+        table = data.take(order[bounds[code]:bounds[code + 1]])
+        region = table[region_col].iloc[0]
+        if pd.isna(region): # Rows missing a region get their own plot, instead of being dropped
+            region = "Unknown"
+            table = table.assign(**{region_col: region})
+        regions.append((region, table))
+    if grid is None:
+        pages = [[region_table] for region_table in regions]
+        names = _unique_file_names([str(region) for region, table in regions])
+        grid = (1, 1)
+    else:
+        per_page = grid[0] * grid[1]
+        pages = [regions[i:i + per_page] for i in range(0, len(regions), per_page)]
+        names = [f"page_{i + 1}" for i in range(len(pages))]
+
+    paths = [os.path.join(out_dir, f"{name}.{file_format}") for name in names]
+    tasks = list(zip(paths, pages))
+    options = {
+        "x_col": x_col,
+        "y_col": y_col,
+        "group_col": group_col,
+        "grid": grid,
+        "file_format": file_format,
+        "y_logscale": y_logscale,
+        "dimensions": dimensions,
+        "seaborn_style": seaborn_style,
+        "dpi": dpi,
+        "fast": fast,
+        "max_points": max_points,
+        "downsample": downsample,
+    }
+
+    if n_jobs == 1 or len(tasks) < 2:
+        _save_plot_files(tasks, **options)
+    else:
+        # Deal the files out to the processes, so each one gets a similar mix of big and small regions
+        n_jobs = min(n_jobs, len(tasks))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [executor.submit(_save_plot_files, tasks[i::n_jobs], **options) for i in range(n_jobs)]
+            for future in futures:
+                future.result()
+
+    return paths
+
+# Helper functions
+@contextlib.contextmanager
+def _plot_axes(ax, dimensions, seaborn_style, pyplot):
+    """Get the figure and axes to draw a plot on, with the seaborn style applied while the plot is made inside the with block.
+
+    Parameters:
+    ax (matplotlib.axes.Axes or None): Axes the caller passed. They're used as they are, without applying any style. None makes a new figure with one axes.
+    dimensions (2-tuple of int or float): The size of a new figure, in inches.
+    seaborn_style (str): The seaborn style for a new figure.
+    pyplot (bool): Whether to make a new figure through pyplot and set the style globally, like we've always done, so later pyplot figures get it too. Otherwise, a matplotlib.figure.Figure is made directly, and the style is only applied inside the with block. Other threads wait for the block to finish before applying their own.
+
+    Returns:
+    matplotlib.figure.Figure: The figure.
+    matplotlib.axes.Axes: The axes.
+    """
+    if ax is not None:
+        yield ax.figure, ax
+    elif pyplot:
+        sns.set_style(seaborn_style)
+        yield plt.subplots(figsize=dimensions)
+    else:
+        with _plot_style(seaborn_style):
+            fig = Figure(figsize=dimensions)
+            yield fig, fig.subplots()
+
+@contextlib.contextmanager
+def _plot_style(seaborn_style):
+    """Apply a seaborn style inside a with block, one thread at a time.
+
+    Parameters:
+    seaborn_style (str): The seaborn style.
+
+    Returns:
+    None
+    """
+    with _style_lock, sns.axes_style(seaborn_style):
+        yield
+
+def _draw_plot_lines(ax, data, x_col, y_col, group_col, x_lab, y_lab, title, legend_title, legend_order, y_logscale, fast):
+    """Draw a plot_lines plot on an existing axes. See plot_lines for the parameters.
+
+    Returns:
+    None
+    """
 
     # Create the plot
-    sns.lineplot(
-        x=x_col,
-        y=y_col,
-        data=data,
-        hue=group_col,
-        hue_order=legend_order,
-        ax=ax)
+    if fast:
+        _draw_lines_fast(ax, data, x_col, y_col, group_col, legend_order)
+    else:
+        sns.lineplot(
+            x=x_col,
+            y=y_col,
+            data=data,
+            hue=group_col,
+            hue_order=legend_order,
+            ax=ax)
 
     # Set y log scale if desired
     if y_logscale:
@@ -96,51 +378,13 @@ def plot_lines(data, x_col, y_col, group_col, x_lab=None, y_lab=None, title=None
     handles, labels = ax.get_legend_handles_labels() # Get the handles and labels from the default legend Seaborn creates
     ax.legend(handles=handles[0:], labels=labels[0:], title=legend_title, title_fontsize="14") # Re-make the legend
 
-    return fig, ax
-
-def plot_lines_two_y(data, x_col, y1_col, y2_col, x_lab=None, y1_lab=None, y2_lab=None, title=None, legend_title=None, legend_loc="best", y_logscale=False, dimensions=(11, 8.5), seaborn_style="darkgrid"):
-    """Plot the values in x_col versus the values in y1_col on the left y axis, and the values in y2_col on the right y axis.
-
-    Parameters:
-    data (pandas.DataFrame): A dataframe with the data to plot. Must be in "long" format.
-    x_col (str): The name of the column with the x values in it.
-    y1_col (str): The name of the column with the y values to plot on the left y axis.
-    y2_col (str): The name of the column with the y values to plot on the right y axis.
-    x_lab (str, optional): Label for the x axis. Default None will use the x_col name.
-    y1_lab (str, optional): Label for the left y axis. Default None will use the y1_col name.
-    y2_lab (str, optional): Label for the right y axis. Default None will use the y2_col name.
-    title (str, optional): Title for the plot. Default None will cause one to be automatically generated based on column names.
-    legend_title (str, optional): Title for the legend. Default None will have no title on the legend.
-    legend_loc (str or int or 2-tuple of floats, optional): Legend position specifier, passed directly to the matplotlib.axes.Axes.legend function. See loc parameter details at <https://matplotlib.org/3.2.1/api/_as_gen/matplotlib.axes.Axes.legend.html#matplotlib.axes.Axes.legend> for options. Examples are "best", "center right", "upper left", "lower center". Default "best" optimizes position based on position of line on right y axis.
-    y_logscale (bool, optional): Whether to use a log scale for the y axis. If True, will automatically note it on the y axis label and plot title. Default False.
-    dimensions (2-tuple of int or float, optional): Tuple to be passed to the figsize parameter of the matplotlib.pyplot.subplots function. Default (11, 8.5).
-    seaborn_style (string, optional): String to pass to the seaborn.set_style function. Must be "darkgrid", "whitegrid", "dark", "white", or "ticks". Default "darkgrid".
+def _label_two_y(ax1, ax2, x_col, y1_col, y2_col, x_lab, y1_lab, y2_lab, title, legend_title, legend_loc, y_logscale):
+    """Set the scales, labels, title and legend of a plot_lines_two_y plot, once its two lines are drawn. See plot_lines_two_y for the parameters.
 
     Returns:
-    matplotlib.figure.Figure: The figure object created for the plot.
-    2-tuple of matplotlib.axes._subplots.AxesSubplot: The two axes objects on the figure. First corresponds to the left y axis, and second corresponds to the right y axis.
+    None
     """
 
-    # Set plot colors and dimensions
-    sns.set_style(seaborn_style)
-    fig, ax1 = plt.subplots(figsize=dimensions)
-
-    # Create the plot
-    sns.lineplot(
-        x=x_col,
-        y=y1_col,
-        data=data,
-        ax=ax1,
-        color="b")
-    
-    ax2 = ax1.twinx()
-    sns.lineplot(
-        x=x_col,
-        y=y2_col,
-        data=data,
-        ax=ax2,
-        color="g")
-    
     # Set y log scale if desired
     if y_logscale:
         ax1.set(yscale="log") 
@@ -177,4 +421,251 @@ def plot_lines_two_y(data, x_col, y1_col, y2_col, x_lab=None, y1_lab=None, y2_la
     if legend_title is not None:
         leg.set_title(legend_title)
 
-    return fig, (ax1, ax2)
+def _save_plot_files(tasks, x_col, y_col, group_col, grid, file_format, y_logscale, dimensions, seaborn_style, dpi, fast, max_points, downsample):
+    """Draw and save the files for plot_regions_to_files. See plot_regions_to_files for the other parameters.
+
+    Parameters:
+    tasks (list of tuple): Each tuple is the path to save a file to, and a list of (region, table) tuples to plot in it.
+
+    Returns:
+    None
+    """
+    with _plot_style(seaborn_style):
+        for path, page in tasks:
+            # A Figure made directly, instead of through pyplot, isn't kept track of by pyplot, so it's freed once we drop it
+            fig = Figure(figsize=dimensions)
+            axes = fig.subplots(*grid, squeeze=False).flatten()
+            for ax, (region, table) in zip(axes, page):
+                if max_points is not None:
+                    table = _downsample(table, x_col, y_col, group_col, max_points, downsample)
+                _draw_plot_lines(ax, table, x_col, y_col, group_col, None, None, str(region), None, None, y_logscale, fast)
+                if pd.api.types.is_datetime64_any_dtype(table[x_col]):
+                    # Full dates overlap on small plots
+                    locator = mdates.AutoDateLocator()
+                    ax.xaxis.set_major_locator(locator)
+                    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+            for ax in axes[len(page):]:
+                fig.delaxes(ax) # Empty spots on the last page
+
+            fig.tight_layout()
+            fig.savefig(path, format=file_format, dpi=dpi)
+
+def _unique_file_names(labels):
+    """Turn labels into file names that are safe to use and don't repeat.
+
+    Parameters:
+    labels (list of str): The labels to name the files after.
+
+    Returns:
+    list of str: The file names, without extensions, in the same order as the labels.
+    """
+    names = []
+    used = set()
+    for label in labels:
+        name = re.sub(r"[^\w\-.]+", "_", label).strip("._") or "region"
+        base, i = name, 2
+        while name.lower() in used: # Case-insensitive file systems would treat names differing only in case as the same file
+            name = f"{base}_{i}"
+            i += 1
+        used.add(name.lower())
+        names.append(name)
+    return names
+
+def _draw_lines_fast(ax, data, x_col, y_col, group_col, legend_order):
+    """Draw one line per group as a single LineCollection, plus legend proxies, without any statistical estimation.
+
+    Parameters:
+    ax (matplotlib.axes.Axes): The axes to draw on.
+    data (pandas.DataFrame): The long format table to plot.
+    x_col (str): The name of the column with the x values in it.
+    y_col (str): The name of the column with the y values in it.
+    group_col (str): The name of the column with the grouping values in it.
+    legend_order (list of str): The order of the groups in the legend and color cycle. None uses order of appearance.
+
+    Returns:
+    None
+    """
+    if data.duplicated(subset=[x_col, group_col]).any():
+        raise ParameterError(f"fast=True requires exactly one value for each combination of '{x_col}' and '{group_col}' values. Use fast=False to have seaborn aggregate them.")
+
+    # Order the groups and pick colors like seaborn would: the current palette if it has enough colors, otherwise evenly spaced husl colors
+    if legend_order is None:
+        legend_order = data[group_col].dropna().unique().tolist()
+    if len(legend_order) <= len(sns.color_palette()):
+        colors = sns.color_palette(n_colors=len(legend_order))
+    else:
+        colors = sns.color_palette("husl", len(legend_order))
+
+    group_codes = pd.Categorical(data[group_col], categories=legend_order).codes
+    x_vals = data[x_col]
+    is_date = pd.api.types.is_datetime64_any_dtype(x_vals)
+    if is_date:
+        x_vals = mdates.date2num(x_vals)
+    x_vals = np.asarray(x_vals, dtype=float)
+    y_vals = data[y_col].to_numpy(dtype=float, na_value=np.nan)
+
+    # Sort by group, then x, and split into one segment per group. Rows for groups not in legend_order have code -1, and are dropped.
+    order = np.lexsort([x_vals, group_codes])
+    order = order[group_codes[order] >= 0]
+    sorted_codes = group_codes[order]
+    points = np.column_stack([x_vals[order], y_vals[order]])
+    bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+    segments = np.split(points, bounds)
+    segment_codes = sorted_codes[np.concatenate([[0], bounds])] if len(order) > 0 else []
+
+    lines = LineCollection(segments, colors=[colors[code] for code in segment_codes])
+    ax.add_collection(lines)
+    ax.autoscale_view()
+    if is_date:
+        ax.xaxis_date()
+
+    # Seaborn labels the axes with the column names
+    ax.set(xlabel=x_col, ylabel=y_col)
+
+    # A collection only gets one legend entry, so we add a proxy line for each group
+    for group, color in zip(legend_order, colors):
+        ax.add_line(Line2D([], [], color=color, label=group))
+
+def _downsample(data, x_col, y_col, group_col, max_points, method):
+    """Select at most max_points rows for each group's line, picked to keep the line's shape.
+
+    Parameters:
+    data (pandas.DataFrame): The long format table to plot.
+    x_col (str): The name of the column with the x values in it.
+    y_col (str): The name of the column with the y values in it.
+    group_col (str or None): The name of the column with the grouping values in it. None treats the whole table as one line.
+    max_points (int): The most points to keep for each line.
+    method (str): "lttb" or "minmax". See the plot_lines docstring.
+
+    Returns:
+    pandas.DataFrame: The selected rows, in their original order.
+    """
+    if method not in ["lttb", "minmax"]:
+        raise ParameterError(f"Invalid downsample method '{method}'. Must be 'lttb' or 'minmax'.")
+    if max_points < 4:
+        raise ParameterError(f"max_points must be at least 4. You passed {max_points}.")
+
+    key_cols = [x_col] if group_col is None else [x_col, group_col]
+    if data.duplicated(subset=key_cols).any():
+        raise ParameterError(f"Downsampling requires exactly one value for each combination of {' and '.join(repr(col) for col in key_cols)} values.")
+
+    # Missing values can't be bucketed or ranked, and aren't drawn anyway
+    y_vals = data[y_col].to_numpy(dtype=float, na_value=np.nan)
+    positions = np.flatnonzero(~np.isnan(y_vals))
+    if positions.size == 0:
+        return data.take(positions)
+    y_vals = y_vals[positions]
+
+    x_vals = data[x_col]
+    if pd.api.types.is_datetime64_any_dtype(x_vals):
+        x_vals = x_vals.values.astype("int64")
+    x_vals = np.asarray(x_vals, dtype=float)[positions]
+
+    if group_col is None:
+        group_codes = np.zeros(positions.size, dtype="int64")
+    else:
+        group_codes = pd.factorize(data[group_col])[0][positions]
+
+    # Sort each group's points by x, and find where each group starts and ends
+    order = np.lexsort([x_vals, group_codes])
+    x_vals = x_vals[order]
+    y_vals = y_vals[order]
+    group_codes = group_codes[order]
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(group_codes)) + 1, [order.size]])
+
+    if method == "lttb":
+        # Lines that are short enough are kept whole
+        sizes = np.diff(bounds)
+        is_long = sizes > max_points
+        keep = [np.flatnonzero(np.repeat(~is_long, sizes))]
+        if is_long.any():
+            keep.append(_lttb(x_vals, y_vals, bounds[:-1][is_long], sizes[is_long], max_points))
+        keep = np.sort(np.concatenate(keep))
+    else:
+        keep = _minmax(x_vals, y_vals, group_codes, bounds, max_points)
+
+    return data.take(np.sort(positions[order[keep]]))
+
+def _lttb(x, y, starts, sizes, n_out):
+    """Downsample lines with the largest-triangle-three-buckets algorithm (Steinarsson, 2013). The algorithm picks points one bucket at a time, so we step through the buckets and do that bucket for all the lines at once.
+
+    Parameters:
+    x (numpy.ndarray): The x values, sorted within each line.
+    y (numpy.ndarray): The y values.
+    starts (numpy.ndarray of int): Where each line to downsample starts.
+    sizes (numpy.ndarray of int): The number of points in each line to downsample. All must be more than n_out.
+    n_out (int): The number of points to keep in each line. Must be at least 3.
+
+    Returns:
+    numpy.ndarray: The positions of the kept points.
+    """
+    n_lines = starts.size
+    lines = np.arange(n_lines)
+
+    # The first and last point of each line are always kept, and the rest are split into n_out - 2 buckets, each of which gets one point
+    edges = (np.arange(n_out - 1) * ((sizes[:, None] - 2) / (n_out - 2))).astype("int64") + 1
+    edges[:, -1] = sizes - 1
+    edges += starts[:, None]
+    bucket_sizes = np.diff(edges, axis=1)
+
+    # Each line's edges come after the previous line's, so one reduceat sums every bucket. The sums starting at each line's last edge run into the next line, and are dropped.
+    avg_x = np.add.reduceat(x, edges.ravel()).reshape(n_lines, n_out - 1)[:, :-1] / bucket_sizes
+    avg_y = np.add.reduceat(y, edges.ravel()).reshape(n_lines, n_out - 1)[:, :-1] / bucket_sizes
+
+    # Each bucket is compared to the average of the bucket after it. The last point stands in for the bucket after the last one.
+    last = starts + sizes - 1
+    next_x = np.column_stack([avg_x[:, 1:], x[last]])
+    next_y = np.column_stack([avg_y[:, 1:], y[last]])
+
+    kept = np.empty((n_lines, n_out), dtype="int64")
+    kept[:, 0] = starts
+    kept[:, -1] = last
+    offsets = np.arange(bucket_sizes.max())
+    for i in range(n_out - 2):
+        # Keep the point in each bucket that makes the biggest triangle with the last kept point and the next bucket's average
+        in_bucket = offsets < bucket_sizes[:, i, None]
+        candidates = np.where(in_bucket, edges[:, i, None] + offsets, edges[:, i, None])
+        prev = kept[:, i]
+        areas = np.abs((x[prev] - next_x[:, i])[:, None] * (y[candidates] - y[prev][:, None]) - (x[prev][:, None] - x[candidates]) * (next_y[:, i] - y[prev])[:, None])
+        areas[~in_bucket] = -1
+        kept[:, i + 1] = candidates[lines, np.argmax(areas, axis=1)]
+
+    return kept.ravel()
+
+def _minmax(x, y, group_codes, bounds, max_points):
+    """Downsample lines by keeping the lowest and highest point in each of max_points / 2 equal-width x bins. Each line's first and last points are also kept. Lines with max_points or fewer points are kept whole.
+
+    Parameters:
+    x (numpy.ndarray): The x values, sorted within each group.
+    y (numpy.ndarray): The y values.
+    group_codes (numpy.ndarray of int): The group of each point, sorted.
+    bounds (numpy.ndarray of int): Where each group starts, followed by the number of points.
+    max_points (int): The most points to keep for each line.
+
+    Returns:
+    numpy.ndarray: The positions of the kept points, sorted.
+    """
+    n_bins = (max_points - 2) // 2
+    sizes = np.diff(bounds)
+    starts = np.repeat(bounds[:-1], sizes)
+    stops = np.repeat(bounds[1:] - 1, sizes)
+
+    # Bin each point within its line's x range
+    x_min = x[starts]
+    x_range = x[stops] - x_min
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bins = np.where(x_range > 0, (x - x_min) / x_range * n_bins, 0).astype("int64")
+    bins = np.minimum(bins, n_bins - 1)
+
+    # Sort by group, bin, then y, so the first and last point in each run of the same group and bin are its min and max
+    order = np.lexsort([y, bins, group_codes])
+    run_key = group_codes[order] * n_bins + bins[order]
+    run_starts = np.concatenate([[True], run_key[1:] != run_key[:-1]])
+    run_ends = np.concatenate([run_key[1:] != run_key[:-1], [True]])
+
+    keep = np.zeros(x.size, dtype=bool)
+    keep[order[run_starts | run_ends]] = True
+    keep[bounds[:-1]] = True
+    keep[bounds[1:] - 1] = True
+    keep[np.repeat(sizes <= max_points, sizes)] = True # Short lines don't need downsampling
+    return np.flatnonzero(keep)
@@ -0,0 +1,322 @@
+#   Copyright 2018 Samuel Payne sam_payne@byu.edu
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#       http://www.apache.org/licenses/LICENSE-2.0
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Chain selections and calculations on a table, and run them all at once. For example:
+
+    covid19pandas.query(df).regions("Province_State", ["New York", "Utah"]).daily().rolling(7).since(100).run()
+
+For more help, see our tutorials at <https://github.com/PayneLab/covid19pandas/tree/master/docs>.
+"""
+
+import pandas as pd
+import numpy as np
+
+from .exceptions import ParameterError
+from .utils import _wide_to_long, _key_codes, _group_sum, _group_bounds, _group_cumcount, _has_duplicate_keys, _group_rolling, _default_region_cols
+
+def query(data, region_cols=None, data_cols=None):
+    """Start a query on a table. Add steps by calling the query's methods, then call run to get the result.
+
+    Parameters:
+    data (pandas.DataFrame): The table to query. Either long or wide format.
+    region_cols (str or list of str, optional): Column(s) that uniquely identify each region for each day. Default None uses the standard region columns for tables from our getters.
+    data_cols (str or list of str, optional): The data columns the steps work on when you don't tell them otherwise. For wide format tables, pass the name of the table's data type. Default None uses whichever of "cases", "deaths", and "recovered" are in a long format table.
+
+    Returns:
+    Query: The query, with no steps yet.
+    """
+    return Query(data, region_cols=region_cols, data_cols=data_cols)
+
+class Query:
+    """A chain of selections and calculations on a table, recorded now and run all at once later. Each method returns a new Query with the step added, so you can branch a query without affecting the original.
+
+    When run, the rows are sorted by region and date and checked for uniqueness only once, all steps share that one ordering, and the result table is only built at the end. Steps that calculate new columns work on the columns the previous calculation step made, so query(df).daily().rolling(7) gives 7 day means of the daily changes. The result is always in long format, sorted by date then region.
+
+    Parameters:
+    data (pandas.DataFrame): The table to query. Either long or wide format.
+    region_cols (str or list of str, optional): Column(s) that uniquely identify each region for each day. Default None uses the standard region columns for tables from our getters.
+    data_cols (str or list of str, optional): The data columns the steps work on when you don't tell them otherwise. For wide format tables, pass the name of the table's data type. Default None uses whichever of "cases", "deaths", and "recovered" are in a long format table.
+    """
+
+    def __init__(self, data, region_cols=None, data_cols=None):
+        if region_cols is None:
+            region_cols = _default_region_cols(data)
+        if isinstance(region_cols, str):
+            region_cols = [region_cols]
+        if isinstance(data_cols, str):
+            data_cols = [data_cols]
+
+        if "date" not in data.columns:
+            if data_cols is None or len(data_cols) != 1:
+                raise ParameterError("For wide format tables, pass the name of the table's data type to the data_cols parameter.")
+        elif data_cols is None:
+            data_cols = [col for col in ("cases", "deaths", "recovered") if col in data.columns]
+
+        self._data = data
+        self._region_cols = region_cols
+        self._data_cols = data_cols
+        self._steps = []
+
+    def regions(self, region_col, regions, combine_subregions=False):
+        """Keep only rows for particular regions. See select_regions.
+
+        Parameters:
+        region_col (str): The name of the column that contains the region designation you're specifying by.
+        regions (str or list of str): The regions to select.
+        combine_subregions (bool, optional): Whether to sum the daily counts for all subregions into one count for each region for each day. If True, region_col becomes the only region column for later steps. Must come before any calculation steps. Default False.
+
+        Returns:
+        Query: A new query with this step added.
+        """
+        if isinstance(regions, str):
+            regions = [regions]
+        return self._with_step("regions", region_col=region_col, regions=regions, combine_subregions=combine_subregions)
+
+    def daily(self, data_cols=None):
+        """Calculate the daily change in cumulative counts. See calc_daily_change.
+
+        Parameters:
+        data_cols (str or list of str, optional): The columns to calculate the daily change for. Default None uses the columns from the previous calculation step, or the query's data_cols if there wasn't one.
+
+        Returns:
+        Query: A new query with this step added.
+        """
+        return self._with_step("daily", data_cols=data_cols)
+
+    def rolling(self, x, data_cols=None, center=False):
+        """Calculate x day rolling means. See calc_x_day_rolling_mean.
+
+        Parameters:
+        x (int): The number of days to calculate the means over.
+        data_cols (str or list of str, optional): The columns to calculate the means for. Default None uses the columns from the previous calculation step, or the query's data_cols if there wasn't one.
+        center (bool, optional): Whether to center the window on each value, instead of having the value at the right side of the window. Default False.
+
+        Returns:
+        Query: A new query with this step added.
+        """
+        return self._with_step("rolling", x=x, data_cols=data_cols, center=center)
+
+    def since(self, min_count, data_col=None, since_first_crossing=False):
+        """Keep only days at or past a minimum count, and number the days since each region reached it. See calc_days_since_min_count.
+
+        Parameters:
+        min_count (int): The minimum count at which to start counting from for each region.
+        data_col (str, optional): The data column to compare to min_count. Default None uses the first of the query's data_cols.
+        since_first_crossing (bool, optional): Whether to keep every day from the first day each region reached min_count, even if its count later falls back below min_count. Default False.
+
+        Returns:
+        Query: A new query with this step added.
+        """
+        return self._with_step("since", min_count=min_count, data_col=data_col, since_first_crossing=since_first_crossing)
+
+    def run(self, columns=None):
+        """Run all the steps and build the result table.
+
+        Parameters:
+        columns (list of str, optional): The columns to include in the result, besides the date and region columns, which are always included. Default None includes all columns from the original table plus all calculated columns.
+
+        Returns:
+        pandas.DataFrame: The result, in long format.
+        """
+        data = self._data
+        data_cols = self._data_cols
+        if "date" not in data.columns:
+            data = _wide_to_long(data, data_cols[0])
+
+        plan = _Plan(data, self._region_cols)
+        current_cols = data_cols # The columns calculation steps work on by default
+
+        for step, params in self._steps:
+            if step == "regions":
+                plan.select(params["region_col"], params["regions"])
+                if params["combine_subregions"]:
+                    plan.combine(params["region_col"], data_cols)
+
+            elif step == "daily":
+                step_cols = _listify(params["data_cols"], current_cols)
+                current_cols = plan.daily(step_cols)
+
+            elif step == "rolling":
+                step_cols = _listify(params["data_cols"], current_cols)
+                current_cols = plan.rolling(step_cols, params["x"], params["center"])
+
+            elif step == "since":
+                data_col = params["data_col"] if params["data_col"] is not None else data_cols[0]
+                plan.since(data_col, params["min_count"], params["since_first_crossing"])
+
+        return plan.materialize(columns)
+
+    def _with_step(self, step, **params):
+        """Make a copy of this query with one more step."""
+        new_query = Query.__new__(Query)
+        new_query._data = self._data
+        new_query._region_cols = self._region_cols
+        new_query._data_cols = self._data_cols
+        new_query._steps = self._steps + [(step, params)]
+        return new_query
+
+    def __repr__(self):
+        steps = " -> ".join(step for step, params in self._steps)
+        return f"Query(region_cols={self._region_cols}, data_cols={self._data_cols}, steps=[{steps}])"
+
+# Helper functions and classes
+
+def _listify(cols, default):
+    """Turn a str or list of str into a list, or use the default if it's None."""
+    if cols is None:
+        return default
+    if isinstance(cols, str):
+        return [cols]
+    return cols
+
+class _Plan:
+    """The state of a query while it runs. Rows are kept as positions into the source table, and calculated columns as arrays lined up with those positions. Once a calculation needs it, the rows are sorted by region then date, and stay in that order for the rest of the run.
+
+    Parameters:
+    data (pandas.DataFrame): The long format source table.
+    region_cols (list of str): Column(s) that uniquely identify each region for each day.
+    """
+
+    def __init__(self, data, region_cols):
+        not_in = [col for col in region_cols if col not in data.columns]
+        if len(not_in) > 0:
+            raise ParameterError(f"The dataframe you passed does not contain all of the region columns you passed. These are the missing columns:\n{not_in}\n\nYour dataframe's columns are:\n{data.columns}")
+
+        self.data = data
+        self.region_cols = region_cols
+        self.rows = np.arange(data.shape[0])
+        self.cols = {} # Calculated columns, lined up with self.rows
+        self.codes = None # Region codes, lined up with self.rows once sorted
+
+    def select(self, region_col, regions):
+        """Keep only the rows for the specified regions."""
+        if region_col not in self.data.columns:
+            raise ParameterError(f"There is no '{region_col}' column in the dataframe you passed. Existing columns: \n{self.data.columns}")
+
+        keep = self.data[region_col].isin(regions).values[self.rows]
+        if not keep.any():
+            raise ParameterError(f"No rows in the dataframe have any of the values {regions} in the column '{region_col}'.")
+        self._filter(keep)
+
+    def combine(self, region_col, data_cols):
+        """Sum the data_cols for each region in region_col for each day, and make region_col the only region column."""
+        if len(self.cols) > 0:
+            raise ParameterError("Combining subregions must come before any calculation steps in a query.")
+        self._check_cols(data_cols)
+
+        group_cols = ["date", region_col]
+        self.data = _group_sum(self.data[group_cols + data_cols].take(self.rows), group_cols)
+        self.region_cols = [region_col]
+        self.rows = np.arange(self.data.shape[0])
+        self.codes = None
+
+    def daily(self, data_cols):
+        """Calculate the daily change of each of data_cols within each region."""
+        self._sort()
+        is_start = _group_bounds(self.codes)[0] == np.arange(self.rows.size)
+
+        new_cols = []
+        for data_col in data_cols:
+            counts = self._column(data_col)
+            prev_counts = np.empty_like(counts)
+            prev_counts[1:] = counts[:-1]
+            prev_counts[is_start] = 0
+
+            col_name = "daily_" + data_col
+            self.cols[col_name] = counts - prev_counts
+            new_cols.append(col_name)
+
+        return new_cols
+
+    def rolling(self, data_cols, x, center):
+        """Calculate x day rolling means of each of data_cols within each region."""
+        self._sort()
+        values = np.column_stack([self._column(data_col) for data_col in data_cols])
+        means = _group_rolling(values, self.codes, windows=[x], stats=["mean"], center=center)[("mean", x)]
+
+        new_cols = []
+        for i, data_col in enumerate(data_cols):
+            col_name = f"mean_{data_col}"
+            self.cols[col_name] = means[:, i]
+            new_cols.append(col_name)
+
+        return new_cols
+
+    def since(self, data_col, min_count, since_first_crossing):
+        """Keep days at or past min_count in data_col, and number the days since each region reached it."""
+        self._sort()
+        counts = self._column(data_col)
+
+        if since_first_crossing:
+            reached = (counts >= min_count).astype("int64")
+            reached_so_far = np.cumsum(reached)
+            group_start, _ = _group_bounds(self.codes)
+            keep = (reached_so_far - (reached_so_far[group_start] - reached[group_start])) > 0
+        else:
+            keep = counts >= min_count
+
+        self._filter(keep)
+        self.cols[f"days_since_{min_count}_{data_col}"] = _group_cumcount(self.codes)
+
+    def materialize(self, columns=None):
+        """Build the result table, sorted by date then region."""
+        self._sort()
+        final_order = np.lexsort((self.codes, self.dates))
+
+        id_cols = ["date"] + self.region_cols
+        if columns is None:
+            source_cols = self.data.columns.tolist()
+            calc_cols = list(self.cols.keys())
+        else:
+            source_cols = [col for col in self.data.columns if col in id_cols or col in columns]
+            calc_cols = [col for col in self.cols.keys() if col in columns and col not in source_cols]
+
+        result = self.data[source_cols].take(self.rows[final_order]).reset_index(drop=True)
+        return result.assign(**{col: self.cols[col][final_order] for col in calc_cols})
+
+    def _sort(self):
+        """Sort the rows by region, then date, and check that each region has only one row per day. Only done once."""
+        if self.codes is not None:
+            return
+
+        codes = _key_codes(self.data[self.region_cols].take(self.rows), self.region_cols, sort=True)
+        dates = self.data["date"].values[self.rows]
+        order = np.lexsort((dates, codes))
+
+        self.rows = self.rows[order]
+        self.codes = codes[order]
+        self.dates = dates[order]
+        self.cols = {name: col[order] for name, col in self.cols.items()}
+
+        if _has_duplicate_keys(self.codes, self.dates):
+            raise ParameterError(f"The region_cols you passed do not uniquely identify each row for each day. You passed {self.region_cols}.")
+
+    def _filter(self, keep):
+        """Keep only the rows where keep is True."""
+        self.rows = self.rows[keep]
+        self.cols = {name: col[keep] for name, col in self.cols.items()}
+        if self.codes is not None:
+            self.codes = self.codes[keep]
+            self.dates = self.dates[keep]
+
+    def _column(self, col):
+        """Get a calculated column, or a column from the source table, lined up with the current rows."""
+        if col in self.cols:
+            return self.cols[col]
+        self._check_cols([col])
+        return self.data[col].values[self.rows]
+
+    def _check_cols(self, cols):
+        """Make sure that all of cols exist."""
+        not_in = [col for col in cols if col not in self.data.columns and col not in self.cols]
+        if len(not_in) > 0:
+            raise ParameterError(f"The dataframe you passed does not contain all of the data types you passed to the data_cols parameter. These are the missing columns:\n{not_in}\n\nYour dataframe's columns are:\n{self.data.columns}")
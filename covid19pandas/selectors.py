@@ -18,11 +18,14 @@ import numpy as np
 import os
 import warnings
 import datetime
+import concurrent.futures
 
 from .exceptions import ParameterError
-from .utils import _long_to_wide, _wide_to_long, _offset_subtract
+from .utils import _wide_to_long, _default_rollup_levels, _is_sorted, _key_codes, _group_sum, _group_bounds, _group_cumcount, _has_duplicate_keys, _group_rolling
 
-def select_top_x_regions(data, data_col, region_cols, x, combine_subregions=True, other_data_cols=[], exclude=[]):
+_MIN_ROWS_PER_JOB = 500000 # Fewer rows than this take less time to calculate than to start a process and send them to it
+
+def select_top_x_regions(data, data_col, region_cols, x, combine_subregions=True, other_data_cols=[], exclude=[], rank_date=None, rank_window=1, rollups=None):
     """Select the top x regions with the most cases, deaths, recoveries, or count of another data type.
 
     Parameters:
@@ -33,58 +36,89 @@ def select_top_x_regions(data, data_col, region_cols, x, combine_subregions=True
     combine_subregions (bool, optional): When a particular region has different subregions, whether to sum the daily counts for all those subregions into one count for the region for each day. Otherwise, keeps the region broken into subregions. Default True.
     other_data_cols (list of str, optional): A list of other data columns in the table that you want to be summed for each region group instead of dropped, if combine_subregions is True. This parameter has no effect if combine_subregions is False. Default empty list.
     exclude (list of str, optional): A list of regions to exclude from the selection. If you passed multiple region cols, a region with a value in any of those columns that matches a value in this list will be excluded. If an excluded region made the cut, the next highest region will take its place. Default empty list.
+    rank_date (str or datetime-like, optional): The date whose counts the regions are ranked by. Default None uses the last date in the table.
+    rank_window (int, optional): The number of days, ending on rank_date, to sum each region's counts over when ranking. Default 1 ranks by the counts on rank_date alone.
+    rollups (Rollups, optional): Rollups built for this same table. If combine_subregions is True and you passed one region column that the rollups have a level for, the regions are ranked and selected from the already summed counts. Default None sums the subregions of the top regions.
 
     Returns:
     pandas.DataFrame: Counts for the top x regions.
     """
 
-    # If they give us a wide format table, make a long format copy for determining the top x regions
-    if "date" not in data.columns:
-        long_data = _wide_to_long(data, data_col) 
-    else:
-        long_data = data.copy()
-
-    # Check that data_col is in the dataframe
-    if data_col not in long_data.columns:
-        raise ParameterError(f"There is no '{data_col}' column in the dataframe you passed. Existing columns: \n{data.columns}")
-
     # Process string input for region grouping cols
     if isinstance(region_cols, str):
         region_cols = [region_cols]
 
-    # Find the top x regions
-    # Get the last recorded day
-    last_day = long_data["date"].max() 
+    wide = "date" not in data.columns
 
-    current_ct = long_data[long_data['date'] == last_day] # Pull all records for that day
-    current_ct = long_data[['date', data_col] + region_cols]
+    # If the counts are already summed at this level, rank and select from the sums
+    from_rollups = combine_subregions and _use_rollups(rollups, data, region_cols, [data_col] + other_data_cols)
+    if from_rollups:
+        data = rollups.table(region_cols[0])
+        if not wide:
+            data = data[["date"] + region_cols + [data_col] + other_data_cols]
+        combine_subregions = False
+
+    # Check that data_col is in the dataframe. Wide format tables only have one data type, so there's nothing to check.
+    if not wide and data_col not in data.columns:
+        raise ParameterError(f"There is no '{data_col}' column in the dataframe you passed. Existing columns: \n{data.columns}")
+
+    if rank_window < 1:
+        raise ParameterError(f"rank_window must be at least 1. You passed {rank_window}.")
+
+    # Find the ranking window. By default it's just the last recorded day.
+    if wide:
+        dates = pd.DatetimeIndex([col for col in data.columns if issubclass(type(col), datetime.date)])
+    else:
+        dates = pd.DatetimeIndex(data["date"].unique())
 
-    # Select only rows where region_cols values are not in the exclude list
-    for region_col in region_cols: 
-        current_ct = current_ct[~current_ct[region_col].isin(exclude)] 
+    if rank_date is None:
+        rank_date = dates.max()
+    else:
+        rank_date = pd.Timestamp(rank_date)
+        if rank_date not in dates:
+            raise ParameterError(f"The rank_date you passed, {rank_date}, is not a date in the table.")
 
-    # Fill NaNs so they aren't excluded in groupby and can match in joins
-    for region_col in region_cols: 
-        current_ct[region_col] = current_ct[region_col].fillna("n/a") 
-        data[region_col] = data[region_col].fillna("n/a")
+    window_start = rank_date - pd.Timedelta(days=rank_window - 1)
 
-    # Sum all counts for today in subregions within regions. Now we have to totals for all the regions for the most recent day.
-    current_ct = current_ct.groupby(region_cols).aggregate(np.sum) 
+    # Pull just the counts in the ranking window, one value per row
+    if wide:
+        window_cols = [col for col in data.columns if issubclass(type(col), datetime.date) and window_start <= col <= rank_date]
+        rank_rows = np.ones(data.shape[0], dtype=bool)
+        rank_counts = data[window_cols].sum(axis="columns").values
+    else:
+        rank_rows = ((data["date"] >= window_start) & (data["date"] <= rank_date)).values
+        rank_counts = data[data_col].values
 
-    # Sort the table by the data_col, then select the last x names--they are the top x regions
-    top_x_names = current_ct.sort_values(by=data_col).tail(x) 
-    top_x_names = top_x_names.drop(columns=data_col) # So that we don't have column overlap when joining with the original data table. So now top_x_names is a dataframe with just an index and no columns, but still joinable
+    # Don't rank rows where region_cols values are in the exclude list
+    for region_col in region_cols:
+        rank_rows = rank_rows & ~data[region_col].isin(exclude).values
+
+    # Sum the counts for each region within the window, using integer codes for the regions so NaNs don't need to be filled
+    codes = _key_codes(data, region_cols, sort=True)
+    n_regions = codes.max() + 1 if codes.size > 0 else 0
+    totals = np.bincount(codes[rank_rows], weights=rank_counts[rank_rows], minlength=n_regions)
+    ranked = np.bincount(codes[rank_rows], minlength=n_regions) > 0
+    totals[~ranked] = -np.inf # Regions with no counts in the window, or that were excluded, can't make the cut
+
+    # Find the top x regions with a partial sort
+    num_top = min(x, int(ranked.sum()))
+    if num_top < 1:
+        top_codes = np.array([], dtype="int64")
+    elif num_top < n_regions:
+        top_codes = np.argpartition(-totals, num_top - 1)[:num_top]
+    else:
+        top_codes = np.arange(n_regions)
 
-    # Select data for the top regions
-    data = data.join(top_x_names, on=region_cols, how="inner")
+    # Select data for the top regions through a membership mask on the region codes
+    is_top = np.zeros(n_regions, dtype=bool)
+    is_top[top_codes] = True
+    selected = np.flatnonzero(is_top[codes])
 
-    # Put the NaNs back in
-    for region_col in region_cols: 
-        data[region_col] = data[region_col].replace(to_replace="n/a", value=np.nan)
+    # If it's long format, sort everything by date, then region. The region codes sort the same way as the region columns.
+    if not wide:
+        selected = selected[np.lexsort((codes[selected], data["date"].values[selected]))]
 
-    # If it's long format, sort everything by date first again.
-    if "date" in data.columns:
-        data = data.sort_values(by=["date"] + region_cols)
+    data = data.take(selected)
 
     if combine_subregions:
         # Make sure that the other_data_cols columns all exist
@@ -97,21 +131,166 @@ def select_top_x_regions(data, data_col, region_cols, x, combine_subregions=True
         cols_to_drop = [col for col in data.columns if col not in cols_to_not_drop and not issubclass(type(col), datetime.date)]
         data = data.drop(columns=cols_to_drop)
 
-        # Determine the id cols to group by, and fill NaNs in them so those aren't excluded in groupby
+        # Determine the id cols to group by, then sum up total counts per day for each country. NaNs in the id cols are kept as their own group.
         id_cols = data.columns[data.columns.isin(["date"] + region_cols)].tolist()
-        for id_col in id_cols:
-            data[id_col] = data[id_col].fillna("n/a") 
-
-        # Sum up total counts per day for each country
-        data = data.groupby(id_cols).aggregate(np.sum).reset_index() 
+        data = _group_sum(data, id_cols)
 
-        # Put the NaNs back in
-        for id_col in id_cols:
-            data[id_col] = data[id_col].replace(to_replace="n/a", value=np.nan) 
+    if from_rollups:
+        data = data.reset_index(drop=True)
 
     return data
 
-def select_regions(data, region_col, regions, combine_subregions=False, data_cols=[]):
+class RegionIndex:
+    """An index from the values in a table's region columns to the positions of the rows that have them. Build one once for a table you select from many times, and pass it to select_regions through the region_index parameter. Each column's lookup is built the first time that column is used. If you change the table after building the index, build a new index.
+
+    Parameters:
+    data (pandas.DataFrame): The table to index.
+    region_cols (str or list of str, optional): Region columns to build lookups for right away. Default None builds each lookup when it's first used.
+    """
+
+    def __init__(self, data, region_cols=None):
+        self.data = data
+        self._lookups = {}
+
+        if isinstance(region_cols, str):
+            region_cols = [region_cols]
+        if region_cols is not None:
+            for region_col in region_cols:
+                self._build(region_col)
+
+    def positions(self, region_col, regions):
+        """Get the positions of the rows in the table that have any of the specified values in a region column.
+
+        Parameters:
+        region_col (str): The name of the region column to look the values up in.
+        regions (str or list of str): The region values to look up.
+
+        Returns:
+        numpy.ndarray: The row positions, in the order the rows appear in the table.
+        """
+        if isinstance(regions, str):
+            regions = [regions]
+        if region_col not in self._lookups:
+            self._build(region_col)
+
+        code_map, nan_code, order, bounds = self._lookups[region_col]
+
+        # Look each code up once, so repeated values don't select the same rows twice
+        codes = set()
+        for region in regions:
+            code = nan_code if pd.isnull(region) else code_map.get(region)
+            if code is not None:
+                codes.add(code)
+        chunks = [order[bounds[code]:bounds[code + 1]] for code in codes]
+
+        if len(chunks) == 0:
+            return np.array([], dtype="int64")
+        return np.sort(np.concatenate(chunks))
+
+    def _build(self, region_col):
+        """Build the lookup for one region column."""
+        if region_col not in self.data.columns:
+            raise ParameterError(f"There is no '{region_col}' column in the dataframe you passed. Existing columns: \n{self.data.columns}")
+
+        codes, uniques = pd.factorize(self.data[region_col]) # NaNs get the code -1
+        nan_code = len(uniques)
+        codes = np.where(codes == -1, nan_code, codes) # Give NaN a code of its own, after all the real values
+
+        # Group the row positions by code. The rows for code i are order[bounds[i]:bounds[i + 1]].
+        order = np.argsort(codes, kind="stable")
+        bounds = np.zeros(nan_code + 2, dtype="int64")
+        np.cumsum(np.bincount(codes, minlength=nan_code + 1), out=bounds[1:])
+
+        code_map = {region: code for code, region in enumerate(uniques)}
+        self._lookups[region_col] = (code_map, nan_code, order, bounds)
+
+class Rollups:
+    """Counts summed for every region at each level of a table's region hierarchy, e.g. county to state to country for the JHU U.S. table. Build one once for each version of a table, and pass it to select_regions or select_top_x_regions through their rollups parameter. Selections with combine_subregions=True at one of the levels then look the sums up, instead of summing the subregions again each time. For the JHU tables, get_jhu_rollups builds one for you and caches it until the data changes. If you change the table after building the rollups, build new ones. Selectors raise a ParameterError if the table they're passed has a different number of rows or range of dates than the table the rollups were built from.
+
+    Parameters:
+    data (pandas.DataFrame): The table to sum. Either long or wide format.
+    levels (str or list of str, optional): The region columns to sum counts at. Default None uses the hierarchy of tables from our getters: "Province_State" and "Country_Region" for the JHU U.S. table, "Country/Region" for the JHU global table, and "state" for the NYT county table.
+    data_cols (str or list of str, optional): For long format tables, the data columns to sum. Default None sums whichever of "cases", "deaths", and "recovered" are in the table. For wide format tables, all date columns are summed, and this parameter has no effect.
+    """
+
+    def __init__(self, data, levels=None, data_cols=None):
+        if isinstance(levels, str):
+            levels = [levels]
+        if isinstance(data_cols, str):
+            data_cols = [data_cols]
+
+        if levels is None:
+            levels = _default_rollup_levels(data)
+
+        self.wide = "date" not in data.columns
+        if self.wide:
+            date_cols = [col for col in data.columns if issubclass(type(col), datetime.date)]
+        else:
+            if data_cols is None:
+                data_cols = [col for col in ["cases", "deaths", "recovered"] if col in data.columns]
+
+            not_in = [col for col in data_cols if not col in data.columns]
+            if len(not_in) > 0:
+                raise ParameterError(f"The dataframe you passed does not contain all of the data types you passed to the data_cols parameter. These are the missing columns:\n{not_in}\n\nYour dataframe's columns are:\n{data.columns}")
+
+        self.data_cols = data_cols
+        self._signature = _table_signature(data)
+        self._tables = {}
+        self._indexes = {}
+        for level in levels:
+            if level not in data.columns:
+                raise ParameterError(f"There is no '{level}' column in the dataframe you passed. Existing columns: \n{data.columns}")
+
+            if self.wide:
+                table = _group_sum(data[[level] + date_cols], [level])
+            else:
+                table = _group_sum(data[["date", level] + data_cols], ["date", level])
+
+            self._tables[level] = table
+            self._indexes[level] = RegionIndex(table, level)
+
+    @property
+    def levels(self):
+        """list of str: The region columns that counts were summed at."""
+        return list(self._tables.keys())
+
+    def table(self, level):
+        """Get the summed counts for all regions at one level.
+
+        Parameters:
+        level (str): The region column the counts were summed at.
+
+        Returns:
+        pandas.DataFrame: The summed counts, sorted by date and then region for long format, or by region for wide format.
+        """
+        if level not in self._tables:
+            raise ParameterError(f"Counts were not summed at the '{level}' level. Levels available: {self.levels}")
+        return self._tables[level]
+
+    def select(self, level, regions, data_cols=None):
+        """Look up the summed counts for particular regions at one level.
+
+        Parameters:
+        level (str): The region column the regions are in.
+        regions (str or list of str): The regions to select.
+        data_cols (str or list of str, optional): For long format tables, the summed data columns to keep. Default None keeps all of them.
+
+        Returns:
+        pandas.DataFrame: The summed counts for the specified regions, in the same order as the table for the level.
+        """
+        table = self.table(level)
+        if isinstance(data_cols, str):
+            data_cols = [data_cols]
+
+        if not self.wide and data_cols is not None:
+            not_in = [col for col in data_cols if not col in self.data_cols]
+            if len(not_in) > 0:
+                raise ParameterError(f"These data columns were not summed in the rollups you passed:\n{not_in}\n\nSummed columns:\n{self.data_cols}")
+            table = table[["date", level] + data_cols]
+
+        return table.take(self._indexes[level].positions(level, regions)).reset_index(drop=True)
+
+def select_regions(data, region_col, regions, combine_subregions=False, data_cols=[], region_index=None, rollups=None):
     """Select all data for particular regions within a table, optionally summing counts for subregions into one count for each region for each day.
     
     Parameters:
@@ -120,6 +299,8 @@ def select_regions(data, region_col, regions, combine_subregions=False, data_col
     regions (str or list of str): The regions to select.
     combine_subregions (bool): When a particular region has different subregions, whether to sum the daily counts for all those subregions into one count for the region for each day. Default False.
     data_cols (str or list of str, optional): Only required when passing long format tables and combine_subregions is True. These are the data column(s) in the table that you want to be summed for each region group instead of dropped, if combine_subregions is True. Default is an empty list.
+    region_index (RegionIndex, optional): A RegionIndex built for this same table. When you select from the same table many times, passing one makes each selection take time proportional to the number of rows selected, instead of scanning the whole table. Default None scans the table.
+    rollups (Rollups, optional): Rollups built for this same table. If combine_subregions is True and the rollups have a level for region_col, the summed counts are looked up instead of calculated. Default None sums the subregions.
 
     Returns:
     pandas.DataFrame: The data for the specified regions.
@@ -130,8 +311,24 @@ def select_regions(data, region_col, regions, combine_subregions=False, data_col
     if isinstance(data_cols, str):
         data_cols = [data_cols]
 
+    # If the counts are already summed at this level, just look them up
+    if combine_subregions and _use_rollups(rollups, data, [region_col], data_cols):
+        if "date" in data.columns:
+            data = rollups.select(region_col, regions, data_cols=data_cols)
+        else:
+            data = rollups.select(region_col, regions)
+
+        if data.shape[0] < 1:
+            raise ParameterError(f"No rows in the dataframe have any of the values {regions} in the column '{region_col}'.")
+        return data
+
     # Select the data
-    data = data[data[region_col].isin(regions)].copy()
+    if region_index is not None:
+        if region_index.data is not data:
+            raise ParameterError("The region_index you passed was built for a different table. Build a RegionIndex for this table with RegionIndex(data).")
+        data = data.take(region_index.positions(region_col, regions))
+    else:
+        data = data[data[region_col].isin(regions)].copy()
 
     # Check that there at least one row matched
     if data.shape[0] < 1:
@@ -155,19 +352,12 @@ def select_regions(data, region_col, regions, combine_subregions=False, data_col
         cols_to_drop = [col for col in data.columns if col not in cols_to_not_drop and not issubclass(type(col), datetime.date)]
         data = data.drop(columns=cols_to_drop)
 
-        # Fill NaNs in the group cols so they aren't excluded in groupby and joins
-        for group_col in group_cols:
-            data[group_col] = data[group_col].fillna("n/a") 
-
-        data = data.groupby(group_cols).aggregate(np.sum)
-        data = data.reset_index()
-
-        for group_col in group_cols:
-            data[group_col] = data[group_col].replace(to_replace="n/a", value=np.nan) # Put the NaNs back in
+        # Sum the counts for each group. NaNs in the group cols are kept as their own group.
+        data = _group_sum(data, group_cols)
 
     return data
 
-def calc_x_day_rolling_mean(data, data_cols, region_cols, x, center=False):
+def calc_x_day_rolling_mean(data, data_cols, region_cols, x, center=False, previous=None, n_jobs=1):
     """Calculate a centered rolling mean with x days for each number in a count.
 
     Parameters:
@@ -176,11 +366,18 @@ def calc_x_day_rolling_mean(data, data_cols, region_cols, x, center=False):
     region_cols (str or list of str): Column(s) that uniquely identify each region for each day.
     x (int): The number of days to calculate the means over.
     center (bool, optional): Whether to center the window on each value, instead of having the value at the right side of the window. Default False.
+    previous (pandas.DataFrame, optional): A table this function already returned, with the same data_cols, region_cols, x, and center. If you pass one, data should be just the newly added days, in long format, and only the last x days of each region are recalculated. Assumes each region has a row for every day, as tables from our getters do. The returned table still copies all of previous. Default None calculates the means for all of data.
+    n_jobs (int, optional): The number of processes to split the regions between for a long format table. Each region's rows all go to the same process, and the result is the same as running in one process. -1 uses all of the machine's CPUs. Default 1 does all the work in this process. Wide format tables, and tables with fewer rows than it's worth starting processes for, are always done in this process.
 
     Returns:
-    pandas.DataFrame: The table, with rolling means calculated over the specified number of days.
+    pandas.DataFrame: The table, with rolling means calculated over the specified number of days. If you passed previous, it's previous with the new days appended.
     """
 
+    if previous is not None:
+        # New days only change the means of windows they fall in. With a centered window, that includes the last few days already in previous.
+        recalc = lambda tail: calc_x_day_rolling_mean(tail, data_cols, region_cols, x, center=center)
+        return _extend_calculation(previous, data, recalc, lookback_days=x - 1, update_days=(x - 1) // 2 if center else 0)
+
     # Convert from str to list input if needed
     if isinstance(data_cols, str):
         data_cols = [data_cols]
@@ -188,61 +385,104 @@ def calc_x_day_rolling_mean(data, data_cols, region_cols, x, center=False):
     if isinstance(region_cols, str):
         region_cols = [region_cols]
 
-    # Deal with wide format tables
-    wide = False
+    if _use_processes(data, n_jobs):
+        return _run_partitioned(calc_x_day_rolling_mean, data, region_cols, n_jobs, same_rows=True, data_cols=data_cols, x=x, center=center)
+
+    # Wide format tables have one row per region, so we roll along each row of the block of counts, without converting to long format and back
     if "date" not in data.columns:
-        wide = True
-        data = _wide_to_long(data, "generic_data_col") # We use generic because if it's a wide table, we know there's only one data type, but we don't know what it is
-        data_cols = ["generic_data_col"]
+        id_cols, date_cols = _wide_cols(data)
+        if np.unique(_key_codes(data, region_cols)).size < data.shape[0]:
+            raise ParameterError("The combination of grouping columns you passed does not uniquely identify each row for each day. Either pass a different set of grouping columns, or aggregate the counts for each combination of day and grouping columns before using this function.")
 
-    # Check that the provided region_cols uniquely identify each row for each date
-    if data.duplicated(subset=["date"] + region_cols).any():
-        raise ParameterError(f"The region_cols you passed do not uniquely identify each row for each day. You passed {region_cols}.")
+        # Put the columns in date order, and the rows in order of the id columns with NaNs first, which is the order the table used to come back in after converting
+        date_cols = [date_cols[i] for i in np.argsort(pd.DatetimeIndex(date_cols).values, kind="stable")]
+        row_order = np.lexsort([pd.factorize(data[col], sort=True)[0] for col in reversed(id_cols)])
+        values = data[date_cols].to_numpy()[row_order]
 
-    # Make sure that the data_cols columns all exist
-    not_in = [col for col in data_cols if not col in data.columns]
-    if len(not_in) > 0:
-        raise ParameterError(f"The dataframe you passed does not contain all of the data types you passed to the data_cols parameter. These are the missing columns:\n{not_in}\n\nYour dataframe's columns are:\n{data.columns}")
+        # Each row is its own group, and is already in date order
+        n_rows, n_dates = values.shape
+        rolled = _group_rolling(values.reshape(-1, 1), np.repeat(np.arange(n_rows), n_dates), windows=[x], stats=["mean"], center=center)
+        means = pd.DataFrame(rolled[("mean", x)].reshape(n_rows, n_dates), columns=date_cols)
 
-    # Fill NaNs in the grouping columns, so they don't get messed up in groupby or join operations
-    for region_col in region_cols:
-        data[region_col] = data[region_col].fillna("n/a")
+        return pd.concat([data[id_cols].take(row_order).reset_index(drop=True), means], axis=1)
 
-    # For each data_col, group by the id cols and calculate a rolling mean with a window x days wide, then join back into the original table
-    data_date_idx = data.set_index("date") # So that the groupby and rolling calculations will work properly
-    means_cols = []
+    rolled = _rolling_stats(data, data_cols, region_cols, windows=[x], stats=["mean"], center=center)
+    means = rolled[("mean", x)]
 
-    for data_col in data_cols:
-        means = data_date_idx.groupby(region_cols)[data_col].rolling(window=x, min_periods=1, center=center).mean()
+    # Note that we follow the standard of adding the transformation descriptor ("mean_" in this case) to the beginning of the column name so that when we compose different calc functions, the order of composition is apparent.
+    means_cols = [f"mean_{data_col}" for data_col in data_cols]
+    data = data.assign(**{col_name: means[:, i] for i, col_name in enumerate(means_cols)})
 
-        # Note that we follow the standard of adding the transformation descriptor ("mean_" in this case) to the beginning of the column name so that when we compose different calc functions, the order of composition is apparent.
-        col_name = f"mean_{data_col}"
-        means.name = col_name
-        means_cols.append(col_name)
+    return data
 
-        data = data.join(means, on=region_cols + ["date"])
+def calc_rolling_stats(data, data_cols, region_cols, windows, stats=["mean"], center=False, previous=None, n_jobs=1):
+    """Calculate rolling statistics for several window sizes and data columns at once. This is faster than calling calc_x_day_rolling_mean once for each window size, because the table is only sorted and grouped once for all of them.
 
-    # Put the NaNs back in
-    for region_col in region_cols:
-        data[region_col] = data[region_col].replace(to_replace="n/a", value=np.nan)
+    Parameters:
+    data (pandas.DataFrame): The data to calculate the rolling statistics for.
+    data_cols (str or list of str): The data columns in your table that you want to calculate the rolling statistics for.
+    region_cols (str or list of str): Column(s) that uniquely identify each region for each day.
+    windows (int or list of int): The numbers of days to calculate the statistics over.
+    stats (str or list of str, optional): The statistics to calculate. Any of "mean", "sum", "min", or "max". Default ["mean"].
+    center (bool, optional): Whether to center the window on each value, instead of having the value at the right side of the window. Default False.
+    previous (pandas.DataFrame, optional): A table this function already returned, with the same parameters. If you pass one, data should be just the newly added days, and only the days the new ones affect are recalculated. See calc_x_day_rolling_mean. Default None.
+    n_jobs (int, optional): The number of processes to split the regions between for a long format table. Each region's rows all go to the same process, and the result is the same as running in one process. -1 uses all of the machine's CPUs. Default 1 does all the work in this process. Wide format tables, and tables with fewer rows than it's worth starting processes for, are always done in this process.
 
-    if wide:
-        data = data.drop(columns="generic_data_col")
-        data = _long_to_wide(data, data_type=means_cols[0])
+    Returns:
+    pandas.DataFrame: The table, with a column for each combination of data column, window size, and statistic. Each is named with the statistic and window size before the data column name, e.g. "mean_7_day_cases" or "max_14_day_deaths". Note: This function only outputs data in long format tables, since a wide format table can only hold one of these columns.
+    """
+    # Convert from str or int to list input if needed
+    if isinstance(data_cols, str):
+        data_cols = [data_cols]
+    if isinstance(region_cols, str):
+        region_cols = [region_cols]
+    if isinstance(windows, (int, np.integer)):
+        windows = [windows]
+    if isinstance(stats, str):
+        stats = [stats]
 
-    return data
+    if previous is not None:
+        largest = max(windows)
+        recalc = lambda tail: calc_rolling_stats(tail, data_cols, region_cols, windows, stats=stats, center=center)
+        return _extend_calculation(previous, data, recalc, lookback_days=largest - 1, update_days=(largest - 1) // 2 if center else 0)
+
+    if _use_processes(data, n_jobs):
+        return _run_partitioned(calc_rolling_stats, data, region_cols, n_jobs, same_rows=True, data_cols=data_cols, windows=windows, stats=stats, center=center)
+
+    # If they give us a wide format table, convert it to long format. Wide tables only have one data type, so data_cols is just the name to give it.
+    if "date" not in data.columns:
+        if len(data_cols) != 1:
+            raise ParameterError(f"Wide format tables only have one data type, so pass just one name to data_cols. You passed {data_cols}.")
+        data = _wide_to_long(data, data_cols[0])
+
+    rolled = _rolling_stats(data, data_cols, region_cols, windows=windows, stats=stats, center=center)
+
+    # Note that we follow the standard of adding the transformation descriptor to the beginning of the column name so that when we compose different calc functions, the order of composition is apparent.
+    new_cols = {}
+    for i, data_col in enumerate(data_cols):
+        for window in windows:
+            for stat in stats:
+                new_cols[f"{stat}_{window}_day_{data_col}"] = rolled[(stat, window)][:, i]
 
-def calc_daily_change(data, data_cols, region_cols):
+    return data.assign(**new_cols)
+
+def calc_daily_change(data, data_cols, region_cols, previous=None, n_jobs=1):
     """Get the daily change for a cumulative count within each region. Original cumulative counts are not dropped.
     
     Parameters:
     data (pandas.DataFrame): The cumulative counts from which to calculate the daily change.
     data_col (str or list of str): The column(s) you want to calculate the daily change for. Other columns will be left unchanged.
     region_cols (str or list of str): Column(s) that uniquely identify each region for each day.
+    previous (pandas.DataFrame, optional): A long format table this function already returned, with the same data_cols and region_cols. If you pass one, data should be just the newly added days, in long format, and only those days are calculated, using each region's last day in previous. Assumes each region has a row for every day, as tables from our getters do. The returned table still copies all of previous. Default None calculates the daily change for all of data.
+    n_jobs (int, optional): The number of processes to split the regions between for a long format table. Each region's rows all go to the same process, and the result is the same as running in one process. -1 uses all of the machine's CPUs. Default 1 does all the work in this process. Wide format tables, and tables with fewer rows than it's worth starting processes for, are always done in this process.
     
     Returns:
-    pandas.DataFrame: The same table, but with daily change in counts. The column is named "'daily_' + data_col" for each data type.
+    pandas.DataFrame: The same table, but with daily change in counts. The column is named "'daily_' + data_col" for each data type. If you passed previous, it's previous with the new days appended.
     """
+    if previous is not None:
+        recalc = lambda tail: calc_daily_change(tail, data_cols, region_cols)
+        return _extend_calculation(previous, data, recalc, lookback_days=1, update_days=0)
+
     wide = False
     if "date" not in data.columns:
         wide = True
@@ -254,16 +494,14 @@ def calc_daily_change(data, data_cols, region_cols):
     if isinstance(region_cols, str):
         region_cols = [region_cols]
 
-    # Check that the provided region_cols uniquely identify each row for each date
-    if wide:
-        unique_groups = region_cols
-    else: # long format table
-        unique_groups = ["date"] + region_cols
-
-    if data.duplicated(subset=unique_groups).any():
-        raise ParameterError(f"The region_cols you passed do not uniquely identify each row for each day. You passed {region_cols}.")
+    if _use_processes(data, n_jobs):
+        return _run_partitioned(calc_daily_change, data, region_cols, n_jobs, same_rows=True, data_cols=data_cols)
 
     if wide:
+        # Check that the provided region_cols uniquely identify each row
+        if data.duplicated(subset=region_cols).any():
+            raise ParameterError(f"The region_cols you passed do not uniquely identify each row for each day. You passed {region_cols}.")
+
         if not data.columns.map(lambda x: issubclass(type(x), datetime.date)).any():
             raise ParameterError("Invalid table format. Must either have a 'date' column, or have dates as the columns.")
 
@@ -271,53 +509,50 @@ def calc_daily_change(data, data_cols, region_cols):
         id_cols = data.columns[~cols_are_dates_filter].tolist()
         date_cols = data.columns[cols_are_dates_filter].tolist()
 
-        new_data = data[id_cols]
-        new_data.insert(loc=len(new_data.columns), column=date_cols[0], value=data[date_cols[0]]) # All counts on first day were new
-        for i in range(1, len(date_cols)):
-            day = date_cols[i]
-            prev_day = date_cols[i - 1]
-            new_data.insert(loc=len(new_data.columns), column=day, value=data[day] - data[prev_day])
+        # Take the first difference across the whole block of date columns at once. Prepending zeros means all counts on the first day were new.
+        daily_block = np.diff(data[date_cols].values, axis=1, prepend=0)
+        daily = pd.DataFrame(daily_block, index=data.index, columns=date_cols)
 
-        data = new_data
+        data = pd.concat([data[id_cols], daily], axis=1)
 
     else: # It's a long format table
         for data_col in data_cols:
-
             if data_col not in data.columns:
                 raise ParameterError(f"There is no '{data_col}' column in the dataframe you passed. Existing columns: \n{data.columns}")
 
-            # Duplicate grouping cols, since they'll be lost when used for grouping
-            for region_col in region_cols:
-                data = data.assign(**{region_col + "_group": data[region_col]})
+        # Order the rows by region, keeping each region's rows in their original order, so each region's days are contiguous
+        codes = _key_codes(data, region_cols)
+        dates = data["date"].values
+        order = np.argsort(codes, kind="stable")
 
-            # Add the suffix to the region_cols list, so we group by (and lose) the duplicated columns
-            suffix_region_cols = [col + "_group" for col in region_cols]
-
-            # Duplicate the count col so we can keep the cumulative counts
-            # Note that we follow the standard of adding the transformation descriptor ("daily_" in this case) to the beginning of the column name so that when we compose different calc functions, the order of composition is apparent.
-            daily_col = "daily_" + data_col
-            data = data.assign(**{daily_col: data[data_col]})
+        # Check that the provided region_cols uniquely identify each row for each date. If the table is sorted by date, so is each region's block of rows.
+        check_order = order if _is_sorted(dates) else np.lexsort((dates, codes))
+        if _has_duplicate_keys(codes[check_order], dates[check_order]):
+            raise ParameterError(f"The region_cols you passed do not uniquely identify each row for each day. You passed {region_cols}.")
 
-            # Put all columns besides the duplicates we created into the index, so they aren't affected by the groupby
-            id_cols = data.columns[~data.columns.isin(suffix_region_cols + [daily_col])].tolist()
-            data = data.set_index(id_cols)
+        group_start, _ = _group_bounds(codes[order])
+        is_start = group_start == np.arange(order.size)
 
-            # Fill NaNs in grouping cols (fillna excludes index)
-            data = data.fillna("n/a")
+        daily_cols = {}
+        for data_col in data_cols:
+            # Subtract each day's count from the next day's within each region. All counts on a region's first day were new.
+            counts = data[data_col].values[order]
+            prev_counts = np.empty_like(counts)
+            prev_counts[1:] = counts[:-1]
+            prev_counts[is_start] = 0
 
-            # Group by location and calculate daily counts with our helper function _offset_subtract
-            data = data.groupby(suffix_region_cols).transform(_offset_subtract)
+            daily = np.empty_like(counts)
+            daily[order] = counts - prev_counts
 
-            # Put back in any remaining NaNs
-            data = data.replace(to_replace="n/a", value=np.nan)
+            # Note that we follow the standard of adding the transformation descriptor ("daily_" in this case) to the beginning of the column name so that when we compose different calc functions, the order of composition is apparent.
+            daily_cols["daily_" + data_col] = daily
 
-            # Take the other columns back out of the index
-            data = data.reset_index()
+        data = data.assign(**daily_cols)
 
     return data
 
 
-def calc_days_since_min_count(data, data_col, region_cols, min_count):
+def calc_days_since_min_count(data, data_col, region_cols, min_count, since_first_crossing=False, n_jobs=1):
     """Create a column where the value for each row is the number of days since the country/region in that row had a particular count of a data type, e.g. cases, deaths, or recoveries. You can then index by this column to compare how different countries were doing after similar amounts of time from first having infections.
 
     Parameters:
@@ -325,6 +560,8 @@ def calc_days_since_min_count(data, data_col, region_cols, min_count):
     data_col (str): The data type you want the days since the minimum count of. If other data types are present in the table, they will also be kept for days that pass the cutoff in this data type.
     region_cols (str or list of str): Column(s) that uniquely identify each region for each day.
     min_count (int): The minimum count for your data type at which you want to start counting from for each country/region.
+    since_first_crossing (bool, optional): Whether to keep every day from the first day each region reached min_count, even if its count later falls back below min_count. Otherwise, only days where the count is at least min_count are kept and counted. Default False.
+    n_jobs (int, optional): The number of processes to split the regions between for a long format table. Each region's rows all go to the same process, and the result is the same as running in one process. -1 uses all of the machine's CPUs. Default 1 does all the work in this process. Wide format tables, and tables with fewer rows than it's worth starting processes for, are always done in this process.
     
     Returns:
     pandas.DataFrame: The original table, with days since the xth case/death/recovery. Note: This function only outputs data in long format tables, since wide format tables would be messy with this transformation.
@@ -333,46 +570,311 @@ def calc_days_since_min_count(data, data_col, region_cols, min_count):
     if isinstance(region_cols, str): 
         region_cols = [region_cols]
 
-    # If they give us a wide format table, convert it to long format.
+    if _use_processes(data, n_jobs):
+        return _run_partitioned(calc_days_since_min_count, data, region_cols, n_jobs, same_rows=False, data_col=data_col, min_count=min_count, since_first_crossing=since_first_crossing)
+
+    # If they give us a wide format table with one row per region, work on its block of counts directly. Otherwise, convert it to long format.
     if "date" not in data.columns:
-        data = _wide_to_long(data, data_col) 
+        codes = _key_codes(data, region_cols, sort=True)
+        if np.unique(codes).size == data.shape[0]:
+            return _wide_days_since(data, data_col, codes, min_count, since_first_crossing)
+        data = _wide_to_long(data, data_col)
+
+    # Sort the rows by region, then date, so each region's days are contiguous and in order. If the table is already sorted by date, a stable sort by region does that. We work with row positions and only take the selected rows out of the table at the end.
+    codes = _key_codes(data, region_cols, sort=True)
+    dates = data[date_col].values
+    if _is_sorted(dates):
+        order = np.argsort(codes, kind="stable")
+    else:
+        order = np.lexsort((dates, codes))
+    sorted_codes = codes[order]
+    sorted_counts = data[data_col].values[order]
+
+    if since_first_crossing:
+        # Keep each region's rows from the first day it reached the minimum count onward
+        reached = (sorted_counts >= min_count).astype("int64")
+        reached_so_far = np.cumsum(reached)
+        group_start, _ = _group_bounds(sorted_codes)
+        reached_before_group = reached_so_far[group_start] - reached[group_start]
+        keep = (reached_so_far - reached_before_group) > 0
+    else:
+        # Drop all rows for days that don't meet the minimum count
+        keep = sorted_counts >= min_count
 
-    # Drop all rows for days that don't meet the minimum count
-    data = data[data[data_col] >= min_count] 
+    order = order[keep]
+    sorted_codes = sorted_codes[keep]
+    sorted_dates = dates[order]
 
     # Check no duplicate dates in each group
-    if data.duplicated(subset=[date_col] + region_cols).any():
+    if _has_duplicate_keys(sorted_codes, sorted_dates):
         raise ParameterError("The combination of grouping columns you passed does not uniquely identify each row for each day. Either pass a different set of grouping columns, or aggregate the counts for each combination of day and grouping columns before using this function.")
 
-    # Duplicate grouping cols, since they'll be lost when used for grouping
-    for region_col in region_cols:
-        data = data.assign(**{region_col + "_group": data[region_col]})
+    # Number each region's days from its first day at or past the cutoff
+    days_since = _group_cumcount(sorted_codes)
 
-    # Add the suffix to the group_cols list, so we group by (and lose) the duplicated columns
-    suffix_group_cols = [col + "_group" for col in region_cols]
-
-    # Duplicate the date col so we can keep the original dates if desired
+    # Sort the table by date, then region. The region codes sort the same way as the region columns, so we don't have to sort on the columns themselves.
+    final_order = np.lexsort((sorted_codes, sorted_dates))
     days_since_col = f"days_since_{min_count}_{data_col}"
-    data = data.assign(**{days_since_col: data[date_col]})
+    data = data.iloc[order[final_order]]
+    data = data.assign(**{days_since_col: days_since[final_order]})
 
-    # Put the non-grouping and non-date columns in the index, so they don't get changed
-    data = data.sort_values(by="date") # This will make sure eveything is in the right order to generate days since the cutoff
-    id_cols = data.columns[~data.columns.isin(suffix_group_cols + [days_since_col])].tolist()
-    data = data.set_index(id_cols)
+    return data
 
-    # Fill NaNs in grouping cols (fillna excludes index)
-    data = data.fillna("n/a")
+# Helper functions
+def _use_rollups(rollups, data, region_cols, data_cols):
+    """Check whether rollups passed to a selector can answer a selection that sums subregions at region_cols.
 
-    # Separate the groups, and calculate the number of days since the specified count
-    data = data.groupby(suffix_group_cols).transform(lambda col: pd.Series(data=range(0, len(col)), index=col.index))
+    Parameters:
+    rollups (Rollups or None): The rollups passed to the selector.
+    data (pandas.DataFrame): The table passed to the selector.
+    region_cols (list of str): The region columns being summed at.
+    data_cols (list of str): The data columns being summed. Only checked for long format tables.
 
-    # Put back in any remainings NaNs
-    data = data.replace(to_replace="n/a", value=np.nan)
+    Returns:
+    bool: Whether to use the rollups.
+    """
+    if rollups is None:
+        return False
+    if rollups.wide != ("date" not in data.columns):
+        raise ParameterError("The rollups you passed were built for a table in a different format. Build Rollups for this table with Rollups(data).")
+    if rollups._signature != _table_signature(data):
+        raise ParameterError("The rollups you passed were built for a different table, or for this table before it changed. Build Rollups for this table with Rollups(data).")
+    if not rollups.wide and not set(data_cols).issubset(rollups.data_cols):
+        return False # Let the selector sum the subregions, and raise the usual error if a column is missing
+    return len(region_cols) == 1 and region_cols[0] in rollups.levels
+
+def _table_signature(data):
+    """Summarize a table's size and dates, to tell whether rollups passed to a selector were built for it.
 
-    # Take the other columns back out of the index
-    data = data.reset_index()
+    Parameters:
+    data (pandas.DataFrame): The table.
+
+    Returns:
+    tuple: The number of rows, and the first and last dates.
+    """
+    if "date" in data.columns:
+        return data.shape[0], data["date"].min(), data["date"].max()
 
-    # Sort the table
-    data = data.sort_values(by=[date_col] + region_cols)
+    date_cols = [col for col in data.columns if issubclass(type(col), datetime.date)]
+    return data.shape[0], min(date_cols, default=None), max(date_cols, default=None)
 
-    return data
+def _wide_cols(data):
+    """Split the columns of a wide format table into id columns and date columns.
+
+    Parameters:
+    data (pandas.DataFrame): A wide format table.
+
+    Returns:
+    list: The id columns, in table order.
+    list: The date columns, in table order.
+    """
+    date_cols = [col for col in data.columns if issubclass(type(col), datetime.date)]
+    if len(date_cols) == 0:
+        raise ParameterError("Invalid table format. Must either have a 'date' column, or have dates as the columns.")
+    id_cols = [col for col in data.columns if not issubclass(type(col), datetime.date)]
+
+    return id_cols, date_cols
+
+def _wide_days_since(data, data_col, region_codes, min_count, since_first_crossing):
+    """Do calc_days_since_min_count for a wide format table with one row per region. Works on the block of counts, and only builds long format rows for the days that are kept.
+
+    Parameters:
+    data (pandas.DataFrame): A wide format table.
+    data_col (str): The name to give the counts in the long format output.
+    region_codes (numpy.ndarray): The region code for each row, from _key_codes with sort=True. Must be unique.
+    min_count (int): The minimum count to start counting days from.
+    since_first_crossing (bool): Whether to keep every day from the first day each region reached min_count.
+
+    Returns:
+    pandas.DataFrame: The same table calc_days_since_min_count gives for the table converted to long format.
+    """
+    id_cols, date_cols = _wide_cols(data)
+    dates = pd.DatetimeIndex(date_cols).values
+    values = data[date_cols].to_numpy()
+    n_rows = data.shape[0]
+
+    # Put the rows in region order and the columns in date order
+    row_order = np.argsort(region_codes, kind="stable")
+    date_order = np.argsort(dates, kind="stable")
+    block = values[row_order][:, date_order]
+
+    keep = block >= min_count
+    if since_first_crossing:
+        keep = np.logical_or.accumulate(keep, axis=1)
+    days_since = np.cumsum(keep, axis=1) - 1
+
+    # Going through the transposed mask gives the kept cells by date, then region, which is how the output is sorted
+    date_pos, row_pos = np.nonzero(keep.T)
+    rows = row_order[row_pos]
+    cols = date_order[date_pos]
+
+    data = data[id_cols].take(rows)
+    data.index = cols * n_rows + rows # The labels the rows would have had in the long format table
+    data.insert(0, "date", dates[cols])
+    return data.assign(**{data_col: values[rows, cols], f"days_since_{min_count}_{data_col}": days_since[row_pos, date_pos]})
+
+def _use_processes(data, n_jobs):
+    """Check whether a calc function should split its work between processes.
+
+    Parameters:
+    data (pandas.DataFrame): The table passed to the calc function.
+    n_jobs (int): The n_jobs passed to the calc function.
+
+    Returns:
+    bool: Whether to use _run_partitioned.
+    """
+    if n_jobs == 0 or n_jobs < -1:
+        raise ParameterError(f"n_jobs must be a positive number of processes, or -1 to use all CPUs. You passed {n_jobs}.")
+    return n_jobs != 1 and "date" in data.columns and data.shape[0] >= 2 * _MIN_ROWS_PER_JOB
+
+def _run_partitioned(func, data, region_cols, n_jobs, same_rows, **kwargs):
+    """Run a calc function on partitions of a long format table in a pool of processes, and stitch the results back together in the order the function gives when run on the whole table. All of each region's rows go in the same partition, in their original order. Each partition gets at least _MIN_ROWS_PER_JOB rows. Only the columns the function reads are sent to the processes, with the region columns swapped for one column of integer region codes, since text columns are slow to send. Only the columns it adds are sent back.
+
+    Parameters:
+    func (function): The calc function. It's called as func(partition, region_cols=region_cols, **kwargs).
+    data (pandas.DataFrame): A long format table.
+    region_cols (list of str): Column(s) that uniquely identify each region for each day.
+    n_jobs (int): The number of processes to use. -1 uses all CPUs.
+    same_rows (bool): Whether func returns the rows it's given in the same order. Otherwise, func must return a subset of the rows sorted by date, then region, like calc_days_since_min_count.
+    **kwargs: Other arguments to pass to func.
+
+    Returns:
+    pandas.DataFrame: The stitched results.
+    """
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, data.shape[0] // _MIN_ROWS_PER_JOB)
+
+    # The columns func reads are the region and date columns, and the data columns it was passed. If any are missing, let func raise the usual error about it.
+    data_cols = list(dict.fromkeys(kwargs.get("data_cols", []) + ([kwargs["data_col"]] if "data_col" in kwargs else [])))
+    if not set(region_cols + ["date"] + data_cols).issubset(data.columns):
+        return func(data, region_cols=region_cols, **kwargs)
+
+    # Split the regions, in order, into partitions with about the same number of rows each
+    codes = _key_codes(data, region_cols, sort=True)
+    region_sizes = np.bincount(codes)
+    rows_before_region = np.cumsum(region_sizes) - region_sizes
+    region_partition = rows_before_region * n_jobs // max(codes.size, 1)
+    row_partition = region_partition[codes]
+    partitions = [np.flatnonzero(row_partition == i) for i in np.unique(region_partition)]
+
+    if len(partitions) < 2:
+        return func(data, region_cols=region_cols, **kwargs) # Not enough regions to split up
+
+    # Send the region codes instead of the region columns. They sort the same way, and give missing regions their own code, so func groups and orders the rows the same.
+    code_col = "region_code"
+    while code_col in data_cols:
+        code_col = "_" + code_col
+    slim = pd.DataFrame({code_col: codes, "date": data["date"].values}) # Labelled with the row positions, so we can tell where the results go
+    for col in data_cols:
+        slim[col] = data[col].values
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=len(partitions)) as executor:
+        futures = [executor.submit(func, slim.take(positions), region_cols=[code_col], **kwargs) for positions in partitions]
+        results = [future.result() for future in futures]
+
+    out = pd.concat(results)
+    if same_rows:
+        # Put the rows back where they came from
+        order = np.empty(codes.size, dtype="int64")
+        order[np.concatenate(partitions)] = np.arange(codes.size)
+        out = out.take(order)
+    else:
+        # Sort by date, then region, across the partitions
+        out = out.take(np.lexsort((out[code_col].values, out["date"].values)))
+        data = data.take(out.index.values)
+
+    # Add the calculated columns to the full rows
+    new_cols = [col for col in out.columns if col not in slim.columns]
+    return data.assign(**{col: out[col].values for col in new_cols})
+
+def _rolling_stats(data, data_cols, region_cols, windows, stats, center):
+    """Calculate rolling statistics within each region, for several data columns and window sizes at once.
+
+    Parameters:
+    data (pandas.DataFrame): A long format table.
+    data_cols (list of str): The data columns to calculate the statistics for.
+    region_cols (list of str): Column(s) that uniquely identify each region for each day.
+    windows (list of int): The window sizes, in days.
+    stats (list of str): The statistics to calculate. Any of "mean", "sum", "min", or "max".
+    center (bool): Whether to center the window on each value.
+
+    Returns:
+    dict: Maps each (stat, window) tuple to a 2-D array with a column for each of data_cols, in the table's row order.
+    """
+    # Make sure that the data_cols columns all exist
+    not_in = [col for col in data_cols if not col in data.columns]
+    if len(not_in) > 0:
+        raise ParameterError(f"The dataframe you passed does not contain all of the data types you passed to the data_cols parameter. These are the missing columns:\n{not_in}\n\nYour dataframe's columns are:\n{data.columns}")
+
+    # Sort the rows by region, then date, so each region's days are contiguous. If the table is already sorted by date, a stable sort by region does that.
+    codes = _key_codes(data, region_cols)
+    if _is_sorted(data["date"].values):
+        order = np.argsort(codes, kind="stable")
+    else:
+        order = np.lexsort((data["date"].values, codes))
+    sorted_codes = codes[order]
+
+    # Check that the provided region_cols uniquely identify each row for each date
+    if _has_duplicate_keys(sorted_codes, data["date"].values[order]):
+        raise ParameterError(f"The region_cols you passed do not uniquely identify each row for each day. You passed {region_cols}.")
+
+    # Calculate every statistic for all data_cols at once, with windows clipped at region boundaries
+    rolled = _group_rolling(data[data_cols].values[order], sorted_codes, windows=windows, stats=stats, center=center)
+
+    # Put the results back in the original row order
+    for key, sorted_result in rolled.items():
+        result = np.empty_like(sorted_result)
+        result[order] = sorted_result
+        rolled[key] = result
+
+    return rolled
+
+def _extend_calculation(previous, new_data, recalc, lookback_days, update_days):
+    """Extend the result of a calc function with newly added days, by only recalculating the days the new ones can affect. The calculation only covers the new days and the window before them, but the returned table is a new table with all of previous's rows, so appending still copies previous once.
+
+    Parameters:
+    previous (pandas.DataFrame): A long format table the calc function already returned.
+    new_data (pandas.DataFrame): The newly added days, in long format, without the calculated columns.
+    recalc (function): Runs the calc function on a table.
+    lookback_days (int): How many days before the first new day the calculation needs to see.
+    update_days (int): How many days before the first new day already have calculated values that the new days change.
+
+    Returns:
+    pandas.DataFrame: previous, with any changed values updated, and the new days appended.
+    """
+    if "date" not in previous.columns or "date" not in new_data.columns:
+        raise ParameterError("Extending a previous calculation only works with long format tables.")
+
+    not_in = [col for col in new_data.columns if col not in previous.columns]
+    if len(not_in) > 0:
+        raise ParameterError(f"The new data has columns that the previous table doesn't. These are the extra columns:\n{not_in}\n\nThe previous table's columns are:\n{previous.columns}")
+
+    # Find the last few days in the previous table. When its rows are in date order, as they are for tables from our getters with each set of new days appended, they're a slice off the end that we find with a binary search.
+    first_new_day = new_data["date"].min()
+    lookback_start = (first_new_day - pd.Timedelta(days=lookback_days)).to_datetime64()
+    prev_dates = previous["date"].values
+    if (prev_dates[1:] >= prev_dates[:-1]).all():
+        tail_positions = np.arange(np.searchsorted(prev_dates, lookback_start, side="left"), prev_dates.size)
+    else:
+        tail_positions = np.flatnonzero(prev_dates >= lookback_start)
+    tail = previous.take(tail_positions)[new_data.columns]
+
+    # Recalculate them along with the new days
+    recalculated = recalc(pd.concat([tail, new_data], ignore_index=True))
+
+    calc_cols = [col for col in recalculated.columns if col not in new_data.columns]
+    not_in = [col for col in calc_cols if col not in previous.columns]
+    if len(not_in) > 0:
+        raise ParameterError(f"The previous table doesn't have the calculated columns {not_in}. Pass a table the same calc function returned, with the same parameters.")
+
+    new_rows = recalculated.iloc[tail.shape[0]:][previous.columns]
+    out = pd.concat([previous, new_rows], ignore_index=True)
+
+    # Update the days from previous whose values changed, in the new table so previous isn't copied twice
+    if update_days > 0:
+        update = prev_dates[tail_positions] >= (first_new_day - pd.Timedelta(days=update_days)).to_datetime64()
+        calc_positions = [out.columns.get_loc(col) for col in calc_cols]
+        out.iloc[tail_positions[update], calc_positions] = recalculated[calc_cols].values[np.flatnonzero(update)]
+
+    return out
@@ -0,0 +1,282 @@
+#   Copyright 2018 Samuel Payne sam_payne@byu.edu
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#       http://www.apache.org/licenses/LICENSE-2.0
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Keep every version of the data files we download, so tables can be rebuilt as they were at an earlier time. For example:
+
+    covid19pandas.enable_snapshots()
+    covid19pandas.get_data_jhu(as_of="2020-05-01")
+
+For more help, see our tutorials at <https://github.com/PayneLab/covid19pandas/tree/master/docs>.
+"""
+
+import pandas as pd
+import os
+import datetime
+import hashlib
+import json
+import lzma
+import threading
+
+from .exceptions import FileDoesNotExistError, ParameterError
+
+_store = None # The SnapshotStore that downloads are saved to, if snapshots are enabled
+_LZMA_PRESET = 0 # The fastest preset. Higher ones make CSV files only a few percent smaller, and take minutes for the largest files.
+
+def enable_snapshots(directory=None):
+    """Start saving a snapshot of each data file we download, and allow getting tables as they were at an earlier time with the as_of parameter of get_data_jhu and get_data_nyt. Stays on until disable_snapshots is called or Python exits. Snapshots saved in earlier sessions stay available, as long as you enable the same directory.
+
+    Parameters:
+    directory (str, optional): The directory to keep the snapshots in. Default None uses the "snapshots" folder in the package's data directory.
+
+    Returns:
+    SnapshotStore: The store the snapshots are kept in.
+    """
+    global _store
+    if directory is None:
+        path_here = os.path.abspath(os.path.dirname(__file__))
+        directory = os.path.join(path_here, "data", "snapshots")
+
+    _store = SnapshotStore(directory)
+    return _store
+
+def disable_snapshots():
+    """Stop saving snapshots of downloaded data files. Snapshots already saved are kept.
+
+    Returns:
+    None
+    """
+    global _store
+    _store = None
+
+class SnapshotStore:
+    """A directory of versions of data files. Each file's content is stored once, under the hash of its content, so a download that didn't change anything only adds a line to the history. New content is stored as a compressed list of differences from an earlier full version of the file, called its base. Since most lines in a new version of a time series file are either unchanged or have a day's value added to the end, the differences are much smaller than the file. When they stop being much smaller, the new version is stored in full, and becomes the base for later versions. Rebuilding any version takes at most reading its base and applying one set of differences.
+
+    Parameters:
+    directory (str): The directory to keep the snapshots in. Created if it doesn't exist.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._objects_dir = os.path.join(directory, "objects")
+        self._history_path = os.path.join(directory, "history.jsonl")
+        os.makedirs(self._objects_dir, exist_ok=True)
+
+    def add(self, source, file_name, path):
+        """Save a snapshot of a data file, as the version current from now on.
+
+        Parameters:
+        source (str): The folder in the data directory the file is in, e.g. "jhu".
+        file_name (str): The name of the file.
+        path (str): The path to the file to save.
+
+        Returns:
+        str: The hash of the file's content, which identifies the version.
+        """
+        with open(path, "rb") as data_file:
+            content = data_file.read()
+        content_hash = hashlib.sha256(content).hexdigest()
+
+        if self._object_path(content_hash) is None:
+            self._save_object(source, file_name, content, content_hash)
+
+        # Record when this content became current. Appends of one short line don't get mixed up between processes.
+        record = {"source": source, "file_name": file_name, "time": datetime.datetime.now().isoformat(), "hash": content_hash}
+        with open(self._history_path, "a") as history_file:
+            history_file.write(json.dumps(record) + "\n")
+
+        return content_hash
+
+    def get(self, source, file_name, as_of):
+        """Get the content of a data file as it was at a certain time.
+
+        Parameters:
+        source (str): The folder in the data directory the file is in, e.g. "jhu".
+        file_name (str): The name of the file.
+        as_of (str or datetime.datetime or datetime.date): The time to get the file as of, in local time. Gets the latest version saved at or before it. Strings are parsed by pandas.to_datetime, e.g. "2020-05-01" or "2020-05-01 18:00". A date means the start of that day.
+
+        Returns:
+        bytes: The file's content.
+        """
+        history = self.history(source, file_name)
+        as_of = pd.to_datetime(as_of)
+        history = history[history["time"] <= as_of]
+        if history.shape[0] == 0:
+            raise FileDoesNotExistError(f"There is no snapshot of {file_name} from at or before {as_of}. Snapshots are only saved for downloads made while snapshots are enabled.")
+
+        return self._read_object(history["hash"].iloc[-1])
+
+    def history(self, source=None, file_name=None):
+        """List the versions that have been saved.
+
+        Parameters:
+        source (str, optional): Only list versions of files in this folder of the data directory, e.g. "jhu". Default None lists all sources.
+        file_name (str, optional): Only list versions of the file with this name. Default None lists all files.
+
+        Returns:
+        pandas.DataFrame: One row for each time a file was saved, with the columns "source", "file_name", "time", and "hash", sorted by time.
+        """
+        records = []
+        if os.path.isfile(self._history_path):
+            with open(self._history_path) as history_file:
+                records = [json.loads(line) for line in history_file if line.strip()]
+
+        history = pd.DataFrame(records, columns=["source", "file_name", "time", "hash"])
+        history["time"] = pd.to_datetime(history["time"])
+        if source is not None:
+            history = history[history["source"] == source]
+        if file_name is not None:
+            history = history[history["file_name"] == file_name]
+
+        return history.sort_values(by="time", kind="stable").reset_index(drop=True)
+
+    # Helper methods
+    def _save_object(self, source, file_name, content, content_hash):
+        """Store new content, either as differences from the base of the file's latest version, or in full, e.g. if that base is missing."""
+        data = None
+        history = self.history(source, file_name)
+        base_hash = self._base_hash(history["hash"].iloc[-1]) if history.shape[0] > 0 else None
+        if base_hash is not None:
+            base_content = self._read_object(base_hash)
+            delta = json.dumps({"base": base_hash, "ops": _line_delta(base_content, content)}).encode()
+            delta = lzma.compress(delta, preset=_LZMA_PRESET)
+
+            # A compressed CSV file is usually about a tenth of its size, so this keeps the differences under about half the size of the compressed file, without taking the time to compress it
+            if len(delta) < len(content) // 20:
+                data = delta
+                name = f"{content_hash}.delta.xz"
+
+        if data is None:
+            data = lzma.compress(content, preset=_LZMA_PRESET)
+            name = f"{content_hash}.xz"
+
+        # Write under a temporary name and rename, so other processes and threads never see a partial object
+        path = os.path.join(self._objects_dir, name)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as object_file:
+            object_file.write(data)
+        os.replace(temp_path, path)
+
+    def _object_path(self, content_hash):
+        """Find the stored object for some content, or None if it isn't stored."""
+        for name in [f"{content_hash}.xz", f"{content_hash}.delta.xz"]:
+            path = os.path.join(self._objects_dir, name)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def _base_hash(self, content_hash):
+        """Get the hash of the full version that some content is stored relative to, or its own hash if it's stored in full. None if the content or its base is missing from the objects directory, e.g. if it was deleted."""
+        path = self._object_path(content_hash)
+        if path is None:
+            return None
+        if path.endswith(".delta.xz"):
+            with open(path, "rb") as object_file:
+                base_hash = json.loads(lzma.decompress(object_file.read()))["base"]
+            return base_hash if self._object_path(base_hash) is not None else None
+        return content_hash
+
+    def _read_object(self, content_hash):
+        """Rebuild some content from its stored object."""
+        path = self._object_path(content_hash)
+        if path is None:
+            raise FileDoesNotExistError(f"The snapshot with hash {content_hash} is missing from {self._objects_dir}.")
+
+        with open(path, "rb") as object_file:
+            data = lzma.decompress(object_file.read())
+
+        if path.endswith(".delta.xz"):
+            delta = json.loads(data)
+            data = _apply_line_delta(self._read_object(delta["base"]), delta["ops"])
+        return data
+
+# Helper functions
+def _line_delta(base, new):
+    """Describe new content as a list of operations on the lines of base content. Lines are split on newlines, and decoded as latin-1 so any bytes survive the round trip through JSON.
+
+    Parameters:
+    base (bytes): The base content.
+    new (bytes): The new content.
+
+    Returns:
+    list of list: The operations. ["c", start, count] copies count lines of base starting at start. ["a", line, suffix] copies one line of base with text added to its end, e.g. a new day's value. ["l", text] adds a line that isn't in base.
+    """
+    base_lines = base.decode("latin-1").split("\n")
+    new_lines = new.decode("latin-1").split("\n")
+
+    line_positions = {}
+    for i, line in enumerate(base_lines):
+        line_positions.setdefault(line, i)
+
+    ops = []
+    next_base = 0 # The base line that lines up with the current new line, if the lines are in the same order
+    for line in new_lines:
+        if next_base < len(base_lines) and base_lines[next_base] == line:
+            i = next_base # Prefer the line in the same spot, so runs of copied lines stay together
+        else:
+            i = line_positions.get(line)
+
+        if i is not None:
+            last = ops[-1] if len(ops) > 0 else None
+            if last is not None and last[0] == "c" and last[1] + last[2] == i:
+                last[2] += 1
+            else:
+                ops.append(["c", i, 1])
+            next_base = i + 1
+        elif next_base < len(base_lines) and line.startswith(base_lines[next_base]):
+            ops.append(["a", next_base, line[len(base_lines[next_base]):]])
+            next_base += 1
+        else:
+            ops.append(["l", line])
+            next_base += 1 # Assume it replaced the base line in the same spot
+
+    return ops
+
+def _apply_line_delta(base, ops):
+    """Rebuild content from base content and the operations from _line_delta.
+
+    Parameters:
+    base (bytes): The base content.
+    ops (list of list): The operations.
+
+    Returns:
+    bytes: The rebuilt content.
+    """
+    base_lines = base.decode("latin-1").split("\n")
+
+    lines = []
+    for op in ops:
+        if op[0] == "c":
+            lines.extend(base_lines[op[1]:op[1] + op[2]])
+        elif op[0] == "a":
+            lines.append(base_lines[op[1]] + op[2])
+        else:
+            lines.append(op[1])
+
+    return "\n".join(lines).encode("latin-1")
+
+def _get_store():
+    """Get the store snapshots are being saved to.
+
+    Returns:
+    SnapshotStore: The store, or None if snapshots aren't enabled.
+    """
+    return _store
+
+def _require_store():
+    """Get the store snapshots are being saved to, for a getter called with as_of.
+
+    Returns:
+    SnapshotStore: The store.
+    """
+    if _store is None:
+        raise ParameterError("Snapshots aren't enabled, so there are no earlier versions to get. Call enable_snapshots, with the same directory as when the snapshots were saved, before passing as_of.")
+    return _store
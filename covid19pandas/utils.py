@@ -14,37 +14,41 @@ import numpy as np
 import os
 import warnings
 import datetime
+import json
+import shutil
+import tempfile
 from .exceptions import ParameterError
 
-def _wide_to_long(data, data_type):
+def _wide_to_long(data, data_type, categorical_ids=False):
     """Convert a dataframe from wide format to long format.
 
     Parameters:
     data (pandas.DataFrame): The dataframe to convert. Must have dates in at least some of the columns.
     data_type (str): The name of the data type the table contains.
+    categorical_ids (bool, optional): Whether to make the text id columns categorical. Each id value is repeated once for every date in the long format table, so this saves a lot of memory on big tables. Default False.
 
     Returns:
-    pandas.DataFrame: The dataframe in long format.
+    pandas.DataFrame: The dataframe in long format, with the date column first, then the id columns, then the counts. The rows are ordered by date column, in the order of the wide table's columns, then by row, in the order of the wide table's rows.
     """
-    if not data.columns.map(lambda x: issubclass(type(x), datetime.date)).any():
+    is_date = [issubclass(type(col), datetime.date) for col in data.columns]
+    if not any(is_date):
         raise ParameterError("Invalid table format. Must either have a 'date' column, or have dates as the columns.")
 
-    id_cols = [col for col in data.columns if not issubclass(type(col), datetime.date)]
-    data = pd.melt(data, id_vars=id_cols, var_name="date", value_name=data_type)
+    id_cols = [col for col, col_is_date in zip(data.columns, is_date) if not col_is_date]
+    date_cols = [col for col, col_is_date in zip(data.columns, is_date) if col_is_date]
+    n_rows = data.shape[0]
+    n_dates = len(date_cols)
 
-    id_cols.append("date")
-    data = data.set_index(id_cols)
+    ids = data[id_cols]
+    if categorical_ids:
+        ids = ids.astype({col: "category" for col in id_cols if ids[col].dtype == object})
 
-    # Reorder index so date is first
-    idx_names = list(data.index.names)
-    idx_names.remove("date")
-    new_idx_name_order = ["date"] + idx_names
-    data = data.reorder_levels(new_idx_name_order)
+    # Each date repeats once per row, the ids tile once per date, and the transposed block of counts ravels in that same order
+    dates = pd.DataFrame({"date": np.repeat(pd.DatetimeIndex(date_cols).values, n_rows)})
+    ids = ids.take(np.tile(np.arange(n_rows), n_dates)).reset_index(drop=True)
+    counts = pd.DataFrame({data_type: data[date_cols].to_numpy().T.ravel()})
 
-    # Convert index into just columns
-    data = data.reset_index()
-
-    return data
+    return pd.concat([dates, ids, counts], axis=1)
 
 def _long_to_wide(data, data_type, date_col="date", other_data_types_to_drop=[], sort_by=None):
     """Convert a dataframe from long format to wide format.
@@ -57,32 +61,450 @@ def _long_to_wide(data, data_type, date_col="date", other_data_types_to_drop=[],
     sort_by (str, optional): The name of one of the indexing columns to sort the dataframe by before returning it. Default of None causes no extra sorting to be performed.
 
     Returns:
-    pandas.DataFrame: The dataframe in wide format.
+    pandas.DataFrame: The dataframe in wide format, with the id columns first, then one column for each date, in date order. Rows are sorted by the id columns, in table order, with NaNs first. If you passed sort_by, they're sorted by that column first. Days missing for a region get a count of 0.
     """
     # If there are multiple data type columns, only keep the one specified
     cols_to_drop = [col for col in other_data_types_to_drop if col != data_type and col in data.columns]
     data = data.drop(columns=cols_to_drop)
 
-    # Spread the table, a la tidyr
-    id_cols = [col for col in data.columns if col != data_type]
-    data = data.set_index(id_cols) # Putting these in the index keeps them from being spread
-    data = data.unstack(level=date_col, fill_value=0)
-    data.columns = data.columns.droplevel(0)
-    data.columns.name = None
-    if sort_by is not None:
-        data = data.sort_index(level=sort_by)
-    data = data.reset_index() # Take the saved columns out of the index
+    id_cols = [col for col in data.columns if col != data_type and col != date_col]
+
+    # Find each unique combination of id values, and give it a row in the wide table
+    row_codes = _key_codes(data, id_cols)
+    first_rows = _first_positions(row_codes)
+
+    # Order the wide table's rows by the sorted codes of each id column, where NaNs get the lowest code
+    sort_cols = id_cols if sort_by is None else [sort_by] + [col for col in id_cols if col != sort_by]
+    sort_keys = [pd.factorize(data[col].take(first_rows), sort=True)[0] for col in reversed(sort_cols)]
+    row_order = np.lexsort(sort_keys) if len(sort_keys) > 0 else np.arange(first_rows.size)
+    row_rank = np.empty(row_order.size, dtype="int64")
+    row_rank[row_order] = np.arange(row_order.size)
+
+    date_codes, dates = pd.factorize(data[date_col], sort=True)
+    if np.unique(row_rank[row_codes] * dates.size + date_codes).size < data.shape[0]:
+        raise ParameterError("The table you passed has more than one row for some combinations of id columns and date, so it can't be spread into wide format.")
+
+    # Spread the counts into a block with one row per id combination and one column per date
+    values = data[data_type].to_numpy()
+    block = np.zeros((row_order.size, dates.size), dtype=values.dtype)
+    block[row_rank[row_codes], date_codes] = values
+
+    ids = data[id_cols].take(first_rows[row_order]).reset_index(drop=True)
+    return pd.concat([ids, pd.DataFrame(block, columns=dates)], axis=1)
+
+def _default_region_cols(data):
+    """Get the columns that uniquely identify each region in a table from one of our getters.
+
+    Parameters:
+    data (pandas.DataFrame): A table from get_data_jhu or get_data_nyt.
+
+    Returns:
+    list of str: The region columns.
+    """
+    if {"Combined_Key"}.issubset(data.columns): # JHU U.S. table
+        return ["Combined_Key"]
+    elif {"Province/State", "Country/Region"}.issubset(data.columns): # JHU global table
+        return ["Country/Region", "Province/State"]
+    elif {"county", "state"}.issubset(data.columns): # NYT state and county table
+        return ["county", "state"]
+    elif {"state"}.issubset(data.columns): # NYT state only table. Note that this column also exists in the state and county table, so we do the check after we've determined it's not that table.
+        return ["state"]
+    else:
+        raise ParameterError("The dataframe you passed does not contain any of the standard region columns, so you need to specify which columns to use. Standard sets of region columns are: \n\n{'Combined_Key'}\n{'Province/State', 'Country/Region'}\n{'county', 'state'}\n{'state'}\n\n" + f"Your dataframe's columns are:\n{data.columns}")
+
+def _default_rollup_levels(data):
+    """Get the region columns above the finest level of the region hierarchy in a table from one of our getters, from the finest to the coarsest.
+
+    Parameters:
+    data (pandas.DataFrame): A table from get_data_jhu or get_data_nyt.
+
+    Returns:
+    list of str: The region columns to sum counts at.
+    """
+    if {"Admin2", "Province_State", "Country_Region"}.issubset(data.columns): # JHU U.S. table. Rows are counties, identified by UID or Combined_Key.
+        return ["Province_State", "Country_Region"]
+    elif {"Province/State", "Country/Region"}.issubset(data.columns): # JHU global table
+        return ["Country/Region"]
+    elif {"county", "state"}.issubset(data.columns): # NYT state and county table
+        return ["state"]
+    else:
+        raise ParameterError("The dataframe you passed does not have a standard region hierarchy, so you need to specify which region columns to sum counts at. Standard hierarchies are: \n\n{'Admin2', 'Province_State', 'Country_Region'}\n{'Province/State', 'Country/Region'}\n{'county', 'state'}\n\n" + f"Your dataframe's columns are:\n{data.columns}")
+
+def _is_sorted(values):
+    """Check whether an array is in ascending order, e.g. a long format table's dates, so a stable sort on another key keeps it in order within each group.
+
+    Parameters:
+    values (numpy.ndarray): The array.
+
+    Returns:
+    bool: Whether each value is at least the one before it.
+    """
+    return bool((values[1:] >= values[:-1]).all())
+
+def _save_shared(data, directory):
+    """Save a table's columns as files that any process on this machine can map with _load_shared. Numeric and date columns are saved as they are, and other columns as categorical codes. The files are written to a temporary directory that's then renamed into place, so other processes never see a partly written table. If another process saves the same table first, its copy is kept.
+
+    Parameters:
+    data (pandas.DataFrame): The table to save. Its column labels must be strings or dates.
+    directory (str): The directory to save the table in.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    temp_directory = tempfile.mkdtemp(prefix=os.path.basename(directory) + "_tmp_", dir=parent)
+
+    try:
+        columns = []
+        for i, label in enumerate(data.columns):
+            if isinstance(label, str):
+                column = {"label": label}
+            elif issubclass(type(label), datetime.date):
+                column = {"date_label": pd.Timestamp(label).isoformat()}
+            else:
+                raise ParameterError(f"Only tables with strings or dates as column labels can be shared. Column {i} is labeled {label}.")
+            column.update(_save_shared_values(data.iloc[:, i], os.path.join(temp_directory, f"column_{i}")))
+            columns.append(column)
+
+        if isinstance(data.index, pd.RangeIndex) and data.index.start == 0 and data.index.step == 1:
+            index = None
+        else:
+            index = _save_shared_values(data.index.to_series(), os.path.join(temp_directory, "index"))
+
+        info = {"n_rows": data.shape[0], "columns": columns, "index": index}
+        with open(os.path.join(temp_directory, "table.json"), "w") as info_file:
+            json.dump(info, info_file)
 
+        os.rename(temp_directory, directory)
+    except OSError:
+        if not os.path.isdir(directory):
+            raise
+    finally:
+        shutil.rmtree(temp_directory, ignore_errors=True) # Only still there if another process saved the table first, or something went wrong
+
+def _save_shared_values(values, path):
+    """Save one column for _save_shared.
+
+    Parameters:
+    values (pandas.Series): The column.
+    path (str): The path to save it at, without a file extension.
+
+    Returns:
+    dict: What _load_shared_values needs to know to load it.
+    """
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in "biufmM":
+        np.save(path + ".npy", values.to_numpy(), allow_pickle=False)
+        return {"kind": "array"}
+
+    values = values.astype("category")
+    categories = values.cat.categories.to_numpy()
+    if categories.dtype == object:
+        categories = categories.astype(str) # Fixed width strings, so they can be saved without pickling
+    np.save(path + ".npy", values.cat.codes.to_numpy(), allow_pickle=False)
+    np.save(path + "_categories.npy", categories, allow_pickle=False)
+    return {"kind": "category", "ordered": bool(values.cat.ordered)}
+
+def _load_shared(directory):
+    """Map a table saved by _save_shared. The table's arrays are views of the saved files, so every process that maps them shares one copy in memory. Changes to the table are private to this process.
+
+    Parameters:
+    directory (str): The directory the table was saved in.
+
+    Returns:
+    pandas.DataFrame: The table.
+    """
+    with open(os.path.join(directory, "table.json")) as info_file:
+        info = json.load(info_file)
+
+    columns = {i: _load_shared_values(column, os.path.join(directory, f"column_{i}")) for i, column in enumerate(info["columns"])}
+    if info["index"] is None:
+        index = pd.RangeIndex(info["n_rows"])
+    else:
+        index = pd.Index(_load_shared_values(info["index"], os.path.join(directory, "index")))
+
+    data = pd.DataFrame(columns, index=index, copy=False)
+    data.columns = [column["label"] if "label" in column else pd.Timestamp(column["date_label"]) for column in info["columns"]]
     return data
 
-def _offset_subtract(col):
-    """Takes a column, creates a copy with all values moved down by one (last value dropped, zero inserted at start), then subtracts the copy from the original and returns the result. For use with dataframe.groupby(...).transform().
+def _load_shared_values(column, path):
+    """Map one column saved by _save_shared_values.
+
+    Parameters:
+    column (dict): What _save_shared_values returned for the column.
+    path (str): The path it was saved at, without a file extension.
+
+    Returns:
+    numpy.ndarray or pandas.Categorical: The column's values.
+    """
+    values = np.load(path + ".npy", mmap_mode="c", allow_pickle=False) # Copy on write
+    if column["kind"] == "category":
+        categories = np.load(path + "_categories.npy", allow_pickle=False)
+        values = pd.Categorical.from_codes(values, categories=categories, ordered=column["ordered"])
+    return values
+
+def _key_codes(data, key_cols, sort=False):
+    """Assign an integer code to each unique combination of values in the key columns, e.g. region columns, or a date column plus region columns. NaNs get a code of their own instead of being dropped, so rows with a NaN in a key column still group together and match each other. This lets us group and join on keys with NaNs without filling them first.
+
+    Parameters:
+    data (pandas.DataFrame): The table to get key codes for.
+    key_cols (list of str): The columns that make up the key.
+    sort (bool, optional): Whether to number the codes so they sort the same way the key values would with DataFrame.sort_values, with NaNs last. Otherwise, codes are numbered in order of first appearance. Default False.
+
+    Returns:
+    numpy.ndarray: An int64 array with one code per row.
+    """
+    codes = np.zeros(data.shape[0], dtype="int64")
+    for key_col in key_cols:
+        col_codes, uniques = pd.factorize(data[key_col], sort=sort) # NaNs get the code -1
+        col_codes = np.where(col_codes == -1, len(uniques), col_codes) # Reserve the code after all the real values for NaN
+        codes, _ = pd.factorize(codes * (len(uniques) + 1) + col_codes, sort=sort) # Renumber to keep the codes small
+        codes = codes.astype("int64")
+    return codes
+
+def _first_positions(codes):
+    """Find the position of the first row with each code.
+
+    Parameters:
+    codes (numpy.ndarray): Codes numbered from 0, e.g. from _key_codes.
+
+    Returns:
+    numpy.ndarray: The position of the first row with each code, indexed by code.
+    """
+    first = np.empty(codes.max() + 1 if codes.size > 0 else 0, dtype="int64")
+    first[codes[::-1]] = np.arange(codes.size)[::-1] # When a code repeats, the last assignment wins, which is its first row since we go in reverse
+    return first
+
+def _group_sum(data, group_cols):
+    """Sum all the non-grouping columns in a table for each unique combination of values in the grouping columns. NaNs in the grouping columns are grouped together instead of dropped.
+
+    Parameters:
+    data (pandas.DataFrame): The table to sum.
+    group_cols (list of str): The columns to group by.
+
+    Returns:
+    pandas.DataFrame: The grouping columns followed by the sums, with one row per group, sorted by the grouping columns.
+    """
+    codes = _key_codes(data, group_cols, sort=True)
+    value_cols = [col for col in data.columns if col not in group_cols]
+
+    sums = data[value_cols].groupby(codes, sort=True).sum()
+    keys = data[group_cols].take(_first_positions(codes))
+
+    return pd.concat([keys.reset_index(drop=True), sums.reset_index(drop=True)], axis=1)
+
+def _diff_values(old, new, key_cols, col_name):
+    """Find the values that differ between two versions of a table. Rows are matched on the key columns, and values on the column labels. Rows or columns only in one version count as changed, with NaN for the version they're missing from. NaNs equal each other. If a key repeats within a version, its rows are matched in order.
+
+    Parameters:
+    old (pandas.DataFrame): The old version of the table. All columns besides key_cols must be numeric.
+    new (pandas.DataFrame): The new version of the table.
+    key_cols (list of str): The columns that identify each row.
+    col_name (str): The name for the column that lists the label of the column each changed value is in, e.g. "date".
+
+    Returns:
+    pandas.DataFrame: One row for each changed value, with the key columns, col_name, "old", and "new", ordered by row of the old version then the new one, then by column.
+    """
+    value_cols = [col for col in old.columns if col not in key_cols]
+    value_cols += [col for col in new.columns if col not in key_cols and col not in value_cols]
+
+    # Give each key the same code in both versions, and number repeats of a key within each version
+    keys = pd.concat([old[key_cols], new[key_cols]], ignore_index=True)
+    codes = _key_codes(keys, key_cols)
+    n_old = old.shape[0]
+    repeats = np.concatenate([_occurrence_numbers(codes[:n_old]), _occurrence_numbers(codes[n_old:])])
+    codes = _key_codes(pd.DataFrame({"code": codes, "repeat": repeats}), ["code", "repeat"])
+    n_keys = codes.max() + 1 if codes.size > 0 else 0
+
+    # Lay both versions out on the same grid of keys by columns. Anything missing from a version is NaN.
+    blocks = []
+    for version, version_codes in [(old, codes[:n_old]), (new, codes[n_old:])]:
+        block = np.full((n_keys, len(value_cols)), np.nan)
+        block[version_codes] = version.reindex(columns=value_cols).to_numpy(dtype=float, na_value=np.nan)
+        blocks.append(block)
+    old_block, new_block = blocks
+
+    changed = (old_block != new_block) & ~(np.isnan(old_block) & np.isnan(new_block))
+    rows, cols = np.nonzero(changed)
+
+    diff = keys.take(_first_positions(codes)[rows]).reset_index(drop=True)
+    diff[col_name] = np.array(value_cols, dtype=object)[cols] if len(value_cols) > 0 else []
+    diff["old"] = old_block[rows, cols]
+    diff["new"] = new_block[rows, cols]
+    return diff
+
+def _occurrence_numbers(codes):
+    """Number the rows with each code in order, starting from 0, like pandas groupby().cumcount(), without needing them to be sorted.
+
+    Parameters:
+    codes (numpy.ndarray): The code for each row.
+
+    Returns:
+    numpy.ndarray: How many earlier rows have the same code as each row.
+    """
+    order = np.argsort(codes, kind="stable")
+    numbers = np.empty(codes.size, dtype="int64")
+    numbers[order] = _group_cumcount(codes[order])
+    return numbers
+
+def _group_bounds(group_codes):
+    """For each row in an array sorted by group, find the first and one-past-last row of the group it belongs to.
+
+    Parameters:
+    group_codes (numpy.ndarray): The group code for each row. Rows must already be sorted so that each group is contiguous.
+
+    Returns:
+    numpy.ndarray: The first row of each row's group (inclusive).
+    numpy.ndarray: The last row of each row's group (exclusive).
+    """
+    n = group_codes.size
+    positions = np.arange(n)
+
+    is_start = np.ones(n, dtype=bool)
+    is_start[1:] = group_codes[1:] != group_codes[:-1]
+    group_start = np.maximum.accumulate(np.where(is_start, positions, 0))
+
+    is_end = np.ones(n, dtype=bool)
+    is_end[:-1] = is_start[1:]
+    group_end = np.minimum.accumulate(np.where(is_end, positions + 1, n)[::-1])[::-1]
 
-    col (pandas.Series): The column to transform.
+    return group_start, group_end
+
+def _group_cumcount(group_codes):
+    """Number each row within its group, starting from 0. Equivalent to pandas groupby().cumcount() for rows already sorted by group.
+
+    Parameters:
+    group_codes (numpy.ndarray): The group code for each row. Rows must already be sorted so that each group is contiguous.
+
+    Returns:
+    numpy.ndarray: The position of each row within its group.
+    """
+    group_start, _ = _group_bounds(group_codes)
+    return np.arange(group_codes.size) - group_start
+
+def _has_duplicate_keys(group_codes, dates):
+    """Check whether any group has more than one row for the same date.
+
+    Parameters:
+    group_codes (numpy.ndarray): The group code for each row. Rows must already be sorted by group, then date.
+    dates (numpy.ndarray): The date for each row, in the same order.
+
+    Returns:
+    bool: Whether there are any duplicate (group, date) pairs.
+    """
+    return bool(((group_codes[1:] == group_codes[:-1]) & (dates[1:] == dates[:-1])).any())
+
+def _window_bounds(group_start, group_end, x, center):
+    """For each row in an array sorted by group, find the bounds of its x row window, clipped so the window never crosses into a neighboring group.
+
+    Parameters:
+    group_start (numpy.ndarray): The first row of each row's group, from _group_bounds.
+    group_end (numpy.ndarray): One past the last row of each row's group, from _group_bounds.
+    x (int): The window size, in rows.
+    center (bool): Whether to center the window on each row, instead of having the row at the right side of the window. Centering follows the pandas convention for even window sizes.
+
+    Returns:
+    numpy.ndarray: The first row in each window (inclusive).
+    numpy.ndarray: The last row in each window (exclusive).
+    """
+    positions = np.arange(group_start.size)
+
+    if center:
+        before = x // 2
+        after = (x - 1) // 2
+    else:
+        before = x - 1
+        after = 0
+
+    lo = np.maximum(positions - before, group_start)
+    hi = np.minimum(positions + after + 1, group_end)
+    return lo, hi
+
+def _group_rolling(values, group_codes, windows, stats, center=False):
+    """Calculate rolling statistics within each group, for several data columns and window sizes in one pass. Sums and means are taken from prefix sums, and mins and maxes from a sparse table, so no per-group Python work is done. NaNs are skipped, and a window with no non-NaN values gives NaN, matching pandas rolling with min_periods=1.
+
+    Parameters:
+    values (numpy.ndarray): A 2-D array with one column per data column. Rows must already be sorted by group, then by date.
+    group_codes (numpy.ndarray): The group code for each row, from _key_codes.
+    windows (list of int): The window sizes, in rows.
+    stats (list of str): The statistics to calculate. Any of "mean", "sum", "min", or "max".
+    center (bool, optional): Whether to center each window on its row. Default False.
 
     Returns:
-    pandas.Series: The transformed column.
+    dict: Maps each (stat, window) tuple to a 2-D float array the same shape as values.
     """
-    offset = col.values[:-1]
-    offset = np.insert(offset, 0, 0)
-    return col - offset
+    valid_stats = ("mean", "sum", "min", "max")
+    for stat in stats:
+        if stat not in valid_stats:
+            raise ParameterError(f"Invalid rolling statistic '{stat}'. Valid options are {valid_stats}.")
+    for window in windows:
+        if not isinstance(window, (int, np.integer)) or window < 1:
+            raise ParameterError(f"Rolling window sizes must be positive integers. You passed {window}.")
+
+    n, n_cols = values.shape
+    group_start, group_end = _group_bounds(group_codes)
+
+    # Count the non-NaN values in each window with prefix sums too, unless there aren't any NaNs, in which case it's just the window length
+    isnan = pd.isnull(values)
+    has_nans = isnan.any()
+    if has_nans:
+        counts = np.zeros((n + 1, n_cols), dtype="int64")
+        np.cumsum(~isnan, axis=0, out=counts[1:])
+
+    # Integer counts are summed as integers, so the prefix sums stay exact no matter how large the running total gets
+    if np.issubdtype(values.dtype, np.integer):
+        sum_dtype = "int64"
+        filled = values
+    elif has_nans:
+        sum_dtype = "float64"
+        filled = np.where(isnan, 0, values).astype("float64")
+    else:
+        sum_dtype = "float64"
+        filled = values.astype("float64")
+    prefix = np.zeros((n + 1, n_cols), dtype=sum_dtype)
+    np.cumsum(filled, axis=0, out=prefix[1:])
+
+    # Sparse table for mins and maxes: level k holds the min/max over the 2**k rows starting at each row
+    tables = {}
+    if "min" in stats or "max" in stats:
+        float_values = values.astype("float64")
+        n_levels = int(np.log2(max(windows))) + 1
+        for stat, reduce in (("min", np.fmin), ("max", np.fmax)):
+            if stat in stats:
+                levels = [float_values]
+                for k in range(1, n_levels):
+                    prev = levels[-1]
+                    step = 2 ** (k - 1)
+                    level = prev.copy()
+                    level[:n - step] = reduce(prev[:n - step], prev[step:])
+                    levels.append(level)
+                tables[stat] = np.stack(levels)
+
+    results = {}
+    for window in windows:
+        lo, hi = _window_bounds(group_start, group_end, window, center)
+        if has_nans:
+            window_counts = counts[hi] - counts[lo]
+            empty = window_counts == 0
+        else:
+            window_counts = (hi - lo)[:, np.newaxis]
+            empty = None
+
+        if "mean" in stats or "sum" in stats:
+            sums = (prefix[hi] - prefix[lo]).astype("float64")
+
+        for stat in stats:
+            if stat in ("mean", "sum"):
+                if stat == "mean":
+                    with np.errstate(invalid="ignore", divide="ignore"):
+                        result = sums / window_counts
+                else:
+                    result = sums.copy()
+            else:
+                level = np.log2(hi - lo).astype("int64")
+                table = tables[stat]
+                reduce = np.fmin if stat == "min" else np.fmax
+                result = reduce(table[level, lo], table[level, hi - 2 ** level])
+
+            if empty is not None:
+                result[empty] = np.nan
+            results[(stat, window)] = result
+
+    return results
@@ -35,6 +35,9 @@ setup(name='covid19pandas',
 	],
     data_files=[
     ],
+	entry_points={
+		'console_scripts': ['covid19pandas=covid19pandas.cli:main'],
+	},
 	classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Science/Research',
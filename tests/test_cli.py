@@ -0,0 +1,83 @@
+#   Copyright 2018 Samuel Payne sam_payne@byu.edu
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#       http://www.apache.org/licenses/LICENSE-2.0
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import covid19pandas as cod
+import covid19pandas.cli as codcli
+import covid19pandas.exceptions as codex
+from test_getters import _check_gotten, _copy_data_files
+
+import pytest
+import os
+import shutil
+
+@pytest.mark.filterwarnings("ignore::covid19pandas.exceptions.FileNotUpdatedWarning")
+class TestCli:
+
+    @classmethod
+    def setup_class(cls):
+        """Ensures that all data tables have been recently downloaded, so the tables can be built from them."""
+        cod.get_data_jhu(data_type="all", region="global", update=True)
+        cod.get_data_jhu(data_type="all", region="us", update=True)
+        cod.get_data_nyt(data_type="all", counties=False, update=True)
+        cod.get_data_nyt(data_type="all", counties=True, update=True)
+
+    def test_fetch(self, tmp_path, capsys, monkeypatch):
+        # Download into copies of the data files, from a stand in for the server that serves the files we have, except for any that are offline
+        files = [(source, file_name) for source, base_url, file_name in codcli._data_files()]
+        originals = {file_name: os.path.join(cod.getters._data_dir(), source, file_name) for source, file_name in files}
+        data_dir = _copy_data_files(tmp_path, monkeypatch, files)
+        monkeypatch.setattr(codcli, "_data_dir", lambda: data_dir)
+
+        offline = set()
+        def serve_file(url, download_path, cancel=None, timeout=None):
+            file_name = url.split("/")[-1]
+            if file_name in offline:
+                raise codex.NoInternetError("No internet.")
+            shutil.copyfile(originals[file_name], download_path)
+            return True
+        monkeypatch.setattr(cod.getters, "download_github_file", serve_file)
+
+        assert codcli.main(["fetch"]) == 0
+        out = capsys.readouterr().out
+        assert out.startswith("Downloaded 8 of 8 files")
+        assert out.count("\n") == 9 # A line for each file
+        assert "failed" not in out
+
+        # Files that fail are reported, and the rest are still downloaded
+        offline.add("us-counties.csv")
+        assert codcli.main(["fetch"]) == 1
+        out = capsys.readouterr().out
+        assert out.startswith("Downloaded 7 of 8 files")
+        assert out.count("\n") == 9
+        assert out.count("failed: No internet.") == 1 and "nyt/us-counties.csv" in out
+
+        with pytest.raises(SystemExit):
+            codcli.main(["fetch", "--jobs", "0"])
+
+    def test_build_tables(self, tmp_path, capsys):
+        codcli._build_tables(str(tmp_path), ["long", "wide"], jobs=1)
+        out = capsys.readouterr().out
+        assert out.startswith("Built 13 tables")
+        assert len(list(tmp_path.iterdir())) == 13
+
+        # The getters map the built tables instead of building them again
+        getters = [
+            lambda **kwargs: cod.get_data_nyt(format="wide", data_type="deaths", counties=True, update=False, **kwargs),
+            lambda **kwargs: cod.get_data_jhu(format="long", data_type="all", region="us", update=False, **kwargs),
+        ]
+        for getter in getters:
+            built = getter(shared_dir=str(tmp_path))
+            assert len(list(tmp_path.iterdir())) == 13
+
+            text_cols = [col for col in built.columns if built[col].dtype.name == "category"] # Text columns come back as categoricals
+            built = built.astype({col: object for col in text_cols})
+            _check_gotten(built, "long" if "date" in built.columns else "wide")
+            assert built.equals(getter())
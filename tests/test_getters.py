@@ -16,6 +16,12 @@ import pytest
 import pandas as pd
 import numpy as np
 import datetime
+import os
+import shutil
+import asyncio
+import threading
+import time
+import concurrent.futures
 
 formats = ["long", "wide"]
 jhu_data_types = ["all", "cases", "deaths", "recovered"]
@@ -73,6 +79,245 @@ class TestGetters:
 
                             _check_gotten(df, format)
 
+    def test_warnings_point_at_caller(self, tmp_path):
+        async def get_async():
+            return await cod.get_data_nyt_async(update=False)
+
+        getters = [
+            lambda: cod.get_data_jhu(format="long", data_type="all", region="us", update=False),
+            lambda: cod.get_data_nyt(update=False, shared_dir=str(tmp_path)),
+            lambda: cod.get_jhu_location_data(update=False),
+            lambda: asyncio.run(get_async()),
+        ]
+        for getter in getters:
+            with pytest.warns(codex.FileNotUpdatedWarning) as record:
+                getter()
+            record = [warning for warning in record if issubclass(warning.category, codex.FileNotUpdatedWarning)]
+            assert len(record) == 1 # Once for all the table's files
+            assert record[0].filename == __file__
+
+    @pytest.mark.filterwarnings("ignore::covid19pandas.exceptions.FileNotUpdatedWarning")
+    def test_shared_dir(self, tmp_path):
+        getters = [
+            lambda **kwargs: cod.get_data_jhu(format="long", data_type="all", region="us", update=False, **kwargs),
+            lambda **kwargs: cod.get_data_jhu(format="wide", data_type="cases", region="global", update=False, **kwargs),
+            lambda **kwargs: cod.get_data_nyt(format="long", data_type="all", counties=True, update=False, **kwargs),
+        ]
+
+        for getter in getters:
+            df = getter()
+            saved = getter(shared_dir=str(tmp_path)) # The first call saves the table
+            mapped = getter(shared_dir=str(tmp_path)) # Later calls map it
+
+            for shared in [saved, mapped]:
+                text_cols = [col for col in shared.columns if shared[col].dtype.name == "category"] # Text columns come back as categoricals
+                shared = shared.astype({col: object for col in text_cols})
+                _check_gotten(shared, "long" if "date" in shared.columns else "wide")
+                assert shared.equals(df)
+
+        # Each table was saved once
+        assert len(list(tmp_path.iterdir())) == len(getters)
+
+        # Changes to a mapped table stay in the process that made them
+        mapped.iloc[0, -1] = -1
+        assert getters[-1](shared_dir=str(tmp_path)).iloc[0, -1] != -1
+
+    @pytest.mark.filterwarnings("ignore::covid19pandas.exceptions.FileNotUpdatedWarning")
+    def test_get_changes(self, tmp_path, monkeypatch):
+        jhu_file = cod.getters._JHU_FILE_NAMES["us"]["cases"]
+        nyt_file = "us-states.csv"
+        cod.get_data_jhu(format="long", data_type="all", region="us", update=True) # Makes sure the files have been downloaded
+        cod.get_data_nyt(format="long", data_type="all", counties=False, update=True)
+        data_dir = _copy_data_files(tmp_path, monkeypatch, [("jhu", jhu_file), ("nyt", nyt_file)])
+
+        # Stand in an older version for the previous download of each file
+        jhu = pd.read_csv(os.path.join(data_dir, "jhu", jhu_file))
+        date_cols = [col for col in jhu.columns if isinstance(pd.to_datetime(col, errors="ignore"), datetime.datetime)]
+        jhu.loc[0, date_cols[-2]] += 3 # A revised value
+        jhu = jhu.drop(columns=date_cols[-1]) # The latest day wasn't out yet
+        jhu.to_csv(cod.getters._previous_path("jhu", jhu_file), index=False)
+
+        changes = cod.get_jhu_changes(data_type="cases", region="us")
+        assert changes.columns.tolist() == ["date", "Combined_Key", "data_type", "old", "new"]
+        assert (changes["data_type"] == "cases").all()
+        assert changes.shape[0] == jhu.shape[0] + 1
+        revised = changes[changes["old"].notna()]
+        assert revised.shape[0] == 1
+        assert revised["date"].iloc[0] == pd.to_datetime(date_cols[-2])
+        assert revised["Combined_Key"].iloc[0] == jhu.loc[0, "Combined_Key"].replace(" ", "")
+        assert revised["old"].iloc[0] == revised["new"].iloc[0] + 3
+        assert (changes.loc[changes["old"].isna(), "date"] == pd.to_datetime(date_cols[-1])).all()
+
+        nyt_path = os.path.join(data_dir, "nyt", nyt_file)
+        shutil.copyfile(nyt_path, cod.getters._previous_path("nyt", nyt_file))
+        changes = cod.get_nyt_changes(data_type="all", counties=False)
+        assert changes.shape[0] == 0 # Nothing changed
+
+        nyt = pd.read_csv(nyt_path)
+        nyt.loc[5, "deaths"] -= 1
+        nyt.to_csv(cod.getters._previous_path("nyt", nyt_file), index=False)
+        changes = cod.get_nyt_changes(data_type="all", counties=False)
+        assert changes.shape[0] == 1
+        assert changes.loc[0, ["state", "data_type", "new"]].tolist() == [nyt.loc[5, "state"], "deaths", nyt.loc[5, "deaths"] + 1]
+        assert cod.get_nyt_changes(data_type="cases", counties=False).shape[0] == 0
+
+    @pytest.mark.filterwarnings("ignore::covid19pandas.exceptions.FileNotUpdatedWarning")
+    def test_changes_survive_repeated_updates(self, tmp_path, monkeypatch):
+        nyt_file = "us-states.csv"
+        data_dir = _copy_data_files(tmp_path, monkeypatch, [("nyt", nyt_file)])
+        path = os.path.join(data_dir, "nyt", nyt_file)
+        with open(path, "rb") as data_file:
+            latest = data_file.read()
+
+        def serve_latest(url, download_path, cancel=None, timeout=None): # Stands in for the server, which always has the latest version
+            with open(download_path, "wb") as data_file:
+                data_file.write(latest)
+            return True
+        monkeypatch.setattr(cod.getters, "download_github_file", serve_latest)
+
+        # Start from an older version, with one revised value
+        nyt = pd.read_csv(path)
+        nyt.loc[5, "deaths"] -= 1
+        nyt.to_csv(path, index=False)
+
+        cod.get_data_nyt(format="long", data_type="all", counties=False, update=True)
+        cod.get_data_nyt(format="long", data_type="all", counties=False, update=True) # Downloads the same content again
+        changes = cod.get_nyt_changes(data_type="all", counties=False)
+        assert changes.shape[0] == 1
+        assert changes.loc[0, ["state", "data_type", "old", "new"]].tolist() == [nyt.loc[5, "state"], "deaths", nyt.loc[5, "deaths"], nyt.loc[5, "deaths"] + 1]
+
+    @pytest.mark.filterwarnings("ignore::covid19pandas.exceptions.FileNotUpdatedWarning")
+    def test_snapshots(self, tmp_path):
+        jhu_file = cod.getters._JHU_FILE_NAMES["us"]["cases"]
+        path_here = os.path.dirname(cod.getters.__file__)
+        jhu_path = os.path.join(path_here, "data", "jhu", jhu_file)
+        current = cod.get_data_jhu(format="wide", data_type="cases", region="us", update=False)
+
+        with pytest.raises(codex.ParameterError):
+            cod.get_data_jhu(format="wide", data_type="cases", region="us", update=False, as_of="2020-05-01")
+
+        store = cod.enable_snapshots(str(tmp_path / "snapshots"))
+        try:
+            # Save a version from before the latest day came out, then the current version
+            old_path = str(tmp_path / jhu_file)
+            pd.read_csv(jhu_path).iloc[:, :-1].to_csv(old_path, index=False)
+            before = datetime.datetime.now()
+            store.add("jhu", "UID_ISO_FIPS_LookUp_Table.csv", os.path.join(path_here, "data", "jhu", "UID_ISO_FIPS_LookUp_Table.csv"))
+            store.add("jhu", jhu_file, old_path)
+            between = datetime.datetime.now()
+            store.add("jhu", jhu_file, jhu_path)
+            store.add("jhu", jhu_file, jhu_path) # Unchanged content is only stored once
+
+            assert store.history("jhu", jhu_file).shape[0] == 3
+            objects = os.listdir(tmp_path / "snapshots" / "objects")
+            assert len(objects) == 3 and len([name for name in objects if name.endswith(".delta.xz")]) == 1 # The lookup table, and the cases file in full and as differences
+
+            with open(jhu_path, "rb") as data_file:
+                assert store.get("jhu", jhu_file, datetime.datetime.now()) == data_file.read()
+
+            old = cod.get_data_jhu(format="wide", data_type="cases", region="us", update=False, as_of=between)
+            assert old.equals(current.iloc[:, :-1])
+            now = cod.get_data_jhu(format="wide", data_type="cases", region="us", update=False, as_of=datetime.datetime.now())
+            assert now.equals(current)
+
+            with pytest.raises(codex.FileDoesNotExistError):
+                cod.get_data_jhu(format="wide", data_type="cases", region="us", update=False, as_of=before - datetime.timedelta(days=1))
+            with pytest.raises(codex.ParameterError):
+                cod.get_data_jhu(format="wide", data_type="cases", region="us", as_of=between, shared_dir=str(tmp_path))
+
+            # If the latest version's base was deleted, new content is stored in full instead of relative to it
+            os.remove(tmp_path / "snapshots" / "objects" / f"{store.history('jhu', jhu_file)['hash'].iloc[0]}.xz")
+            older_path = str(tmp_path / f"older_{jhu_file}")
+            pd.read_csv(jhu_path).iloc[:, :-2].to_csv(older_path, index=False)
+            older_hash = store.add("jhu", jhu_file, older_path)
+            assert os.path.isfile(tmp_path / "snapshots" / "objects" / f"{older_hash}.xz")
+            with open(older_path, "rb") as data_file:
+                assert store.get("jhu", jhu_file, datetime.datetime.now()) == data_file.read()
+
+        finally:
+            cod.disable_snapshots()
+
+    @pytest.mark.filterwarnings("ignore::covid19pandas.exceptions.FileNotUpdatedWarning")
+    def test_async_getters(self):
+        async def get_all(update):
+            return await asyncio.gather(
+                cod.get_data_jhu_async(format="long", data_type="all", region="us", update=update),
+                cod.get_data_jhu_async(format="wide", data_type="cases", region="global", update=update),
+                cod.get_data_nyt_async(format="long", data_type="all", counties=True, update=update),
+            )
+
+        for update_option in update_options:
+            dfs = asyncio.run(get_all(update_option))
+            assert dfs[0].equals(cod.get_data_jhu(format="long", data_type="all", region="us", update=False))
+            assert dfs[1].equals(cod.get_data_jhu(format="wide", data_type="cases", region="global", update=False))
+            assert dfs[2].equals(cod.get_data_nyt(format="long", data_type="all", counties=True, update=False))
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(cod.get_data_nyt_async(counties=True, timeout=0))
+        with pytest.raises(codex.ParameterError):
+            asyncio.run(cod.get_data_jhu_async(data_type="recovered", region="us"))
+
+    @pytest.mark.filterwarnings("ignore::covid19pandas.exceptions.FileNotUpdatedWarning")
+    def test_refresher(self):
+        with pytest.raises(codex.ParameterError):
+            cod.get_data_nyt(warm=True) # No refresher running
+
+        refresher = cod.Refresher(interval=3600)
+        refresher.add_jhu(format="long", data_type="all", region="us")
+        refresher.start()
+        try:
+            with pytest.raises(codex.ParameterError):
+                cod.Refresher().start() # Only one at a time
+            with pytest.raises(codex.ParameterError):
+                cod.get_data_nyt(warm=True, as_of="2020-05-01")
+
+            jhu = cod.get_data_jhu(format="long", data_type="all", region="us", warm=True)
+            nyt = cod.get_data_nyt(format="wide", data_type="cases", counties=True, warm=True) # Not added, so it's built now and kept from then on
+            refresher.refresh()
+            assert refresher.last_refresh is not None
+
+            assert jhu.equals(cod.get_data_jhu(format="long", data_type="all", region="us", update=False))
+            assert nyt.equals(cod.get_data_nyt(format="wide", data_type="cases", counties=True, update=False))
+            _check_gotten(jhu, "long")
+
+            # Each caller can change the table's columns without affecting the others
+            jhu["extra"] = 1
+            assert "extra" not in cod.get_data_jhu(format="long", data_type="all", region="us", warm=True).columns
+
+        finally:
+            refresher.stop()
+
+        with pytest.raises(codex.ParameterError):
+            cod.get_data_jhu(format="long", data_type="all", region="us", warm=True)
+
+    @pytest.mark.filterwarnings("ignore::covid19pandas.exceptions.FileNotUpdatedWarning")
+    def test_refresher_first_gets(self, monkeypatch):
+        builds = []
+        build_data_nyt = cod.getters._build_data_nyt
+        def counted_build(*args):
+            builds.append(args)
+            time.sleep(0.2) # Give the other callers time to arrive while it's building
+            return build_data_nyt(*args)
+        monkeypatch.setattr(cod.getters, "_build_data_nyt", counted_build)
+
+        # Callers that all get a table for the first time at once wait for one build, and all get the same table
+        n_callers = 8
+        arrived = threading.Barrier(n_callers)
+        def get_warm():
+            arrived.wait()
+            return cod.get_data_nyt(format="long", data_type="all", counties=False, warm=True)
+
+        refresher = cod.Refresher(interval=3600)
+        refresher.start()
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=n_callers) as executor:
+                tables = list(executor.map(lambda i: get_warm(), range(n_callers)))
+            refresher.refresh() # The files haven't changed, so it isn't rebuilt
+        finally:
+            refresher.stop()
+
+        assert len(builds) == 1
+        assert all(table.equals(tables[0]) for table in tables)
 
     def test_deprecated_getters(self):
         with pytest.warns(codex.DeprecatedWarning):
@@ -88,6 +333,16 @@ class TestGetters:
         assert df.shape[0] > 0 and df.shape[1] > 0
 
 # Help functions
+def _copy_data_files(tmp_path, monkeypatch, files):
+    """Point the getters at a data directory in tmp_path with copies of the given (source, file name) data files, so a test can change them without touching the real ones. Returns the directory."""
+    data_dir = str(tmp_path / "data")
+    for source, file_name in files:
+        os.makedirs(os.path.join(data_dir, source, "previous"), exist_ok=True)
+        shutil.copyfile(os.path.join(cod.getters._data_dir(), source, file_name), os.path.join(data_dir, source, file_name))
+
+    monkeypatch.setattr(cod.getters, "_data_dir", lambda: data_dir)
+    return data_dir
+
 def _check_gotten(df, format, group_cols=None, allow_negs=False):
     """Standard checks to verify integrity of gotten table."""
 
@@ -17,8 +17,12 @@ import numpy as np
 import datetime
 import pytest
 import math
+import os
+import io
 
+import matplotlib
 import matplotlib.pyplot as plt
+import seaborn as sns
 
 jhu_data_types = ["all", "cases", "deaths", "recovered"]
 jhu_regions = ["global", "us"]
@@ -38,6 +42,12 @@ class TestSelectors:
         cod.get_data_nyt(data_type="all", counties=False, update=True)
         cod.get_data_nyt(data_type="all", counties=True, update=True)
 
+    @pytest.fixture(autouse=True)
+    def close_figures(self):
+        """Closes the pyplot figures each test opens, so they don't pile up over the test run."""
+        yield
+        plt.close("all")
+
     def test_plot_lines_jhu(self):
         """Test the plot_lines function with the JHU data."""
         for data_type in jhu_data_types:
@@ -83,6 +93,142 @@ class TestSelectors:
                     fig, ax = cod.plot_lines(data=top_ten, x_col="date", y_col=plot_type, group_col=region_col)
                     plt.show()
 
+    def test_plot_lines_fast(self):
+        """Test that the fast mode of plot_lines draws and labels the same lines as the seaborn mode."""
+        df = cod.get_data_nyt(format="long", data_type="all", counties=False, update=False)
+        top_ten = cod.select_top_x_regions(data=df, data_col="cases", region_cols="state", x=10)
+
+        axes = []
+        for fast in [False, True]:
+            fig, ax = cod.plot_lines(data=top_ten, x_col="date", y_col="cases", group_col="state", y_logscale=True, fast=fast)
+            axes.append(ax)
+            plt.close(fig)
+        slow_ax, fast_ax = axes
+
+        assert fast_ax.get_legend_handles_labels()[1] == slow_ax.get_legend_handles_labels()[1]
+        assert fast_ax.get_xlabel() == slow_ax.get_xlabel()
+        assert fast_ax.get_ylabel() == slow_ax.get_ylabel()
+        assert fast_ax.get_title() == slow_ax.get_title()
+        assert fast_ax.get_legend().get_title().get_text() == slow_ax.get_legend().get_title().get_text()
+        assert fast_ax.get_yscale() == "log"
+        assert np.allclose(fast_ax.get_xlim(), slow_ax.get_xlim())
+
+        # Several counties per state and date can't be drawn without aggregating
+        counties = cod.get_data_nyt(format="long", data_type="cases", counties=True, update=False)
+        with pytest.raises(codex.ParameterError):
+            cod.plot_lines(data=counties, x_col="date", y_col="cases", group_col="state", fast=True)
+
+    def test_plot_lines_downsample(self):
+        """Test that downsampled lines stay within the point budget and keep their ends and extremes."""
+        df = cod.get_data_nyt(format="long", data_type="all", counties=False, update=False)
+        max_points = 20
+
+        for downsample in ["lttb", "minmax"]:
+            for fast in [False, True]:
+                fig, ax = cod.plot_lines(data=df, x_col="date", y_col="cases", group_col="state", fast=fast, max_points=max_points, downsample=downsample)
+                plt.close(fig)
+
+            sampled = cod.plotters._downsample(df, "date", "cases", "state", max_points, downsample)
+            assert sampled.index.isin(df.index).all()
+            assert sampled.index.is_monotonic_increasing # Original row order
+            assert (sampled.groupby("state").size() <= max_points).all()
+
+            grouped = df.groupby("state")
+            sampled_grouped = sampled.groupby("state")
+            assert sampled_grouped["date"].min().equals(grouped["date"].min())
+            assert sampled_grouped["date"].max().equals(grouped["date"].max())
+            if downsample == "minmax":
+                assert sampled_grouped["cases"].max().equals(grouped["cases"].max())
+                assert sampled_grouped["cases"].min().equals(grouped["cases"].min())
+
+        state = cod.select_regions(df, region_col="state", regions="California")
+        fig, (ax1, ax2) = cod.plot_lines_two_y(data=state, x_col="date", y1_col="cases", y2_col="deaths", max_points=max_points)
+        assert len(ax1.get_lines()[0].get_xdata()) == max_points
+        assert len(ax2.get_lines()[0].get_xdata()) == max_points
+        plt.close(fig)
+
+        with pytest.raises(codex.ParameterError):
+            cod.plot_lines(data=df, x_col="date", y_col="cases", group_col="state", max_points=max_points, downsample="median")
+
+    def test_lines_two_y_plotter(self):
+        """Test that updating a LinesTwoYPlotter draws the same lines as plot_lines_two_y, on the same figure."""
+        df = cod.get_data_nyt(format="long", data_type="all", counties=False, update=False)
+        state = cod.select_regions(df, region_col="state", regions="California")
+
+        plotter = cod.LinesTwoYPlotter(x_col="date", y1_col="cases", y2_col="deaths", data=state.iloc[:10], y_logscale=True)
+        fig = plotter.fig
+        legend = plotter.axes[1].get_legend()
+        plotter.update(state)
+
+        expected_fig, expected_axes = cod.plot_lines_two_y(data=state, x_col="date", y1_col="cases", y2_col="deaths", y_logscale=True)
+        assert plotter.fig is fig
+        assert plotter.axes[1].get_legend() is legend
+        for ax, expected_ax in zip(plotter.axes, expected_axes):
+            assert len(ax.get_lines()) == 1
+            assert np.array_equal(ax.get_lines()[0].get_ydata(), expected_ax.get_lines()[0].get_ydata())
+            assert np.allclose(ax.get_xlim(), expected_ax.get_xlim())
+            assert np.allclose(ax.get_ylim(), expected_ax.get_ylim())
+            assert ax.get_ylabel() == expected_ax.get_ylabel()
+        assert plotter.axes[1].get_title() == expected_axes[1].get_title()
+
+        plt.close(fig)
+        plt.close(expected_fig)
+
+    def test_plot_without_pyplot(self):
+        """Test plotting on caller-supplied axes, and on figures made without pyplot, which shouldn't change global state."""
+        df = cod.get_data_nyt(format="long", data_type="all", counties=False, update=False)
+        state = cod.select_regions(df, region_col="state", regions="California")
+
+        open_figures = plt.get_fignums()
+        rc_before = dict(matplotlib.rcParams)
+        fig, ax = cod.plot_lines(data=state, x_col="date", y_col="cases", group_col="state", seaborn_style="dark", pyplot=False)
+        two_fig, (ax1, ax2) = cod.plot_lines_two_y(data=state, x_col="date", y1_col="cases", y2_col="deaths", seaborn_style="white", pyplot=False)
+        plotter = cod.LinesTwoYPlotter(x_col="date", y1_col="cases", y2_col="deaths", data=state, pyplot=False)
+        assert plt.get_fignums() == open_figures
+        assert dict(matplotlib.rcParams) == rc_before
+        assert ax.get_facecolor() == matplotlib.colors.to_rgba(sns.axes_style("dark")["axes.facecolor"]) # The style was still applied to the figure
+        for figure in [fig, two_fig, plotter.fig]:
+            figure.savefig(io.BytesIO(), format="png")
+
+        fig, axes = plt.subplots(1, 2)
+        out_fig, out_ax = cod.plot_lines(data=state, x_col="date", y_col="cases", group_col="state", ax=axes[0])
+        out_fig_two, (out_ax1, out_ax2) = cod.plot_lines_two_y(data=state, x_col="date", y1_col="cases", y2_col="deaths", ax=axes[1])
+        assert out_fig is fig and out_fig_two is fig
+        assert out_ax is axes[0] and out_ax1 is axes[1]
+        assert len(fig.axes) == 3 # The twin axes were added to the same figure
+        plt.close(fig)
+
+    def test_plot_regions_to_files(self, tmp_path):
+        """Test saving a plot for each region to files."""
+        df = cod.get_data_nyt(format="long", data_type="cases", counties=True, update=False)
+        states = df["state"].unique()
+        open_figures = plt.get_fignums()
+
+        for n_jobs in [1, 2]:
+            out_dir = tmp_path / f"jobs_{n_jobs}"
+            paths = cod.plot_regions_to_files(df, x_col="date", y_col="cases", region_col="state", out_dir=str(out_dir), group_col="county", n_jobs=n_jobs)
+            assert len(paths) == len(states)
+            assert sorted(os.listdir(out_dir)) == sorted(os.path.basename(path) for path in paths)
+
+            grid_paths = cod.plot_regions_to_files(df, x_col="date", y_col="cases", region_col="state", out_dir=str(out_dir / "grid"), group_col="county", grid=(2, 3), file_format="svg", fast=True, n_jobs=n_jobs)
+            assert len(grid_paths) == math.ceil(len(states) / 6)
+
+            assert all(os.path.getsize(path) > 0 for path in paths + grid_paths)
+
+        # Rows missing a region get their own file, instead of being dropped
+        state_df = cod.get_data_nyt(format="long", data_type="cases", counties=False, update=False)
+        few = state_df[state_df["state"].isin(states[:3])].copy()
+        few.loc[few["state"] == states[0], "state"] = np.nan
+        paths = cod.plot_regions_to_files(few, x_col="date", y_col="cases", region_col="state", out_dir=str(tmp_path / "missing"), fast=True)
+        assert sorted(os.path.basename(path) for path in paths) == sorted(["Unknown.png"] + [f"{state.replace(' ', '_')}.png" for state in states[1:3]])
+
+        # Categorical regions, like in shared tables, only get files for the categories that have rows
+        few["state"] = pd.Categorical(few["state"], categories=states)
+        paths = cod.plot_regions_to_files(few, x_col="date", y_col="cases", region_col="state", out_dir=str(tmp_path / "categorical"), fast=True)
+        assert sorted(os.path.basename(path) for path in paths) == sorted(["Unknown.png"] + [f"{state.replace(' ', '_')}.png" for state in states[1:3]])
+
+        assert plt.get_fignums() == open_figures # No figures were left open
+
     def test_plot_lines_two_y_jhu(self):
         """Test the plot_lines function with the JHU data."""
         for data_type in jhu_data_types:
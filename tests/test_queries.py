@@ -0,0 +1,89 @@
+#   Copyright 2018 Samuel Payne sam_payne@byu.edu
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#       http://www.apache.org/licenses/LICENSE-2.0
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import covid19pandas as cod
+import covid19pandas.exceptions as codex
+from test_getters import _check_gotten
+
+import pandas as pd
+import numpy as np
+import datetime
+import pytest
+
+nyt_county_options = [True, False]
+
+@pytest.mark.filterwarnings("ignore::covid19pandas.exceptions.FileNotUpdatedWarning")
+class TestQueries:
+
+    @classmethod
+    def setup_class(cls):
+        """Ensures that all data tables have been recently downloaded, so we can skip the update in all our tests to improve speed."""
+        cod.get_data_jhu(data_type="all", region="us", update=True)
+        cod.get_data_nyt(data_type="all", counties=False, update=True)
+        cod.get_data_nyt(data_type="all", counties=True, update=True)
+
+    def test_query_jhu(self):
+        df = cod.get_data_jhu(format="long", data_type="all", region="us", update=False)
+        regions = ["Washington", "New York", "Arizona"]
+
+        out = cod.query(df).regions("Province_State", regions).daily().rolling(7).since(100).run()
+        _check_gotten(out, format="long", allow_negs=True)
+
+        expected = self._chain(df, region_cols=["Combined_Key"], data_cols=["cases", "deaths"], region_col="Province_State", regions=regions)
+        assert out.equals(expected)
+
+    def test_query_nyt(self):
+        for county_option in nyt_county_options:
+            df = cod.get_data_nyt(format="long", data_type="all", counties=county_option, update=False)
+            region_cols = ["county", "state"] if county_option else ["state"]
+            regions = ["Washington", "New York", "Arizona"]
+
+            out = cod.query(df).regions("state", regions).daily().rolling(7).since(100).run()
+            _check_gotten(out, format="long", allow_negs=True)
+
+            expected = self._chain(df, region_cols=region_cols, data_cols=["cases", "deaths"], region_col="state", regions=regions)
+            assert out.equals(expected)
+
+    def test_query_combined_wide(self):
+        df = cod.get_data_jhu(format="wide", data_type="cases", region="us", update=False)
+
+        out = cod.query(df, data_cols="cases").regions("Province_State", ["Washington", "New York"], combine_subregions=True).daily().run(columns=["daily_cases"])
+        _check_gotten(out, format="long", group_cols=["date", "Province_State"], allow_negs=True)
+        assert out.columns.tolist() == ["date", "Province_State", "daily_cases"]
+
+        combined = cod.select_regions(df, region_col="Province_State", regions=["Washington", "New York"], combine_subregions=True)
+        expected = cod.calc_daily_change(combined, "cases", region_cols="Province_State")
+        for region in ["Washington", "New York"]:
+            assert np.array_equal(out.loc[out["Province_State"] == region, "daily_cases"].values, expected.loc[expected["Province_State"] == region].iloc[:, 1:].values.flatten())
+
+    def test_query_errors(self):
+        df = cod.get_data_nyt(format="long", data_type="all", counties=True, update=False)
+
+        with pytest.raises(codex.ParameterError):
+            cod.query(df, region_cols="state").daily().run() # Not unique for each day
+
+        with pytest.raises(codex.ParameterError):
+            cod.query(df).daily(data_cols="recovered").run()
+
+        with pytest.raises(codex.ParameterError):
+            cod.query(df).daily().regions("state", "Washington", combine_subregions=True).run()
+
+    # -------------------------------------------------------------------------------------------------------------
+    # Helper methods
+    # -------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _chain(df, region_cols, data_cols, region_col, regions):
+        """Run the same steps as our test queries, but with the separate selector functions."""
+        out = cod.select_regions(df, region_col=region_col, regions=regions)
+        out = cod.calc_daily_change(out, data_cols, region_cols=region_cols)
+        out = cod.calc_x_day_rolling_mean(out, ["daily_" + col for col in data_cols], region_cols=region_cols, x=7)
+        out = cod.calc_days_since_min_count(out, data_cols[0], region_cols=region_cols, min_count=100)
+        return out.reset_index(drop=True)
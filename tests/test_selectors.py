@@ -93,6 +93,73 @@ class TestSelectors:
                             if county_option:
                                 self._check_select_top_x(df, format, data_type, num_regions=2)
 
+    def test_select_top_x_rank_date(self):
+        for format in formats:
+            df = cod.get_data_jhu(format=format, data_type="cases", region="us", update=False)
+            original = df.copy()
+
+            if format == "long":
+                dates = df["date"].drop_duplicates().sort_values()
+            else:
+                dates = pd.Series([col for col in df.columns if issubclass(type(col), datetime.date)]).sort_values()
+            rank_date = dates.iloc[-30]
+
+            out = cod.select_top_x_regions(df, data_col="cases", region_cols="Province_State", x=5, rank_date=rank_date, rank_window=7)
+            _check_gotten(out, format, group_cols=["date", "Province_State"] if format == "long" else ["Province_State"])
+
+            # Check that the regions with the most cases summed over the window were selected
+            long_df = df if format == "long" else df.melt(id_vars=[col for col in df.columns if not issubclass(type(col), datetime.date)], var_name="date", value_name="cases")
+            window = long_df[(long_df["date"] <= rank_date) & (long_df["date"] > rank_date - pd.Timedelta(days=7))]
+            expected = window.groupby("Province_State")["cases"].sum().sort_values().tail(5).index
+            assert set(out["Province_State"].unique()) == set(expected)
+
+            # Make sure the table we passed wasn't changed
+            assert df.equals(original)
+
+            with pytest.raises(codex.ParameterError):
+                cod.select_top_x_regions(df, data_col="cases", region_cols="Province_State", x=5, rank_date="1900-01-01")
+
+    def test_select_top_x_rollups(self, monkeypatch):
+        for format in formats:
+            df = cod.get_data_jhu(format=format, data_type="cases", region="us", update=False)
+            rollups = cod.Rollups(df)
+            assert rollups.levels == ["Province_State", "Country_Region"]
+
+            for region_col in rollups.levels:
+                expected = cod.select_top_x_regions(df, data_col="cases", region_cols=region_col, x=5, exclude=["New York"])
+                out = cod.select_top_x_regions(df, data_col="cases", region_cols=region_col, x=5, exclude=["New York"], rollups=rollups)
+                assert out.equals(expected)
+
+        # Check the cached rollups from the getter
+        df = cod.get_data_jhu(format="long", data_type="all", region="us", update=False)
+        rollups = cod.get_jhu_rollups(data_type="all", region="us", update=False)
+        assert cod.get_jhu_rollups(data_type="all", region="us", update=False) is rollups # Same data, so it's cached
+
+        def fail_build(*args, **kwargs):
+            raise AssertionError("The table was built again for cached rollups.")
+        with monkeypatch.context() as patch:
+            patch.setattr(cod.getters, "_build_data_jhu", fail_build)
+            assert cod.get_jhu_rollups(data_type="all", region="us", update=False) is rollups # A cache hit doesn't build the table
+
+        expected = cod.select_top_x_regions(df, data_col="cases", region_cols="Province_State", x=5, other_data_cols=["deaths"])
+        assert cod.select_top_x_regions(df, data_col="cases", region_cols="Province_State", x=5, other_data_cols=["deaths"], rollups=rollups).equals(expected)
+
+        with pytest.raises(codex.ParameterError):
+            cod.select_regions(df, region_col="Province_State", regions="Washington", combine_subregions=True, rollups=cod.Rollups(cod.get_data_jhu(format="wide", data_type="cases", region="us", update=False)))
+
+        # Rollups for the full table can't answer for a table with a day dropped
+        last_day = df[df["date"] == df["date"].max()]
+        sub = df[df["date"] < df["date"].max()]
+        state = last_day["Province_State"].iloc[0]
+        expected = cod.select_regions(sub, region_col="Province_State", regions=state, combine_subregions=True, data_cols=["cases"])
+        assert expected["date"].max() < df["date"].max()
+        for select in [
+            lambda: cod.select_regions(sub, region_col="Province_State", regions=state, combine_subregions=True, data_cols=["cases"], rollups=rollups),
+            lambda: cod.select_top_x_regions(sub, data_col="cases", region_cols="Province_State", x=5, rollups=rollups),
+        ]:
+            with pytest.raises(codex.ParameterError):
+                select()
+
     # -------------------------------------------------------------------------------------------------------------
     # Tests for select_regions
     # -------------------------------------------------------------------------------------------------------------
@@ -129,6 +196,17 @@ class TestSelectors:
                             cols_to_keep = [data_type]
                         self._check_select_regions(df, format, cols_kept=cols_to_keep)
 
+    def test_select_regions_index_repeats(self):
+        df = cod.get_data_nyt(format="long", data_type="all", counties=False, update=False)
+        states = df["state"].unique()
+        df.loc[df["state"] == states[0], "state"] = np.nan
+        region_index = cod.RegionIndex(df)
+
+        for regions in [[states[1], states[1]], [states[2], np.nan, states[2], None], [np.nan, np.nan]]:
+            expected = cod.select_regions(df, region_col="state", regions=regions)
+            assert cod.select_regions(df, region_col="state", regions=regions, region_index=region_index).equals(expected)
+            assert expected.shape[0] == df["state"].isin(regions).sum() # Each row once
+
     # -------------------------------------------------------------------------------------------------------------
     # Tests for calc_x_day_rolling_mean
     # -------------------------------------------------------------------------------------------------------------
@@ -172,6 +250,36 @@ class TestSelectors:
                         # Note that we still also perform this test if data_type == "all" because we can also calculate the x day mean for all columns.
                         self._check_calc_x_day_rolling_mean(df, format, data_type)
 
+    # -------------------------------------------------------------------------------------------------------------
+    # Tests for calc_rolling_stats
+    # -------------------------------------------------------------------------------------------------------------
+    def test_calc_rolling_stats(self):
+        tables = {
+            "jhu": (cod.get_data_jhu(format="long", data_type="all", region="us", update=False), ["Province_State", "Admin2"]),
+            "nyt": (cod.get_data_nyt(format="long", data_type="all", counties=True, update=False), ["county", "state"]),
+        }
+
+        windows = [3, 7, 14]
+        stats = ["mean", "sum", "min", "max"]
+        for name, (df, region_cols) in tables.items():
+            for center in [True, False]:
+                out = cod.calc_rolling_stats(df, ["cases", "deaths"], region_cols=region_cols, windows=windows, stats=stats, center=center)
+                _check_gotten(out, format="long", group_cols=["date"] + region_cols)
+
+                for window in windows:
+                    # Check the means against calc_x_day_rolling_mean
+                    means = cod.calc_x_day_rolling_mean(df, ["cases", "deaths"], region_cols=region_cols, x=window, center=center)
+                    assert np.allclose(out[f"mean_{window}_day_cases"], means["mean_cases"])
+                    assert np.allclose(out[f"mean_{window}_day_deaths"], means["mean_deaths"])
+
+                    # Check the other statistics against pandas for one region
+                    region_filter = (df[region_cols] == df[region_cols].iloc[0]).all(axis="columns")
+                    region_df = df[region_filter].sort_values(by="date")
+                    region_out = out[region_filter].sort_values(by="date")
+                    for stat in ["sum", "min", "max"]:
+                        expected = region_df["deaths"].rolling(window=window, min_periods=1, center=center).agg(stat)
+                        assert np.allclose(region_out[f"{stat}_{window}_day_deaths"], expected)
+
     # -------------------------------------------------------------------------------------------------------------
     # Tests for calc_daily_change
     # -------------------------------------------------------------------------------------------------------------
@@ -215,6 +323,137 @@ class TestSelectors:
                         # Note that we still also perform this test if data_type == "all" because we can also calculate daily change for all columns.
                         self._check_daily_change(df, format=format, data_type=data_type)
 
+    # -------------------------------------------------------------------------------------------------------------
+    # Tests for extending calc_daily_change and calc_x_day_rolling_mean with new days
+    # -------------------------------------------------------------------------------------------------------------
+    def test_calc_extend_previous(self):
+        tables = {
+            "jhu": (cod.get_data_jhu(format="long", data_type="all", region="us", update=False), ["Combined_Key"]),
+            "nyt": (cod.get_data_nyt(format="long", data_type="all", counties=True, update=False), ["county", "state"]),
+        }
+
+        for name, (df, region_cols) in tables.items():
+            data_types = ["cases", "deaths"]
+            split_date = df["date"].drop_duplicates().sort_values().iloc[-5]
+            old = df[df["date"] < split_date].reset_index(drop=True)
+            new = df[df["date"] >= split_date].reset_index(drop=True)
+
+            full = cod.calc_daily_change(df, data_types, region_cols=region_cols)
+            extended = cod.calc_daily_change(new, data_types, region_cols=region_cols, previous=cod.calc_daily_change(old, data_types, region_cols=region_cols))
+            assert extended.equals(full.reset_index(drop=True))
+
+            for center in [True, False]:
+                full = cod.calc_x_day_rolling_mean(df, data_types, region_cols=region_cols, x=7, center=center)
+                previous = cod.calc_x_day_rolling_mean(old, data_types, region_cols=region_cols, x=7, center=center)
+                extended = cod.calc_x_day_rolling_mean(new, data_types, region_cols=region_cols, x=7, center=center, previous=previous)
+                assert np.allclose(extended[["mean_cases", "mean_deaths"]].values, full[["mean_cases", "mean_deaths"]].values)
+                assert extended.drop(columns=["mean_cases", "mean_deaths"]).equals(full.drop(columns=["mean_cases", "mean_deaths"]).reset_index(drop=True))
+
+                # A previous table that isn't in date order gets the same values, in its own order
+                perm = np.random.default_rng(0).permutation(previous.shape[0])
+                shuffled = cod.calc_x_day_rolling_mean(new, data_types, region_cols=region_cols, x=7, center=center, previous=previous.take(perm))
+                expected = extended.take(np.concatenate([perm, np.arange(previous.shape[0], extended.shape[0])])).reset_index(drop=True)
+                assert np.allclose(shuffled[["mean_cases", "mean_deaths"]].values, expected[["mean_cases", "mean_deaths"]].values)
+
+    # -------------------------------------------------------------------------------------------------------------
+    # Tests for splitting calculations between processes
+    # -------------------------------------------------------------------------------------------------------------
+    def test_calc_n_jobs(self, monkeypatch):
+        # Tables this small are done in this process unless we lower the threshold, so check that first
+        def no_processes(*args, **kwargs):
+            raise AssertionError("Started processes for a small table")
+
+        df = cod.get_data_nyt(format="long", data_type="all", counties=False, update=False)
+        with monkeypatch.context() as patch:
+            patch.setattr(cod.selectors.concurrent.futures, "ProcessPoolExecutor", no_processes)
+            assert cod.calc_daily_change(df, "cases", region_cols="state", n_jobs=2).equals(cod.calc_daily_change(df, "cases", region_cols="state"))
+
+        monkeypatch.setattr(cod.selectors, "_MIN_ROWS_PER_JOB", 1)
+        tables = {
+            "jhu": (cod.get_data_jhu(format="long", data_type="all", region="us", update=False), ["Combined_Key"]),
+            "nyt": (cod.get_data_nyt(format="long", data_type="all", counties=True, update=False), ["county", "state"]),
+        }
+
+        for name, (df, region_cols) in tables.items():
+            data_types = ["cases", "deaths"]
+            assert cod.calc_daily_change(df, data_types, region_cols=region_cols, n_jobs=2).equals(cod.calc_daily_change(df, data_types, region_cols=region_cols))
+            assert cod.calc_x_day_rolling_mean(df, data_types, region_cols=region_cols, x=7, n_jobs=2).equals(cod.calc_x_day_rolling_mean(df, data_types, region_cols=region_cols, x=7))
+            assert cod.calc_rolling_stats(df, data_types, region_cols=region_cols, windows=[3, 7], stats=["mean", "max"], n_jobs=2).equals(cod.calc_rolling_stats(df, data_types, region_cols=region_cols, windows=[3, 7], stats=["mean", "max"]))
+            assert cod.calc_days_since_min_count(df, "cases", region_cols=region_cols, min_count=100, n_jobs=2).equals(cod.calc_days_since_min_count(df, "cases", region_cols=region_cols, min_count=100))
+
+            with pytest.raises(codex.ParameterError):
+                cod.calc_daily_change(df, data_types, region_cols=region_cols, n_jobs=0)
+
+        # Errors in the other processes still reach us
+        with pytest.raises(codex.ParameterError):
+            cod.calc_daily_change(tables["nyt"][0], "cases", region_cols="state", n_jobs=2)
+
+    # -------------------------------------------------------------------------------------------------------------
+    # Tests for shared tables, whose text columns are categoricals
+    # -------------------------------------------------------------------------------------------------------------
+    def test_shared_tables(self, tmp_path):
+        getters = [
+            (lambda **kwargs: cod.get_data_jhu(format="long", data_type="all", region="global", update=False, **kwargs), "Country/Region", ["Province/State", "Country/Region"], ["cases", "deaths"]),
+            (lambda **kwargs: cod.get_data_jhu(format="wide", data_type="cases", region="global", update=False, **kwargs), "Country/Region", ["Province/State", "Country/Region"], ["cases"]),
+            (lambda **kwargs: cod.get_data_nyt(format="long", data_type="all", counties=True, update=False, **kwargs), "state", ["county", "state"], ["cases", "deaths"]),
+        ]
+
+        for getter, region_col, region_cols, data_types in getters:
+            df = getter()
+            shared = getter(shared_dir=str(tmp_path))
+            regions = list(df[region_col].dropna().unique()[:3])
+            long_data_types = data_types if "date" in df.columns else []
+
+            calcs = [
+                lambda df: cod.select_regions(df, region_col, regions),
+                lambda df: cod.select_regions(df, region_col, regions, region_index=cod.RegionIndex(df, region_col)),
+                lambda df: cod.select_regions(df, region_col, regions, combine_subregions=True, data_cols=long_data_types),
+                lambda df: cod.select_regions(df, region_col, regions, combine_subregions=True, data_cols=long_data_types, rollups=cod.Rollups(df)),
+                lambda df: cod.select_top_x_regions(df, data_types[0], region_col, x=3),
+                lambda df: cod.select_top_x_regions(df, data_types[0], region_cols, x=3, combine_subregions=False),
+                lambda df: cod.calc_daily_change(df, data_types, region_cols=region_cols),
+                lambda df: cod.calc_x_day_rolling_mean(df, data_types, region_cols=region_cols, x=3),
+                lambda df: cod.calc_rolling_stats(df, data_types, region_cols=region_cols, windows=[3], stats=["mean", "max"]),
+                lambda df: cod.calc_days_since_min_count(df, data_types[0], region_cols=region_cols, min_count=10),
+            ]
+
+            # The results are the same as on the unshared table, apart from the text columns staying categorical
+            for calc in calcs:
+                result = calc(shared)
+                text_cols = [col for col in result.columns if result[col].dtype.name == "category"]
+                assert result.astype({col: object for col in text_cols}).equals(calc(df))
+
+    # -------------------------------------------------------------------------------------------------------------
+    # Tests for getter tables changed in place
+    # -------------------------------------------------------------------------------------------------------------
+    def test_in_place_edits(self):
+        calcs = [
+            lambda df: cod.calc_daily_change(df, ["cases"], region_cols=["state"]),
+            lambda df: cod.calc_x_day_rolling_mean(df, "cases", region_cols=["state"], x=7),
+            lambda df: cod.calc_rolling_stats(df, "cases", region_cols=["state"], windows=[3]),
+            lambda df: cod.calc_days_since_min_count(df, "cases", region_cols=["state"], min_count=1),
+        ]
+
+        # Keys edited into duplicates, a cell at a time or a column at a time, are caught the same as on a copy
+        for edit in ["cell", "column"]:
+            for calc in calcs:
+                df = cod.get_data_nyt(format="long", data_type="all", counties=False, update=False)
+                if edit == "cell":
+                    df.loc[1, ["date", "state"]] = df.loc[0, ["date", "state"]].values
+                else:
+                    states = df["state"].unique()
+                    df["state"] = df["state"].replace({states[1]: states[0]})
+                with pytest.raises(codex.ParameterError):
+                    calc(df)
+                with pytest.raises(codex.ParameterError):
+                    calc(df.copy())
+
+        # Dates edited out of order give the same results as on a copy
+        df = cod.get_data_nyt(format="long", data_type="all", counties=False, update=False)
+        df.loc[0, "date"] = df["date"].max() + pd.Timedelta(days=1)
+        for calc in calcs:
+            assert calc(df).equals(calc(df.copy()))
+
     # -------------------------------------------------------------------------------------------------------------
     # Tests for calc_days_since_min_count
     # -------------------------------------------------------------------------------------------------------------
@@ -506,6 +745,18 @@ class TestSelectors:
                         if name == "selected_uncombined":
                             assert out[col].equals(df.loc[df[region_col].isin(regions), col])
 
+        # Make sure selecting through a RegionIndex gives the same tables
+        region_index = cod.RegionIndex(df)
+        for i in range(0, len(regions)):
+            assert cod.select_regions(df, region_col=region_col, regions=regions[i:], combine_subregions=True, data_cols=cols_kept, region_index=region_index).equals(cod.select_regions(df, region_col=region_col, regions=regions[i:], combine_subregions=True, data_cols=cols_kept))
+        assert cod.select_regions(df, region_col=region_col, regions=regions, region_index=region_index).equals(dfs["selected_uncombined"])
+
+        # Make sure looking the sums up in Rollups gives the same tables
+        rollups = cod.Rollups(df, levels=region_col, data_cols=cols_kept if format == "long" else None)
+        for i in range(0, len(regions)):
+            assert cod.select_regions(df, region_col=region_col, regions=regions[i:], combine_subregions=True, data_cols=cols_kept, rollups=rollups).equals(cod.select_regions(df, region_col=region_col, regions=regions[i:], combine_subregions=True, data_cols=cols_kept))
+        assert cod.select_regions(df, region_col=region_col, regions=regions, rollups=rollups).equals(dfs["selected_uncombined"])
+
     @staticmethod
     def _check_calc_x_day_rolling_mean(df, format, data_type, other_input_data_types=[]):
 
@@ -704,3 +955,12 @@ class TestSelectors:
             num_days = df.columns.map(lambda col: issubclass(type(col), datetime.date)).to_series().astype(bool).sum()
 
         assert (ct[f"days_since_{min_count}_{data_type}"] <= num_days).all()
+
+        # Check that counting from the first crossing keeps every day after each region first reached min_count
+        first = cod.calc_days_since_min_count(df, data_type, region_cols=group_cols, min_count=min_count, since_first_crossing=True)
+        _check_gotten(first, format="long", allow_negs=True)
+        assert first.shape[0] >= ct.shape[0]
+
+        first_days = first[first[f"days_since_{min_count}_{data_type}"] == 0]
+        assert (first_days[data_type] >= min_count).all()
+        assert first_days.duplicated(subset=group_cols).sum() == 0